@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Generate a synthetic triage tree for benchmarking the skill scripts.
+
+Usage:
+    python gen_tree.py <out_dir> [--size 1k|10k|100k | --issues N] [--repos N] [--log-ratio F]
+                       [--dumps N] [--dump-size BYTES] [--seed N] [--force]
+
+Writes, under <out_dir>:
+    config/repos.yaml          one entry per synthetic repo (bench/repo0, bench/repo1, ...) with areas
+    config/local.yaml          user.login, so generate-summary keeps the synthetic PRs
+    issues/<owner>-<repo>/<N>/ analysis.json, github.json, analysis.md, and for --log-ratio of the
+                               issues a .bookkeeping/<timestamp>.log pending progress note
+    dumps/                     minidump, ELF core and Mach-O core headers padded (sparsely) to
+                               --dump-size, mixed with non-dump files (ELF executables, text)
+    .bookkeeping/dumps.delete  retention reminders for the dumps, half of them already expired
+    prs/<owner>-<repo>.json    open PRs linked to some of the fix candidates
+    bench.json                 what was generated; run_bench.py reads it (also to serve the
+                               synthetic GitHub issue listing)
+
+Issue numbers are spread over 1..3x the per-repo count, so roughly two thirds of the open
+issues the synthetic GitHub listing reports are untriaged. Output is deterministic for a seed.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import struct
+import sys
+from datetime import datetime, timedelta, timezone
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+OWNER = "bench"
+USER = "bench-user"
+# Spacing of issue numbers: a repo with n triaged issues has numbers up to NUMBER_SPREAD * n.
+NUMBER_SPREAD = 3
+
+AREAS = {
+    "Debugger": (["area-debugger", "sos"], ["sos", "clrstack", "dumpheap", "breakpoint"]),
+    "Diagnostics Client": (["area-client"], ["diagnosticsclient", "eventpipe", "ipc"]),
+    "Dump Collection": (["area-dumps"], ["createdump", "minidump", "core dump", "crash"]),
+    "Tracing": (["area-trace"], ["trace", "counters", "etw", "nettrace"]),
+    "Symbols": (["area-symbols"], ["symbol", "pdb", "symstore"]),
+    "Docs": (["documentation"], ["docs", "readme", "typo"]),
+}
+WORDS = ["sos", "clrstack", "dumpheap", "eventpipe", "createdump", "minidump", "trace", "counters",
+         "symbol", "pdb", "crash", "hang", "timeout", "arm64", "linux", "macos", "windows", "fails",
+         "exception", "regression", "slow", "missing", "null", "leak", "docs", "startup", "attach"]
+CATEGORIES = ["bug", "bug", "bug", "feature-request", "question", "docs"]
+STATUSES = ["reproduced", "not-reproduced", "needs-info", "fix-candidate", "blocked", "already-fixed",
+            "by-design", "stale", "duplicate", "platform-blocked", "error"]
+ACTIONABILITY = ["high", "medium", "low"]
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _write_json(path: str, data) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def repo_names(count: int) -> list[str]:
+    return [f"{OWNER}/repo{i}" for i in range(count)]
+
+
+def is_open(number: int) -> bool:
+    """Synthetic GitHub state: every fifth issue is closed."""
+    return number % 5 != 0
+
+
+def is_pr(number: int) -> bool:
+    """Synthetic GitHub listing: every eleventh number is a pull request."""
+    return number % 11 == 0
+
+
+def issue_title(number: int) -> str:
+    rng = random.Random(number)
+    return f"{' '.join(rng.sample(WORDS, 4)).capitalize()} ({number})"
+
+
+def write_config(out: str, repos: list[str]) -> None:
+    os.makedirs(os.path.join(out, "config"), exist_ok=True)
+    lines = []
+    for repo in repos:
+        lines += [f"{repo}:", "  default_branch: main", "  areas:"]
+        for area, (labels, keywords) in AREAS.items():
+            lines.append(f"    {area}:")
+            lines.append("      labels:")
+            lines += [f"        - {label}" for label in labels]
+            lines.append("      title_keywords:")
+            lines += [f"        - {kw}" for kw in keywords]
+    with open(os.path.join(out, "config", "repos.yaml"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    with open(os.path.join(out, "config", "local.yaml"), "w", encoding="utf-8") as f:
+        f.write(f"user:\n  login: {USER}\n")
+
+
+def write_issue(issue_dir: str, repo: str, number: int, rng: random.Random, with_log: bool) -> dict:
+    created = BASE_TIME + timedelta(minutes=number * 7)
+    labels = [{"name": label} for label in rng.sample([l for ls, _ in AREAS.values() for l in ls], rng.randint(0, 2))]
+    status = rng.choice(STATUSES)
+    has_fix = status == "fix-candidate" or rng.random() < 0.05
+    os.makedirs(issue_dir)
+    _write_json(os.path.join(issue_dir, "github.json"), {
+        "issue": {"fetched_at": _iso(created + timedelta(days=30)), "data": {
+            "number": number, "title": issue_title(number), "state": "open" if is_open(number) else "closed",
+            "html_url": f"https://github.com/{repo}/issues/{number}", "labels": labels,
+            "assignees": [{"login": USER}] if rng.random() < 0.1 else [],
+            "created_at": _iso(created), "updated_at": _iso(created + timedelta(days=rng.randint(0, 60))),
+            "body": " ".join(rng.choices(WORDS, k=rng.randint(20, 200))),
+        }},
+        "comments": {"fetched_at": _iso(created + timedelta(days=30)), "data": [
+            {"user": {"login": f"user{rng.randint(1, 500)}"}, "body": " ".join(rng.choices(WORDS, k=30))}
+            for _ in range(rng.randint(0, 5))
+        ]},
+    })
+    _write_json(os.path.join(issue_dir, "analysis.json"), {
+        "triage": {
+            "category": rng.choice(CATEGORIES), "status": status,
+            "status_reason": f"Synthetic {status} reason for #{number}. Second sentence.",
+            "blocked_reason": "waiting on runtime" if status == "blocked" else "",
+            "affected_repo": rng.choice(["runtime", "diagnostics", "unknown"]),
+            "requires_platform": [rng.choice(["any", "windows", "linux", "macos"])],
+            "staleness": rng.choice(["active", "active", "stale"]),
+            "actionability": rng.choice(ACTIONABILITY), "manually_investigated": False,
+        },
+        "fix": {"has_candidate": has_fix, "summary": "Synthetic fix" if has_fix else "",
+                "confidence": round(rng.random(), 2) if has_fix else 0.0,
+                "branch": f"issue_{number}" if has_fix else ""},
+        "log": [{"heading": f"{_iso(created)} — linux — triage", "body": "Synthetic triage notes."}],
+    })
+    with open(os.path.join(issue_dir, "analysis.md"), "w", encoding="utf-8") as f:
+        f.write(f"# #{number}: {issue_title(number)}\n\n## Summary\n\n"
+                + "\n".join(" ".join(rng.choices(WORDS, k=12)) for _ in range(20)) + "\n")
+    log = None
+    if with_log:
+        bk = os.path.join(issue_dir, ".bookkeeping")
+        os.makedirs(bk)
+        log = os.path.join(bk, f"{_iso(created + timedelta(days=90)).replace(':', '-')}.log")
+        with open(log, "w", encoding="utf-8") as f:
+            f.write("\n".join(f"- {' '.join(rng.choices(WORDS, k=10))}" for _ in range(rng.randint(3, 40))) + "\n")
+    return {"has_fix": has_fix, "log": log}
+
+
+def _minidump_header(rng: random.Random) -> bytes:
+    # Signature, version, NumberOfStreams, StreamDirectoryRva, CheckSum, TimeDateStamp, Flags
+    return struct.pack("<4sIIIIIQ", b"MDMP", 0xA793, 0, 32, 0, rng.randint(1_600_000_000, 1_800_000_000), 0)
+
+
+def _elf_header(e_type: int) -> bytes:
+    ident = b"\x7fELF" + bytes([2, 1, 1]) + bytes(9)
+    # e_type, e_machine (x86-64), e_version, e_entry, e_phoff, e_shoff, e_flags, e_ehsize,
+    # e_phentsize, e_phnum, e_shentsize, e_shnum, e_shstrndx
+    return ident + struct.pack("<HHIQQQIHHHHHH", e_type, 62, 1, 0, 0, 0, 0, 64, 56, 0, 0, 0, 0)
+
+
+def _macho_core_header() -> bytes:
+    # MH_MAGIC_64, CPU_TYPE_X86_64, subtype, MH_CORE, ncmds, sizeofcmds, flags, reserved
+    return struct.pack("<IiiIIIII", 0xFEEDFACF, 0x01000007, 3, 4, 0, 0, 0, 0)
+
+
+def write_dumps(out: str, count: int, size: int, rng: random.Random) -> list[str]:
+    """Dump headers padded sparsely to size, plus about as many non-dump files; returns the dumps."""
+    dump_dir = os.path.join(out, "dumps")
+    dumps = []
+    for i in range(count):
+        sub = os.path.join(dump_dir, f"{(BASE_TIME + timedelta(days=i % 60)).date()}_case{i % 40}")
+        os.makedirs(sub, exist_ok=True)
+        kind = i % 3
+        if kind == 0:
+            path, header = os.path.join(sub, f"app.{i}.dmp"), _minidump_header(rng)
+        elif kind == 1:
+            path, header = os.path.join(sub, f"core.{i}"), _elf_header(4)
+        else:
+            path, header = os.path.join(sub, f"core.{i}.macho"), _macho_core_header()
+        with open(path, "wb") as f:
+            f.write(header)
+            f.truncate(max(size, len(header)))
+        dumps.append(path)
+        # Noise the detector has to read and reject.
+        with open(os.path.join(sub, f"tool.{i}"), "wb") as f:
+            f.write(_elf_header(2) + bytes(256))
+        with open(os.path.join(sub, f"notes.{i}.txt"), "w", encoding="utf-8") as f:
+            f.write(" ".join(rng.choices(WORDS, k=50)))
+    return dumps
+
+
+def write_retention(out: str, dumps: list[str]) -> None:
+    now = datetime.now(timezone.utc)
+    entries = []
+    for i, path in enumerate(dumps):
+        ingested = now - timedelta(days=90 - i % 90)
+        entries.append({"path": path, "ingested_at": _iso(ingested), "file_timestamp": _iso(ingested),
+                        "delete_after": _iso(ingested + timedelta(days=30 if i % 2 else 180))})
+    bk = os.path.join(out, ".bookkeeping")
+    os.makedirs(bk, exist_ok=True)
+    _write_json(os.path.join(bk, "dumps.delete"), entries)
+
+
+def generate(out: str, issues: int, repos: int, log_ratio: float, dumps: int, dump_size: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    names = repo_names(repos)
+    write_config(out, names)
+    manifest = {"version": 1, "seed": seed, "issues": issues, "repos": [], "logs": [], "dumps": dumps}
+    os.makedirs(os.path.join(out, "prs"), exist_ok=True)
+    for r, repo in enumerate(names):
+        # Earlier repos get more issues, like a real triage workspace.
+        count = issues // repos + (1 if r < issues % repos else 0)
+        max_number = max(1, count * NUMBER_SPREAD)
+        numbers = sorted(rng.sample(range(1, max_number + 1), count))
+        repo_dir = os.path.join(out, "issues", repo.replace("/", "-", 1))
+        os.makedirs(repo_dir, exist_ok=True)
+        prs = []
+        for number in numbers:
+            info = write_issue(os.path.join(repo_dir, str(number)), repo, number, rng, rng.random() < log_ratio)
+            if info["log"]:
+                manifest["logs"].append(os.path.relpath(info["log"], out))
+            if info["has_fix"] and rng.random() < 0.5:
+                pr = max_number + len(prs) + 1
+                prs.append({"number": pr, "url": f"https://github.com/{repo}/pull/{pr}",
+                            "title": f"Fix #{number}", "author": USER, "linked_issues": [number]})
+        _write_json(os.path.join(out, "prs", f"{repo.replace('/', '-', 1)}.json"), prs)
+        manifest["repos"].append({"repo": repo, "issues": count, "max_number": max_number})
+    dump_paths = write_dumps(out, dumps, dump_size, rng)
+    write_retention(out, dump_paths)
+    _write_json(os.path.join(out, "bench.json"), manifest)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic triage tree for benchmarks.")
+    parser.add_argument("out_dir")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--size", choices=SIZES, default="1k")
+    size.add_argument("--issues", type=int, help="Total triaged issues (overrides --size)")
+    parser.add_argument("--repos", type=int, default=4)
+    parser.add_argument("--log-ratio", type=float, default=0.05, help="Fraction of issues with a pending .log")
+    parser.add_argument("--dumps", type=int, help="Dump files (default: issues / 10, at most 2000)")
+    parser.add_argument("--dump-size", type=int, default=1 << 20, help="Apparent size of each dump (sparse)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--force", action="store_true", help="Replace out_dir if it exists")
+    args = parser.parse_args()
+
+    issues = args.issues if args.issues is not None else SIZES[args.size]
+    dumps = args.dumps if args.dumps is not None else min(2000, max(1, issues // 10))
+    out = os.path.abspath(args.out_dir)
+    if os.path.exists(out):
+        if not args.force:
+            print(f"Error: {out} exists (pass --force to replace it)", file=sys.stderr)
+            sys.exit(1)
+        if not os.path.isfile(os.path.join(out, "bench.json")):
+            print(f"Error: refusing to replace {out}: not a generated tree (no bench.json)", file=sys.stderr)
+            sys.exit(1)
+        shutil.rmtree(out)
+    os.makedirs(out)
+    manifest = generate(out, issues, args.repos, args.log_ratio, dumps, args.dump_size, args.seed)
+    print(json.dumps({"out_dir": out, "issues": manifest["issues"], "repos": len(manifest["repos"]),
+                      "logs": len(manifest["logs"]), "dumps": manifest["dumps"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
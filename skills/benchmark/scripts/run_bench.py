@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""Run the triage pipeline scripts against a generated tree and compare with a stored baseline.
+
+Usage:
+    python run_bench.py <tree> [--case <name> ...] [--repeat N] [--no-strace]
+                        [--baseline <file> [--save-baseline] [--threshold F]] [--output <file>]
+
+<tree> is a directory written by gen_tree.py. Each case runs one script as a subprocess with
+the tree as its working directory:
+
+    generate-summary-cold   generate-summary.py --scan for the largest repo, report cache cleared
+    generate-summary-warm   the same with the report cache left from the previous run
+    find-untriaged-cold     find_untriaged.py against a local synthetic GitHub API, caches cleared
+    find-untriaged-warm     the same with the GitHub page cache and triaged manifests kept
+    bookkeeping             bookkeeping.py --scan (pending logs are restored before every run)
+    detect-dumps            detect_dumps.py over dumps/
+    detect-dumps-metadata   detect_dumps.py --metadata over dumps/
+
+Per case it reports the median wall time over --repeat runs, the peak RSS of the child (from
+os.wait4's rusage, where available) and, when strace is on PATH, the syscall count from one
+extra `strace -f -c` run (not timed). The "-warm" cases run after their "-cold" case when both
+are selected.
+
+The exit status is 1 if any case's script exits non-zero. --baseline compares each metric with
+the stored one and also exits 1 if any case is slower by more than --threshold (default 0.25,
+i.e. 25%) for wall time, peak RSS or syscall count, or fails where the baseline passed (a
+regression with metric "exit_code"). Wall-time differences under MIN_WALL_DELTA seconds are
+ignored as noise. With --save-baseline the results are written to the baseline file instead,
+unless a case failed. Baselines are only comparable on the same machine and
+the same generated size; the file records both.
+
+Output format (JSON to stdout, and to --output if given):
+{
+  "tree": "/abs/tree", "issues": 10000, "host": "...",
+  "cases": {"bookkeeping": {"wall_s": 0.41, "runs": [0.40, 0.41, 0.43], "peak_rss_kb": 31240,
+                            "syscalls": {"total": 18211, "top": {"openat": 6043, ...}},
+                            "exit_code": 0}},
+  "regressions": [{"case": "bookkeeping", "metric": "wall_s", "baseline": 0.3, "current": 0.41}]
+}
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from gen_tree import is_open, is_pr, issue_title
+
+SKILLS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BASELINE_VERSION = 1
+MIN_WALL_DELTA = 0.05
+STRACE_TOP = 10
+
+
+# --- synthetic GitHub API ---
+
+class _GitHubHandler(BaseHTTPRequestHandler):
+    """GET /repos/{owner}/{repo}/issues with paging, Link, ETag and 304s, from bench.json."""
+
+    def log_message(self, *_args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+        repos = self.server.repos
+        if len(parts) != 4 or parts[0] != "repos" or parts[3] != "issues" or f"{parts[1]}/{parts[2]}" not in repos:
+            self.send_error(404)
+            return
+        max_number = repos[f"{parts[1]}/{parts[2]}"]
+        if "since" in query:
+            # The synthetic issues never change, so every delta listing is empty.
+            numbers = []
+        else:
+            numbers = [n for n in range(max_number, 0, -1) if is_open(n)]
+        per_page = int(query.get("per_page", 30))
+        page = int(query.get("page", 1))
+        last = max(1, -(-len(numbers) // per_page))
+        body = json.dumps([
+            {"number": n, "title": issue_title(n), "state": "open", "created_at": "2025-01-01T00:00:00Z",
+             **({"pull_request": {}} if is_pr(n) else {})}
+            for n in numbers[(page - 1) * per_page:page * per_page]
+        ]).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Date", formatdate(usegmt=True))
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Date", formatdate(usegmt=True))
+        if last > 1:
+            rest = "&".join(f"{k}={v}" for k, v in query.items() if k != "page")
+            base = f"http://127.0.0.1:{self.server.server_port}{url.path}?{rest}"
+            self.send_header("Link", f'<{base}&page={min(page + 1, last)}>; rel="next", <{base}&page={last}>; rel="last"')
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_github(manifest: dict) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GitHubHandler)
+    server.daemon_threads = True
+    server.repos = {r["repo"]: r["max_number"] for r in manifest["repos"]}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- cases ---
+
+def _rmtree(path: str) -> None:
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _restore_logs(tree: str, manifest: dict) -> None:
+    """Undo bookkeeping's claim (rename to .flushing.log) so every run sees the same pending logs."""
+    for rel in manifest["logs"]:
+        path = os.path.join(tree, rel)
+        flushing = path.replace(".log", ".flushing.log")
+        if not os.path.exists(path) and os.path.exists(flushing):
+            os.rename(flushing, path)
+
+
+def build_cases(tree: str, manifest: dict, api_url: str) -> dict:
+    """name -> (argv, prepare callable run untimed before every run)."""
+    py = sys.executable
+    bk = os.path.join(tree, ".bookkeeping")
+    repo = manifest["repos"][0]["repo"]
+    repo_key = repo.replace("/", "-", 1)
+    summary = [py, os.path.join(SKILLS_DIR, "generate-summary", "references", "generate-summary.py"),
+               repo, "--scan", tree, os.path.join(tree, "prs", f"{repo_key}.json")]
+    untriaged = [py, os.path.join(SKILLS_DIR, "find-untriaged", "find_untriaged.py"), "--api-url", api_url]
+    detect = [py, os.path.join(SKILLS_DIR, "ingest-dumps", "scripts", "detect_dumps.py")]
+
+    def clear_summaries():
+        _rmtree(os.path.join(tree, "summaries"))
+
+    def clear_summary_cache():
+        clear_summaries()
+        _rmtree(os.path.join(bk, "report-cache"))
+
+    def clear_github_cache():
+        _rmtree(os.path.join(bk, "github-cache"))
+        _rmtree(os.path.join(bk, "triaged"))
+
+    return {
+        "generate-summary-cold": (summary, clear_summary_cache),
+        "generate-summary-warm": (summary, clear_summaries),
+        "find-untriaged-cold": (untriaged, clear_github_cache),
+        "find-untriaged-warm": (untriaged, lambda: None),
+        "bookkeeping": ([py, os.path.join(SKILLS_DIR, "bookkeeping", "scripts", "bookkeeping.py"), tree, "--scan"],
+                        lambda: _restore_logs(tree, manifest)),
+        "detect-dumps": (detect + [os.path.join(tree, "dumps")], lambda: None),
+        "detect-dumps-metadata": (detect + ["--metadata", os.path.join(tree, "dumps")], lambda: None),
+    }
+
+
+# --- measurement ---
+
+def run_once(argv: list[str], cwd: str, env: dict) -> tuple[int, float, int | None, str]:
+    """(exit code, wall seconds, peak RSS in KiB or None, stderr tail) for one child run."""
+    with tempfile.TemporaryFile() as err:
+        start = time.perf_counter()
+        proc = subprocess.Popen(argv, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=err)
+        if hasattr(os, "wait4"):
+            _pid, status, usage = os.wait4(proc.pid, 0)
+            wall = time.perf_counter() - start
+            code = os.waitstatus_to_exitcode(status)
+            proc.returncode = code
+            # ru_maxrss is KiB on Linux and bytes on macOS.
+            rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+        else:
+            code = proc.wait()
+            wall = time.perf_counter() - start
+            rss = None
+        err.seek(0)
+        tail = err.read()[-2000:].decode("utf-8", "replace")
+    return code, wall, rss, tail
+
+
+def count_syscalls(argv: list[str], cwd: str, env: dict) -> dict | None:
+    """Syscall counts from `strace -f -c` for one run, or None if strace isn't usable."""
+    strace = shutil.which("strace")
+    if not strace:
+        return None
+    fd, out = tempfile.mkstemp(prefix="bench-strace-")
+    os.close(fd)
+    try:
+        subprocess.run([strace, "-f", "-c", "-qq", "-o", out, *argv], cwd=cwd, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(out, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    finally:
+        os.remove(out)
+    # Table rows: % time, seconds, usecs/call, calls, [errors], syscall. The closing "total" row
+    # drops usecs/call in some strace versions, so the total is summed from the rows instead.
+    calls = {}
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 5 or fields[-1] == "total" or not fields[3].isdigit():
+            continue
+        calls[fields[-1]] = int(fields[3])
+    if not calls:
+        return None
+    top = dict(sorted(calls.items(), key=lambda kv: -kv[1])[:STRACE_TOP])
+    return {"total": sum(calls.values()), "top": top}
+
+
+def run_case(argv: list[str], prepare, cwd: str, env: dict, repeat: int, strace: bool) -> dict:
+    runs, rss, code, tail = [], [], 0, ""
+    for _ in range(repeat):
+        prepare()
+        code, wall, peak, tail = run_once(argv, cwd, env)
+        runs.append(round(wall, 4))
+        if peak is not None:
+            rss.append(peak)
+        if code != 0:
+            break
+    result = {"wall_s": round(statistics.median(runs), 4), "runs": runs,
+              "peak_rss_kb": max(rss) if rss else None, "syscalls": None, "exit_code": code}
+    if code != 0:
+        result["stderr"] = tail.strip()
+    elif strace:
+        prepare()
+        result["syscalls"] = count_syscalls(argv, cwd, env)
+    return result
+
+
+# --- baseline ---
+
+def _metrics(case: dict) -> dict:
+    syscalls = case.get("syscalls") or {}
+    return {"wall_s": case.get("wall_s"), "peak_rss_kb": case.get("peak_rss_kb"), "syscalls": syscalls.get("total")}
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[dict]:
+    regressions = []
+    for name, case in current["cases"].items():
+        old_case = baseline.get("cases", {}).get(name)
+        if not old_case:
+            continue
+        if case["exit_code"] != 0:
+            # A case that passed in the baseline and now fails is the worst regression of all.
+            if old_case.get("exit_code") == 0:
+                regressions.append({"case": name, "metric": "exit_code", "baseline": 0,
+                                    "current": case["exit_code"], "change": "failed"})
+            continue
+        old, new = _metrics(old_case), _metrics(case)
+        for metric, value in new.items():
+            before = old.get(metric)
+            if value is None or not before:
+                continue
+            if value > before * (1 + threshold) and (metric != "wall_s" or value - before >= MIN_WALL_DELTA):
+                regressions.append({"case": name, "metric": metric, "baseline": before, "current": value,
+                                    "change": f"+{(value / before - 1) * 100:.0f}%"})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the triage scripts on a generated tree.")
+    parser.add_argument("tree", help="Directory written by gen_tree.py")
+    parser.add_argument("--case", action="append", help="Run only this case (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-strace", action="store_true", help="Skip the syscall-count run")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against (or write, with --save-baseline)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    args = parser.parse_args()
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline requires --baseline")
+
+    tree = os.path.abspath(args.tree)
+    try:
+        with open(os.path.join(tree, "bench.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error: {tree} is not a generated tree (bench.json: {e})", file=sys.stderr)
+        sys.exit(1)
+
+    server = start_github(manifest)
+    env = {**os.environ, "GITHUB_TOKEN": "bench", "PYTHONDONTWRITEBYTECODE": "1"}
+    cases = build_cases(tree, manifest, f"http://127.0.0.1:{server.server_port}")
+    selected = args.case or list(cases)
+    unknown = [c for c in selected if c not in cases]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)} (choose from {', '.join(cases)})")
+
+    results = {"tree": tree, "issues": manifest["issues"], "host": platform.node(),
+               "python": platform.python_version(), "cases": {}}
+    try:
+        for name in (c for c in cases if c in selected):
+            argv, prepare = cases[name]
+            case = run_case(argv, prepare, tree, env, args.repeat, not args.no_strace)
+            results["cases"][name] = case
+            rss = f"{case['peak_rss_kb'] / 1024:.1f} MiB" if case["peak_rss_kb"] else "n/a"
+            calls = case["syscalls"]["total"] if case["syscalls"] else "n/a"
+            status = "" if case["exit_code"] == 0 else f"  FAILED (exit {case['exit_code']})"
+            print(f"{name:<24} {case['wall_s']:>8.3f}s  {rss:>10}  syscalls {calls}{status}", file=sys.stderr)
+    finally:
+        server.shutdown()
+
+    failed = [name for name, case in results["cases"].items() if case["exit_code"] != 0]
+    exit_code = 1 if failed else 0
+    if args.baseline and args.save_baseline and failed:
+        print(f"Error: not saving a baseline with failed case(s): {', '.join(failed)}", file=sys.stderr)
+    elif args.baseline and args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"version": BASELINE_VERSION, **results}, f, indent=2)
+    elif args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("issues") != results["issues"] or baseline.get("host") != results["host"]:
+            print(f"Warning: baseline was recorded for {baseline.get('issues')} issues on {baseline.get('host')}; "
+                  f"comparing anyway", file=sys.stderr)
+        results["regressions"] = compare(baseline, results, args.threshold)
+        for r in results["regressions"]:
+            print(f"REGRESSION {r['case']} {r['metric']}: {r['baseline']} -> {r['current']} ({r['change']})",
+                  file=sys.stderr)
+        exit_code = 1 if results["regressions"] or failed else 0
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,19 @@
 """Bookkeeping processor: handles .log files (progress notes) and .delete files (deletion reminders).
 
 Usage:
-    python bookkeeping.py <repo_root> [--issues-only <owner-repo>]
+    python bookkeeping.py <repo_root> [--issues-only <owner-repo>] [--scan] [--ndjson [--max-bytes <n>]]
+                          [--timings] [--profile <file>]
+    python bookkeeping.py <repo_root> --watch [--poll-interval <seconds>]
 
 Scans for:
   1. Per-issue .bookkeeping/*.log files — renames to .flushing.log, reads content,
      outputs structured JSON so the LLM can append to logs. Silent operation.
   2. Root .bookkeeping/*.delete files — checks for expired items and prints warnings.
 
+Finding the .log files normally means globbing every issue directory. With a watcher running
+(--watch, see log_watch.py) the pending list is read from .bookkeeping/watch.state.json
+instead; --scan ignores the watcher and globs anyway.
+
 Output format (JSON to stdout):
 {
   "logs": [
@@ -29,45 +35,114 @@ Output format (JSON to stdout):
     }
   ]
 }
+
+With --ndjson the same data is streamed as one JSON record per line, written as each issue's
+logs are claimed, with log contents split into chunks of at most CHUNK_SIZE bytes:
+
+  {"type": "issue", "issue_dir": "issues/dotnet-diagnostics/1234",
+   "files": [{"name": "2026-02-19T13-30-00Z.log", "flushing_path": "...", "size": 1234}]}
+  {"type": "chunk", "issue_dir": "...", "name": "2026-02-19T13-30-00Z.log", "offset": 0,
+   "data": "...", "final": true}
+  {"type": "expired_deletion", "source": "dumps.delete", "path": "...", ...}
+  {"type": "end", "issues": 1, "bytes": 1234, "remaining": 0}
+
+--max-bytes caps the log bytes flushed in one run. Once the next issue would go over the budget
+(the first issue is always flushed), its logs and all later ones are left unclaimed for the
+next run and counted in "remaining".
+
+--timings prints per-phase wall time, files opened, bytes read and peak memory (logs, retention,
+output) as one JSON line on stderr; --profile <file> writes cProfile stats. See
+benchmark/scripts/instrumentation.py. Without the benchmark skill installed, neither flag is
+available and the script runs uninstrumented.
 """
 
+import codecs
 import glob
 import json
 import os
 import sys
-from datetime import datetime, timezone
 
+from log_watch import POLL_INTERVAL, read_pending, watch
+from retention import expired_entries
 
-def process_log_files(repo_root: str, issues_filter: str | None = None) -> list[dict]:
-    """Scan per-issue .bookkeeping/ directories for .log files.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'benchmark', 'scripts'))
+try:
+    from instrumentation import from_argv
+except ImportError:  # the benchmark skill isn't installed: run without --timings / --profile
+    class Instrumentation:
+        def __init__(self, script, *args, **kwargs):
+            pass
 
-    Renames each .log to .flushing.log before reading (claim-before-read pattern).
-    Returns list of {issue_dir, files: [{name, content}]} for each issue with logs.
+        def start(self, name):
+            pass
+
+        def stop(self):
+            pass
+
+    def from_argv(script, argv):
+        return Instrumentation(script), argv
+
+# Largest log slice carried by one --ndjson "chunk" record.
+CHUNK_SIZE = 64 * 1024
+
+
+def find_log_files(repo_root: str, issues_filter: str | None = None, use_watcher: bool = True) -> list[str]:
+    """Sorted absolute paths of pending per-issue .log files.
+
+    Taken from a live watcher's state file when there is one, otherwise globbed.
     """
+    pending = read_pending(repo_root) if use_watcher else None
+    if pending is not None:
+        paths = []
+        for rel in pending:
+            parts = rel.replace("\\", "/").split("/")
+            if issues_filter and (len(parts) < 2 or parts[1] != issues_filter):
+                continue
+            paths.append(os.path.join(repo_root, rel))
+        return sorted(paths)
+
     if issues_filter:
         pattern = os.path.join(repo_root, "issues", issues_filter, "*", ".bookkeeping", "*.log")
     else:
         pattern = os.path.join(repo_root, "issues", "*", "*", ".bookkeeping", "*.log")
+    return sorted(glob.glob(pattern))
+
 
-    # Group by issue directory
+def group_log_files(repo_root: str, issues_filter: str | None = None,
+                    use_watcher: bool = True) -> list[tuple[str, list[str]]]:
+    """Pending .log files grouped by issue directory: [(rel_issue_dir, [log_path])], sorted."""
     log_files_by_issue: dict[str, list[str]] = {}
-    for log_path in sorted(glob.glob(pattern)):
+    for log_path in find_log_files(repo_root, issues_filter, use_watcher):
         issue_dir = os.path.dirname(os.path.dirname(log_path))
         rel_issue = os.path.relpath(issue_dir, repo_root)
         if rel_issue not in log_files_by_issue:
             log_files_by_issue[rel_issue] = []
         log_files_by_issue[rel_issue].append(log_path)
+    return sorted(log_files_by_issue.items())
+
 
+def claim_log(log_path: str) -> str | None:
+    """Rename a .log to .flushing.log (claim the file); None if another session claimed it."""
+    flushing_path = log_path.replace(".log", ".flushing.log")
+    try:
+        os.rename(log_path, flushing_path)
+    except OSError:
+        return None
+    return flushing_path
+
+
+def process_log_files(repo_root: str, issues_filter: str | None = None, use_watcher: bool = True) -> list[dict]:
+    """Scan per-issue .bookkeeping/ directories for .log files.
+
+    Renames each .log to .flushing.log before reading (claim-before-read pattern).
+    Returns list of {issue_dir, files: [{name, content}]} for each issue with logs.
+    """
     results = []
-    for issue_dir, log_paths in sorted(log_files_by_issue.items()):
+    for issue_dir, log_paths in group_log_files(repo_root, issues_filter, use_watcher):
         files = []
         for log_path in log_paths:
-            # Rename to .flushing.log (claim the file)
-            flushing_path = log_path.replace(".log", ".flushing.log")
-            try:
-                os.rename(log_path, flushing_path)
-            except OSError:
-                # Another session claimed it
+            flushing_path = claim_log(log_path)
+            if flushing_path is None:
                 continue
 
             try:
@@ -87,64 +162,127 @@ def process_log_files(repo_root: str, issues_filter: str | None = None) -> list[
     return results
 
 
-def process_delete_files(repo_root: str) -> list[dict]:
-    """Scan root .bookkeeping/ for *.delete files and check for expired items."""
-    bookkeeping_dir = os.path.join(repo_root, ".bookkeeping")
-    if not os.path.isdir(bookkeeping_dir):
-        return []
+def _emit(out, record: dict) -> None:
+    out.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+    out.write("\n")
 
-    now = datetime.now(timezone.utc)
-    expired = []
 
-    for delete_file in sorted(glob.glob(os.path.join(bookkeeping_dir, "*.delete"))):
-        source_name = os.path.basename(delete_file)
-        try:
-            with open(delete_file, "r", encoding="utf-8") as f:
-                entries = json.load(f)
-        except (OSError, json.JSONDecodeError):
-            continue
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
 
-        if not isinstance(entries, list):
-            continue
 
-        for entry in entries:
-            delete_after = entry.get("delete_after")
-            if delete_after is None:
-                continue
+def stream_log_files(repo_root: str, out, issues_filter: str | None = None, use_watcher: bool = True,
+                     max_bytes: int | None = None) -> dict:
+    """Claim and stream per-issue logs as NDJSON records; returns the totals for the end record.
+
+    Each file is read CHUNK_SIZE bytes at a time, so memory stays flat however large the logs are.
+    """
+    issues = emitted = remaining = 0
+    groups = group_log_files(repo_root, issues_filter, use_watcher)
+    for i, (issue_dir, log_paths) in enumerate(groups):
+        size = sum(_file_size(p) for p in log_paths)
+        if max_bytes is not None and issues and emitted + size > max_bytes:
+            remaining = sum(len(paths) for _dir, paths in groups[i:])
+            break
 
+        files = []
+        for log_path in log_paths:
+            flushing_path = claim_log(log_path)
+            if flushing_path is not None:
+                files.append({"name": os.path.basename(log_path), "flushing_path": flushing_path,
+                              "size": _file_size(flushing_path)})
+        if not files:
+            continue
+        _emit(out, {"type": "issue", "issue_dir": issue_dir, "files": files})
+
+        for entry in files:
+            decoder = codecs.getincrementaldecoder("utf-8")("replace")
+            offset = 0
             try:
-                due = datetime.fromisoformat(delete_after)
-                if due.tzinfo is None:
-                    due = due.replace(tzinfo=timezone.utc)
-            except (ValueError, TypeError):
-                continue
+                with open(entry["flushing_path"], "rb") as f:
+                    while True:
+                        block = f.read(CHUNK_SIZE)
+                        final = len(block) < CHUNK_SIZE
+                        data = decoder.decode(block, final=final)
+                        if data or final:
+                            _emit(out, {"type": "chunk", "issue_dir": issue_dir, "name": entry["name"],
+                                        "offset": offset, "data": data, "final": final})
+                        offset += len(block)
+                        if final:
+                            break
+            except OSError as e:
+                _emit(out, {"type": "chunk", "issue_dir": issue_dir, "name": entry["name"],
+                            "offset": offset, "data": "", "final": True, "error": str(e)})
+            emitted += offset
+        issues += 1
+        out.flush()
+    return {"issues": issues, "bytes": emitted, "remaining": remaining}
 
-            if now >= due:
-                expired.append({
-                    "source": source_name,
-                    "path": entry.get("path", "<unknown>"),
-                    "ingested_at": entry.get("ingested_at", "<unknown>"),
-                    "file_timestamp": entry.get("file_timestamp", "<unknown>"),
-                    "delete_after": delete_after,
-                })
 
+def process_delete_files(repo_root: str) -> list[dict]:
+    """Check root .bookkeeping/*.delete files for expired items.
+
+    Uses the retention index (retention.py), which is rebuilt only when a .delete file changed,
+    so this is a binary search rather than a parse of every entry.
+    """
+    expired = []
+    for entry in expired_entries(repo_root):
+        expired.append({
+            "source": entry["source"],
+            "path": entry.get("path", "<unknown>"),
+            "ingested_at": entry.get("ingested_at", "<unknown>"),
+            "file_timestamp": entry.get("file_timestamp", "<unknown>"),
+            "delete_after": entry["delete_after"],
+        })
     return expired
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: bookkeeping.py <repo_root> [--issues-only <owner-repo>]", file=sys.stderr)
+    inst, argv = from_argv("bookkeeping", sys.argv[1:])
+    if not argv:
+        print("Usage: bookkeeping.py <repo_root> [--issues-only <owner-repo>] [--scan] [--timings] [--profile <file>]\n"
+              "       bookkeeping.py <repo_root> --watch [--poll-interval <seconds>]", file=sys.stderr)
         sys.exit(1)
 
-    repo_root = os.path.abspath(sys.argv[1])
+    repo_root = os.path.abspath(argv[0])
     issues_filter = None
 
-    if "--issues-only" in sys.argv:
-        idx = sys.argv.index("--issues-only")
-        if idx + 1 < len(sys.argv):
-            issues_filter = sys.argv[idx + 1]
+    if "--watch" in argv:
+        poll_interval = POLL_INTERVAL
+        if "--poll-interval" in argv:
+            idx = argv.index("--poll-interval")
+            if idx + 1 < len(argv):
+                poll_interval = float(argv[idx + 1])
+        watch(repo_root, poll_interval)
+        return
+
+    if "--issues-only" in argv:
+        idx = argv.index("--issues-only")
+        if idx + 1 < len(argv):
+            issues_filter = argv[idx + 1]
+
+    use_watcher = "--scan" not in argv
+
+    if "--ndjson" in argv:
+        max_bytes = None
+        if "--max-bytes" in argv:
+            idx = argv.index("--max-bytes")
+            if idx + 1 < len(argv):
+                max_bytes = int(argv[idx + 1])
+        inst.start("logs")
+        totals = stream_log_files(repo_root, sys.stdout, issues_filter, use_watcher, max_bytes)
+        inst.start("retention")
+        for item in process_delete_files(repo_root):
+            _emit(sys.stdout, {"type": "expired_deletion", **item})
+        _emit(sys.stdout, {"type": "end", **totals})
+        return
 
-    logs = process_log_files(repo_root, issues_filter)
+    inst.start("logs")
+    logs = process_log_files(repo_root, issues_filter, use_watcher)
+    inst.start("retention")
     expired = process_delete_files(repo_root)
 
     result = {
@@ -152,6 +290,7 @@ def main():
         "expired_deletions": expired,
     }
 
+    inst.start("output")
     print(json.dumps(result, indent=2))
 
 
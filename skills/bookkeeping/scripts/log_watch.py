@@ -0,0 +1,353 @@
+"""Watch the triage repo for pending per-issue .bookkeeping/*.log files.
+
+Used by `bookkeeping.py <repo_root> --watch`, which runs until interrupted. The watcher keeps
+the set of pending logs (the same files `issues/*/*/.bookkeeping/*.log` would glob) in memory
+and publishes it to .bookkeeping/watch.state.json:
+
+  {"pid": 1234, "root": "/abs/triage", "backend": "inotify", "heartbeat": 1760000000.0,
+   "pending": ["issues/dotnet-diagnostics/1234/.bookkeeping/2026-02-19T13-30-00Z.log"]}
+
+A normal bookkeeping run calls read_pending(); while a live watcher keeps the heartbeat fresh,
+the run uses that list instead of walking every issue directory.
+
+On Linux the watcher uses inotify (through ctypes), one watch per directory level: issues/,
+each repo directory, each issue directory and each .bookkeeping/ directory. Elsewhere, or when
+inotify is unavailable or out of watches, it falls back to re-walking the tree with os.scandir
+every poll interval.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import select
+import signal
+import struct
+import sys
+import time
+
+STATE_FILE = os.path.join(".bookkeeping", "watch.state.json")
+HEARTBEAT_INTERVAL = 30
+# A state file whose heartbeat is older than this is ignored (watcher died or hung).
+STALE_AFTER = 3 * HEARTBEAT_INTERVAL
+POLL_INTERVAL = 5
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+DIR_MASK = IN_CREATE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+LOG_DIR_MASK = DIR_MASK | IN_CLOSE_WRITE
+_EVENT = struct.Struct("iIII")
+
+# Directory levels below the repo root.
+ISSUES, REPO, ISSUE, BOOKKEEPING = range(4)
+
+
+def _is_log(name: str) -> bool:
+    # Same files glob("*.log") matches: glob skips dot-files.
+    return name.endswith(".log") and not name.startswith(".")
+
+
+def _visible_dirs(path: str) -> list[str]:
+    try:
+        with os.scandir(path) as it:
+            return [e.path for e in it if not e.name.startswith(".") and e.is_dir()]
+    except OSError:
+        return []
+
+
+def scan_logs(root: str, path: str | None = None, level: int = ISSUES) -> set[str]:
+    """Pending log paths (relative to root) at or below a directory of the given level."""
+    path = path or os.path.join(root, "issues")
+    if level == BOOKKEEPING:
+        try:
+            with os.scandir(path) as it:
+                return {os.path.relpath(e.path, root) for e in it if _is_log(e.name) and e.is_file()}
+        except OSError:
+            return set()
+    if level == ISSUE:
+        return scan_logs(root, os.path.join(path, ".bookkeeping"), BOOKKEEPING)
+    found = set()
+    for child in _visible_dirs(path):
+        found |= scan_logs(root, child, level + 1)
+    return found
+
+
+def read_pending(root: str, now: float | None = None) -> list[str] | None:
+    """Pending logs from a live watcher's state file (relative paths), or None to fall back to a scan."""
+    try:
+        with open(os.path.join(root, STATE_FILE), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(state, dict) or os.path.normcase(state.get("root", "")) != os.path.normcase(root):
+        return None
+    now = time.time() if now is None else now
+    if now - state.get("heartbeat", 0) > STALE_AFTER or not _pid_alive(state.get("pid")):
+        return None
+    pending = state.get("pending")
+    return pending if isinstance(pending, list) else None
+
+
+def _pid_alive(pid) -> bool:
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    if os.name == "nt":
+        # Signal 0 is CTRL_C_EVENT on Windows; os.kill would interrupt the console, not probe.
+        return _win_pid_alive(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _win_pid_alive(pid: int) -> bool:
+    """OpenProcess + GetExitCodeProcess; True when it can't tell (the heartbeat still applies)."""
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    STILL_ACTIVE = 259
+    ERROR_ACCESS_DENIED = 5
+    try:
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.OpenProcess.restype = ctypes.c_void_p
+        kernel32.OpenProcess.argtypes = [ctypes.c_uint32, ctypes.c_int, ctypes.c_uint32]
+        kernel32.GetExitCodeProcess.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_uint32)]
+        kernel32.CloseHandle.argtypes = [ctypes.c_void_p]
+    except (AttributeError, OSError):
+        return True
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # Access denied means the process exists; anything else (invalid parameter) means it's gone.
+        return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+    try:
+        code = ctypes.c_uint32()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+class _Inotify:
+    """Minimal inotify binding: add/remove watches and read decoded events."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._add(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch {path}: {os.strerror(err)}")
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._rm(self.fd, wd)
+
+    def read(self, timeout: float) -> list[tuple[int, int, str]]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        buf = os.read(self.fd, 64 * 1024)
+        events = []
+        offset = 0
+        while offset + _EVENT.size <= len(buf):
+            wd, mask, _cookie, length = _EVENT.unpack_from(buf, offset)
+            raw = buf[offset + _EVENT.size:offset + _EVENT.size + length]
+            events.append((wd, mask, os.fsdecode(raw.rstrip(b"\0"))))
+            offset += _EVENT.size + length
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class LogWatcher:
+    """Tracks pending logs under <root>/issues and publishes them to the state file."""
+
+    def __init__(self, root: str, poll_interval: float = POLL_INTERVAL):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.state_path = os.path.join(root, STATE_FILE)
+        self.pending: set[str] = set()
+        self.inotify: _Inotify | None = None
+        self.watches: dict[int, tuple[int, str]] = {}
+        self.backend = "poll"
+        self._published: tuple | None = None
+        self._last_heartbeat = 0.0
+
+    # --- inotify backend ---
+
+    def _watch_tree(self, path: str, level: int) -> None:
+        """Watch a directory and everything below it down to .bookkeeping/, then pick up its logs.
+
+        The watch is added before the directory is listed, so files created in between are seen
+        by one or the other.
+        """
+        wd = self.inotify.add_watch(path, LOG_DIR_MASK if level == BOOKKEEPING else DIR_MASK)
+        self.watches[wd] = (level, path)
+        if level == BOOKKEEPING:
+            self.pending |= scan_logs(self.root, path, BOOKKEEPING)
+        elif level == ISSUE:
+            bk = os.path.join(path, ".bookkeeping")
+            if os.path.isdir(bk):
+                self._watch_tree(bk, BOOKKEEPING)
+        else:
+            for child in _visible_dirs(path):
+                self._watch_tree(child, level + 1)
+
+    def _drop_under(self, path: str) -> None:
+        prefix = os.path.relpath(path, self.root) + os.sep
+        self.pending = {p for p in self.pending if not p.startswith(prefix)}
+
+    def _handle(self, wd: int, mask: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            self._restart_inotify()
+            return
+        if mask & IN_IGNORED:
+            gone = self.watches.pop(wd, None)
+            if gone:
+                self._drop_under(gone[1])
+            return
+        if wd not in self.watches or not name:
+            return
+        level, path = self.watches[wd]
+        child = os.path.join(path, name)
+        created = mask & (IN_CREATE | IN_MOVED_TO)
+        removed = mask & (IN_DELETE | IN_MOVED_FROM)
+
+        if level == BOOKKEEPING:
+            if mask & IN_ISDIR or not _is_log(name):
+                return
+            rel = os.path.relpath(child, self.root)
+            if removed:
+                self.pending.discard(rel)
+            elif created or mask & IN_CLOSE_WRITE:
+                self.pending.add(rel)
+            return
+
+        if not mask & IN_ISDIR:
+            return
+        wanted = name == ".bookkeeping" if level == ISSUE else not name.startswith(".")
+        if not wanted:
+            return
+        if created:
+            try:
+                self._watch_tree(child, level + 1)
+            except FileNotFoundError:
+                pass
+        elif removed:
+            # Moved-away directories keep their watch (IN_MOVE_SELF follows); forget them now.
+            for other, (_lvl, p) in list(self.watches.items()):
+                if p == child or p.startswith(child + os.sep):
+                    self.inotify.rm_watch(other)
+                    del self.watches[other]
+            self._drop_under(child)
+
+    def _restart_inotify(self) -> None:
+        if self.inotify:
+            self.inotify.close()
+        self.inotify = _Inotify()
+        self.watches = {}
+        self.pending = set()
+        issues = os.path.join(self.root, "issues")
+        os.makedirs(issues, exist_ok=True)
+        self._watch_tree(issues, ISSUES)
+
+    # --- state file ---
+
+    def publish(self, force: bool = False) -> None:
+        now = time.time()
+        snapshot = (self.backend, tuple(sorted(self.pending)))
+        if not force and snapshot == self._published and now - self._last_heartbeat < HEARTBEAT_INTERVAL:
+            return
+        state = {"pid": os.getpid(), "root": self.root, "backend": self.backend,
+                 "heartbeat": now, "pending": list(snapshot[1])}
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp, self.state_path)
+        self._published = snapshot
+        self._last_heartbeat = now
+
+    def remove_state(self) -> None:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                if json.load(f).get("pid") != os.getpid():
+                    return
+            os.remove(self.state_path)
+        except (OSError, json.JSONDecodeError, AttributeError):
+            pass
+
+    # --- main loop ---
+
+    def run(self) -> None:
+        if sys.platform.startswith("linux"):
+            try:
+                self._restart_inotify()
+                self.backend = "inotify"
+            except OSError as e:
+                hint = " (raise fs.inotify.max_user_watches)" if e.errno == errno.ENOSPC else ""
+                print(f"Warning: inotify unavailable, polling instead: {e}{hint}", file=sys.stderr)
+                if self.inotify:
+                    self.inotify.close()
+                    self.inotify = None
+        if self.inotify is None:
+            self.pending = scan_logs(self.root)
+        self.publish(force=True)
+
+        while True:
+            if self.inotify is not None:
+                try:
+                    for wd, mask, name in self.inotify.read(HEARTBEAT_INTERVAL):
+                        self._handle(wd, mask, name)
+                except OSError as e:
+                    print(f"Warning: inotify failed, polling instead: {e}", file=sys.stderr)
+                    self.inotify.close()
+                    self.inotify = None
+                    self.backend = "poll"
+                    self.pending = scan_logs(self.root)
+            else:
+                time.sleep(self.poll_interval)
+                self.pending = scan_logs(self.root)
+            self.publish()
+
+
+def watch(root: str, poll_interval: float = POLL_INTERVAL) -> None:
+    """Run the watcher until SIGINT/SIGTERM; refuses to start if another watcher is live."""
+    if read_pending(root) is not None:
+        print(f"Error: a watcher is already running for {root} (see {STATE_FILE})", file=sys.stderr)
+        sys.exit(1)
+    watcher = LogWatcher(root, poll_interval)
+
+    def stop(_signum, _frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.remove_state()
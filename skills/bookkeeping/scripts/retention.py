@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Sorted expiry index over the root .bookkeeping/*.delete retention reminders.
+
+Usage:
+    python retention.py <repo_root> expired
+    python retention.py <repo_root> summary
+    python retention.py <repo_root> add <path> (--retention "<N days|weeks|months|years>" | --delete-after <ISO 8601>)
+                        [--source dumps.delete] [--file-timestamp <ISO 8601>] [--metadata <json>]
+
+The index lives in .bookkeeping/retention.idx:
+
+  header   magic, entry count, and a JSON block with the (name, mtime_ns, size) of every
+           *.delete file it was built from plus the bytes held per retention bucket
+  records  one fixed-size (delete_after, bytes, payload offset, payload length) record per
+           entry, sorted by delete_after
+  payload  each entry's JSON (with its "source" file name)
+
+Finding expired entries is a binary search over the memory-mapped records plus one payload
+read per result, so the cost doesn't grow with the archive. The index is rebuilt whenever a
+*.delete file's mtime or size changes (including hand edits), which is the only time the
+JSON arrays are parsed and dump sizes are measured. `add` appends an entry to a .delete file
+and rebuilds the index in the same step.
+
+Retention buckets group entries by their retention period (delete_after - ingested_at):
+"30 days", "90 days", "6 months", "1 year", "longer" — each the smallest period that covers it.
+"""
+
+import argparse
+import bisect
+import glob
+import json
+import mmap
+import os
+import re
+import struct
+from datetime import datetime, timedelta, timezone
+
+INDEX_FILE = os.path.join(".bookkeeping", "retention.idx")
+MAGIC = b"RETIDX01"
+_HEADER = struct.Struct("<8sII")  # magic, entry count, meta length
+_RECORD = struct.Struct("<qqII")  # delete_after (epoch s), bytes, payload offset, payload length
+BUCKETS = [("30 days", 31), ("90 days", 92), ("6 months", 186), ("1 year", 366)]
+LONGER = "longer"
+
+_DURATION_RE = re.compile(r"^\s*(\d+)\s*(day|week|month|year)s?\s*$", re.IGNORECASE)
+_DAYS_PER_UNIT = {"day": 1, "week": 7, "month": 30, "year": 365}
+
+
+def parse_time(value) -> datetime | None:
+    """ISO 8601 timestamp as an aware datetime (naive values are UTC), or None if invalid."""
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (ValueError, TypeError):
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def parse_duration(text: str) -> timedelta:
+    m = _DURATION_RE.match(text)
+    if not m:
+        raise ValueError(f"unrecognized retention period: {text!r} (expected e.g. '30 days', '6 months')")
+    return timedelta(days=int(m.group(1)) * _DAYS_PER_UNIT[m.group(2).lower()])
+
+
+def bucket_for(entry: dict, due: datetime) -> str:
+    ingested = parse_time(entry.get("ingested_at"))
+    if ingested is None:
+        return LONGER
+    days = (due - ingested).total_seconds() / 86400
+    for name, limit in BUCKETS:
+        if days <= limit:
+            return name
+    return LONGER
+
+
+def path_size(path: str) -> int:
+    """Bytes held by a file, or by every file under a directory; 0 if it's gone."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0
+    if not os.path.isdir(path):
+        return st.st_size
+    total = 0
+    for dirpath, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _delete_files(repo_root: str) -> list[tuple[str, int, int]]:
+    sources = []
+    for path in sorted(glob.glob(os.path.join(repo_root, ".bookkeeping", "*.delete"))):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        sources.append((os.path.basename(path), st.st_mtime_ns, st.st_size))
+    return sources
+
+
+class RetentionIndex:
+    """Read side of retention.idx: header metadata plus mmap'd records and payload."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, meta_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError("not a retention index")
+        meta_start = _HEADER.size
+        self.meta = json.loads(self._mm[meta_start:meta_start + meta_len])
+        self._records = meta_start + meta_len
+        self._payload = self._records + self.count * _RECORD.size
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def record(self, i: int) -> tuple[int, int, int, int]:
+        return _RECORD.unpack_from(self._mm, self._records + i * _RECORD.size)
+
+    def entry(self, i: int) -> dict:
+        _due, _size, offset, length = self.record(i)
+        start = self._payload + offset
+        return json.loads(self._mm[start:start + length])
+
+    def due_count(self, now: datetime) -> int:
+        """Number of entries whose delete_after is at or before now (binary search)."""
+        keys = _DueKeys(self)
+        return bisect.bisect_right(keys, int(now.timestamp()))
+
+    def sizes(self) -> dict[str, int]:
+        """path -> recorded size for every entry."""
+        return {self.entry(i).get("path"): self.record(i)[1] for i in range(self.count)}
+
+    @property
+    def sources(self) -> list[tuple[str, int, int]]:
+        return [tuple(s) for s in self.meta["sources"]]
+
+
+class _DueKeys:
+    """Sequence view over the records' delete_after values, for bisect."""
+
+    def __init__(self, index: RetentionIndex):
+        self._index = index
+
+    def __len__(self) -> int:
+        return self._index.count
+
+    def __getitem__(self, i: int) -> int:
+        return self._index.record(i)[0]
+
+
+def build_index(repo_root: str, known_sizes: dict[str, int] | None = None) -> None:
+    """Parse every *.delete file and write a fresh retention.idx.
+
+    known_sizes (path -> size, from the previous index's sizes()) are reused rather than
+    measured again. The previous index must be closed first: Windows can't replace a file that
+    is still mapped.
+    """
+    known_sizes = known_sizes or {}
+    sources = _delete_files(repo_root)
+    rows = []
+    for name, _mtime, _size in sources:
+        try:
+            with open(os.path.join(repo_root, ".bookkeeping", name), "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if not isinstance(entries, list):
+            continue
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            due = parse_time(entry.get("delete_after")) if entry.get("delete_after") is not None else None
+            if due is None:
+                continue
+            path = entry.get("path")
+            size = known_sizes[path] if path in known_sizes else path_size(path) if path else 0
+            rows.append((int(due.timestamp()), size, bucket_for(entry, due), {"source": name, **entry}))
+    rows.sort(key=lambda r: r[0])
+
+    buckets = {name: {"entries": 0, "bytes": 0} for name, _ in BUCKETS}
+    buckets[LONGER] = {"entries": 0, "bytes": 0}
+    payload = bytearray()
+    records = bytearray()
+    for due, size, bucket, entry in rows:
+        buckets[bucket]["entries"] += 1
+        buckets[bucket]["bytes"] += size
+        blob = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+        records += _RECORD.pack(due, size, len(payload), len(blob))
+        payload += blob
+
+    meta = json.dumps({"sources": sources, "buckets": buckets}, separators=(",", ":")).encode("utf-8")
+    path = os.path.join(repo_root, INDEX_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(rows), len(meta)))
+        f.write(meta)
+        f.write(records)
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+def open_index(repo_root: str) -> RetentionIndex | None:
+    """The current index, rebuilt first if any *.delete file changed; None when there are none."""
+    path = os.path.join(repo_root, INDEX_FILE)
+    sources = _delete_files(repo_root)
+    index = None
+    try:
+        index = RetentionIndex(path)
+    except (OSError, ValueError, struct.error):
+        pass
+    if index is not None and index.sources == sources:
+        return index
+    if not sources:
+        if index is not None:
+            index.close()
+        return None
+    known_sizes = None
+    if index is not None:
+        known_sizes = index.sizes()
+        index.close()  # unmapped before build_index replaces the file
+    build_index(repo_root, known_sizes)
+    return RetentionIndex(path)
+
+
+def expired_entries(repo_root: str, now: datetime | None = None) -> list[dict]:
+    """Entries whose delete_after has passed, oldest first, each with its "source" file name."""
+    index = open_index(repo_root)
+    if index is None:
+        return []
+    try:
+        n = index.due_count(now or datetime.now(timezone.utc))
+        return [index.entry(i) for i in range(n)]
+    finally:
+        index.close()
+
+
+def summary(repo_root: str, now: datetime | None = None) -> dict:
+    """Entry and byte totals per retention bucket, plus how much is already past due."""
+    index = open_index(repo_root)
+    if index is None:
+        return {"entries": 0, "bytes": 0, "buckets": {}, "expired": {"entries": 0, "bytes": 0}}
+    try:
+        n = index.due_count(now or datetime.now(timezone.utc))
+        buckets = index.meta["buckets"]
+        return {
+            "entries": index.count,
+            "bytes": sum(b["bytes"] for b in buckets.values()),
+            "buckets": buckets,
+            "expired": {"entries": n, "bytes": sum(index.record(i)[1] for i in range(n))},
+        }
+    finally:
+        index.close()
+
+
+def add_entry(repo_root: str, entry: dict, source: str = "dumps.delete") -> None:
+    """Append an entry to .bookkeeping/<source> (written atomically) and refresh the index."""
+    path = os.path.join(repo_root, ".bookkeeping", source)
+    entries = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        pass
+    if not isinstance(entries, list):
+        raise ValueError(f"{path} is not a JSON array")
+    entries.append(entry)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2)
+    os.replace(tmp, path)
+    index = open_index(repo_root)
+    if index is not None:
+        index.close()
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _oldest_mtime(path: str) -> datetime | None:
+    paths = [path]
+    if os.path.isdir(path):
+        paths = [os.path.join(d, n) for d, _dirs, files in os.walk(path) for n in files]
+    mtimes = []
+    for p in paths:
+        try:
+            mtimes.append(os.stat(p).st_mtime)
+        except OSError:
+            pass
+    return datetime.fromtimestamp(min(mtimes), timezone.utc) if mtimes else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retention reminder index for .bookkeeping/*.delete files.")
+    parser.add_argument("repo_root")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("expired", help="List entries whose delete_after has passed")
+    sub.add_parser("summary", help="Entries and bytes per retention bucket")
+    add = sub.add_parser("add", help="Add a deletion reminder")
+    add.add_argument("path")
+    when = add.add_mutually_exclusive_group(required=True)
+    when.add_argument("--retention", help='Retention period, e.g. "30 days", "6 months"')
+    when.add_argument("--delete-after", help="Explicit ISO 8601 deletion timestamp")
+    add.add_argument("--source", default="dumps.delete")
+    add.add_argument("--file-timestamp", help="Default: oldest modification time of the file(s) at path")
+    add.add_argument("--metadata", help="JSON object to store with the entry (e.g. dump metadata)")
+    args = parser.parse_args()
+
+    repo_root = os.path.abspath(args.repo_root)
+    if args.command == "expired":
+        print(json.dumps(expired_entries(repo_root), indent=2))
+    elif args.command == "summary":
+        print(json.dumps(summary(repo_root), indent=2))
+    else:
+        now = datetime.now(timezone.utc)
+        try:
+            due = now + parse_duration(args.retention) if args.retention else parse_time(args.delete_after)
+        except ValueError as e:
+            parser.error(str(e))
+        if due is None:
+            parser.error(f"invalid --delete-after timestamp: {args.delete_after}")
+        path = os.path.abspath(args.path)
+        oldest = _oldest_mtime(path)
+        file_ts = args.file_timestamp or _iso(oldest or now)
+        entry = {"path": path, "ingested_at": _iso(now), "file_timestamp": file_ts, "delete_after": _iso(due)}
+        if args.metadata:
+            entry["metadata"] = json.loads(args.metadata)
+        add_entry(repo_root, entry, args.source)
+        print(json.dumps(entry, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Run a test command unless the same command already ran against a byte-identical tree.
+
+Usage:
+    python test_cache.py run --cmd "<test_cmd>" [--repo <path>] [--shell bash|pwsh|system]
+                             [--cache-dir <dir>] [--no-cache-failures]
+    python test_cache.py key --cmd "<test_cmd>" [--repo <path>]
+    python test_cache.py stats [--repo <path>] [--cache-dir <dir>]
+    python test_cache.py clear [--repo <path>] [--cache-dir <dir>]
+
+The cache key is the git tree of the working directory, tracked and untracked files alike,
+minus anything .gitignore'd and the cache directory itself, plus the command. The tree is
+computed by copying the index to a temporary file, running `git add -A` into it and
+`git write-tree`. The real index and the working tree are left untouched. Edits to ignored
+files, such as the dev-loop workspace in .bookkeeping/, don't change the key, and neither do
+the cache's own entries when .bookkeeping/ isn't ignored.
+
+`run` executes the command from the repo root with `bash -lc` (the default where bash exists),
+`pwsh -Command` or the system shell, streaming its output, and records
+pass/fail, exit code, duration and the last MAX_OUTPUT bytes of output in
+<repo>/.bookkeeping/test-cache/<key>.json. On a hit the stored output tail is replayed
+instead. Either way the exit code is the command's, and a one-line "test-cache: ..." status
+goes to stderr. Entries are evicted least-recently-used beyond MAX_ENTRIES.
+Outside a git repo the command just runs.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+
+CACHE_DIR = os.path.join(".bookkeeping", "test-cache")
+MAX_ENTRIES = 200
+MAX_OUTPUT = 16 * 1024
+
+
+def _git(repo: str, *args: str, env: dict | None = None) -> str:
+    return subprocess.run(["git", "-C", repo, *args], capture_output=True, text=True, check=True,
+                          env=env).stdout.strip()
+
+
+def worktree_tree(repo: str, exclude: str | None = None) -> str:
+    """Tree SHA of the working directory as `git add -A` would stage it, via a throwaway index.
+
+    exclude is a directory left out of the tree (the cache dir, whose entries change on every
+    store) when it's inside repo.
+    """
+    pathspec = ["."]
+    if exclude is not None:
+        rel = os.path.relpath(os.path.abspath(exclude), os.path.abspath(repo))
+        outside = rel == os.pardir or rel.startswith(os.pardir + os.sep)
+        if rel != os.curdir and not outside:
+            pathspec.append(f":(exclude){rel.replace(os.sep, '/')}")
+    index = _git(repo, "rev-parse", "--path-format=absolute", "--git-path", "index")
+    fd, tmp_index = tempfile.mkstemp(prefix="test-cache-index-")
+    os.close(fd)
+    try:
+        if os.path.exists(index):
+            # Starting from the real index keeps its stat data, so unchanged files aren't re-hashed.
+            shutil.copyfile(index, tmp_index)
+        else:
+            os.remove(tmp_index)
+        env = {**os.environ, "GIT_INDEX_FILE": tmp_index}
+        _git(repo, "add", "-A", "--", *pathspec, env=env)
+        return _git(repo, "write-tree", env=env)
+    finally:
+        if os.path.exists(tmp_index):
+            os.remove(tmp_index)
+
+
+def cache_key(tree: str, cmd: str) -> str:
+    return hashlib.sha256(f"{tree}\0{cmd}".encode("utf-8")).hexdigest()
+
+
+def _entry_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def lookup(cache_dir: str, key: str) -> dict | None:
+    """Cached result for a key; a hit bumps the entry's mtime, which is its LRU timestamp."""
+    path = _entry_path(cache_dir, key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        os.utime(path)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return entry
+
+
+def store(cache_dir: str, key: str, entry: dict, max_entries: int = MAX_ENTRIES) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _entry_path(cache_dir, key)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f, indent=1)
+    os.replace(tmp, path)
+    evict(cache_dir, max_entries)
+
+
+def _entries(cache_dir: str) -> list[os.DirEntry]:
+    try:
+        with os.scandir(cache_dir) as it:
+            return [e for e in it if e.name.endswith(".json") and e.is_file()]
+    except OSError:
+        return []
+
+
+def evict(cache_dir: str, max_entries: int = MAX_ENTRIES) -> int:
+    """Delete the least recently used entries beyond max_entries; returns how many were removed."""
+    entries = _entries(cache_dir)
+    if len(entries) <= max_entries:
+        return 0
+    entries.sort(key=lambda e: e.stat().st_mtime_ns)
+    removed = 0
+    for e in entries[:len(entries) - max_entries]:
+        try:
+            os.remove(e.path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def default_shell() -> str:
+    return "bash" if os.name != "nt" and shutil.which("bash") else "system"
+
+
+def _shell_argv(cmd: str, shell: str) -> list[str] | str:
+    if shell == "bash":
+        return ["bash", "-lc", cmd]
+    if shell == "pwsh":
+        return [shutil.which("pwsh") or "powershell", "-NoProfile", "-Command", cmd]
+    return cmd
+
+
+def run_command(cmd: str, cwd: str, shell: str = "system",
+                max_output: int = MAX_OUTPUT) -> tuple[int, float, str]:
+    """Run cmd through the shell, streaming output; returns (exit code, seconds, output tail)."""
+    tail: deque[bytes] = deque()
+    kept = 0
+    start = time.monotonic()
+    argv = _shell_argv(cmd, shell)
+    proc = subprocess.Popen(argv, shell=isinstance(argv, str), cwd=cwd,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    out = sys.stdout.buffer
+    for chunk in iter(lambda: proc.stdout.read1(64 * 1024), b""):
+        out.write(chunk)
+        out.flush()
+        tail.append(chunk)
+        kept += len(chunk)
+        while kept - len(tail[0]) >= max_output:
+            kept -= len(tail.popleft())
+    code = proc.wait()
+    text = b"".join(tail)[-max_output:].decode("utf-8", "replace")
+    return code, time.monotonic() - start, text
+
+
+def cmd_run(repo: str, cache_dir: str, cmd: str, shell: str, cache_failures: bool = True,
+            max_entries: int = MAX_ENTRIES, max_output: int = MAX_OUTPUT) -> int:
+    try:
+        tree = worktree_tree(repo, exclude=cache_dir)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        print("test-cache: not a git repo, running uncached", file=sys.stderr)
+        return run_command(cmd, repo, shell, max_output)[0]
+
+    key = cache_key(tree, cmd)
+    entry = lookup(cache_dir, key)
+    if entry is not None and (entry["passed"] or cache_failures):
+        sys.stdout.write(entry["output"])
+        sys.stdout.flush()
+        verdict = "passed" if entry["passed"] else f"failed (exit {entry['exit_code']})"
+        print(f"test-cache: hit for tree {tree[:12]} — {verdict}, {entry['duration']:.1f}s saved", file=sys.stderr)
+        return entry["exit_code"]
+
+    code, duration, output = run_command(cmd, repo, shell, max_output)
+    store(cache_dir, key, {
+        "tree": tree, "cmd": cmd, "passed": code == 0, "exit_code": code, "duration": round(duration, 3),
+        "output": output, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }, max_entries)
+    print(f"test-cache: miss for tree {tree[:12]} — {'passed' if code == 0 else f'failed (exit {code})'} "
+          f"in {duration:.1f}s", file=sys.stderr)
+    return code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test-result cache keyed by git tree + test command.")
+    parser.add_argument("command", choices=("run", "key", "stats", "clear"))
+    parser.add_argument("--cmd", help="Test command (run through the shell from the repo root)")
+    parser.add_argument("--repo", default=".", help="Repository root (default: current directory)")
+    parser.add_argument("--shell", choices=("bash", "pwsh", "system"), default=default_shell(),
+                        help="How to run --cmd (default: bash -lc where bash exists, else the system shell)")
+    parser.add_argument("--cache-dir", help="Default: <repo>/.bookkeeping/test-cache")
+    parser.add_argument("--max-entries", type=int, default=MAX_ENTRIES)
+    parser.add_argument("--max-output", type=int, default=MAX_OUTPUT, help="Bytes of output kept per entry")
+    parser.add_argument("--no-cache-failures", action="store_true",
+                        help="Re-run commands whose cached result is a failure (e.g. flaky tests)")
+    args = parser.parse_args()
+
+    repo = os.path.abspath(args.repo)
+    cache_dir = os.path.abspath(args.cache_dir or os.path.join(repo, CACHE_DIR))
+    if args.command in ("run", "key") and not args.cmd:
+        parser.error(f"{args.command} requires --cmd")
+
+    if args.command == "run":
+        sys.exit(cmd_run(repo, cache_dir, args.cmd, args.shell, not args.no_cache_failures,
+                         args.max_entries, args.max_output))
+    elif args.command == "key":
+        tree = worktree_tree(repo, exclude=cache_dir)
+        print(json.dumps({"tree": tree, "key": cache_key(tree, args.cmd)}))
+    elif args.command == "stats":
+        entries = _entries(cache_dir)
+        print(json.dumps({"cache_dir": cache_dir, "entries": len(entries),
+                          "bytes": sum(e.stat().st_size for e in entries)}, indent=2))
+    else:
+        for e in _entries(cache_dir):
+            os.remove(e.path)
+
+
+if __name__ == "__main__":
+    main()
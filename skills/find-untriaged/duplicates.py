@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""Find likely duplicate issues with MinHash signatures and an LSH index.
+
+Usage:
+    python duplicates.py --repo <owner/repo> [--issue N] [--threshold 0.5] [--no-refresh]
+                         [--issues-dir issues] [--index-dir .bookkeeping/duplicates]
+
+Without --issue, prints every cluster of likely duplicates in the repo; with --issue, the issues
+most similar to N. Run from the triage repo root.
+
+Each issue's title and body become a set of shingles: adjacent word pairs, plus the title's
+words on their own so short titles still count. Markdown headings and HTML comments are
+dropped first, since issue templates would otherwise make unrelated reports look alike. The
+set is reduced to a NUM_BINS-bin signature by one-permutation hashing: each shingle is hashed
+once, the top bits pick a bin and the bin keeps its smallest hash. An empty bin takes the
+value of the first non-empty bin in a fixed pseudo-random probe order, the same for every
+issue ("optimal densification"; copying the neighbouring bin instead would make runs of bins
+agree or disagree together and inflate the variance on short texts). Only one mixed byte of
+each bin is kept (b-bit minwise hashing), so a signature is NUM_BINS bytes and two are
+compared by XORing them as ints and counting the zero bytes. The fraction of bins that agree,
+less the 1/256 chance that two different values share a byte, estimates the Jaccard
+similarity of the shingle sets.
+
+Signatures are split into BANDS bands (bins band, band + BANDS, ...); issues that share a band
+are candidates, and only candidates are compared, so the work grows with the number of issues
+rather than with the number of pairs. Candidate pairs at or above --threshold are joined with
+union-find into clusters.
+
+Signatures are stored per repo in .bookkeeping/duplicates/<owner>-<repo>.marshal. Triaged
+issues are read from issues/<owner>-<repo>/<N>/github.json and re-signed only when that file's
+mtime or size changes (--no-refresh skips the check). find_untriaged.py adds the open issues
+it fetches, from their listing title and body, and notes likely duplicates of untriaged issues
+in its JSON output.
+
+Output format (JSON to stdout):
+    {"repo": "owner/repo", "clusters": [{"issues": [{"number": N, "title": "...", "triaged": true}, ...],
+                                         "pairs": [[N, M, 0.72], ...], "similarity": 0.72}]}
+With --issue:
+    {"repo": "owner/repo", "issue": N, "similar": [{"number": M, "title": "...", "triaged": true, "similarity": 0.72}]}
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import marshal
+import os
+import re
+import sys
+import zlib
+
+INDEX_DIR = os.path.join(".bookkeeping", "duplicates")
+INDEX_VERSION = 1
+NUM_BINS = 256
+BANDS = 64  # 4 bins per band: pairs above ~0.35 similarity usually share a band
+BIN_BITS = 8  # log2(NUM_BINS)
+DEFAULT_THRESHOLD = 0.5
+# Bands this crowded are boilerplate shared by many issues; comparing all their members is quadratic.
+MAX_BUCKET = 200
+
+WORD_RE = re.compile(r"[a-z0-9_]+(?:[.:][a-z0-9_]+)*")
+NOISE_RE = re.compile(r"<!--.*?-->|^\s{0,3}#{1,6}\s.*$", re.DOTALL | re.MULTILINE)
+_EMPTY = (1 << 64) - 1
+
+
+def shingles(title: str, body: str) -> set[str]:
+    title_words = WORD_RE.findall((title or "").lower())
+    words = title_words + WORD_RE.findall(NOISE_RE.sub(" ", body or "").lower())
+    result = {f"t:{w}" for w in title_words}
+    result.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return result
+
+
+def _mix(z: int) -> int:
+    """splitmix64's finalizer: every output bit depends on every input bit."""
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & _EMPTY
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EB & _EMPTY
+    return z ^ (z >> 31)
+
+
+@functools.lru_cache(maxsize=None)
+def _probe_order(i: int) -> bytes:
+    """The order in which bins are tried when bin i is empty: a fixed permutation of all bins."""
+    return bytes(sorted(range(NUM_BINS), key=lambda j: _mix(i << 16 | j)))
+
+
+def signature(items: set[str]) -> bytes | None:
+    """One-permutation MinHash with optimal densification, one byte per bin; None for an empty set."""
+    bins = [_EMPTY] * NUM_BINS
+    for item in items:
+        h = int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "little")
+        b = h >> (64 - BIN_BITS)
+        if h < bins[b]:
+            bins[b] = h
+    if all(v == _EMPTY for v in bins):
+        return None
+    sig = bytearray(NUM_BINS)
+    for i in range(NUM_BINS):
+        value = bins[i]
+        if value == _EMPTY:
+            value = next(bins[j] for j in _probe_order(i) if bins[j] != _EMPTY)
+        sig[i] = _mix(value) & 0xFF
+    return bytes(sig)
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    agree = (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(NUM_BINS, "little").count(0)
+    return max(0.0, (agree / NUM_BINS - 1 / 256) / (1 - 1 / 256))
+
+
+class DuplicateIndex:
+    """One repo's signatures: number -> [stamp, signature, title, triaged]."""
+
+    def __init__(self, path: str, issues: dict | None = None):
+        self.path = path
+        self.issues = issues or {}
+        self.dirty = False
+        self._tables = None
+
+    @classmethod
+    def load(cls, repo_key: str, index_dir: str = INDEX_DIR) -> "DuplicateIndex":
+        path = os.path.join(index_dir, f"{repo_key}.marshal")
+        try:
+            with open(path, "rb") as f:
+                data = marshal.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("params") == (NUM_BINS, BANDS):
+                return cls(path, data["issues"])
+        except (OSError, EOFError, ValueError, TypeError, AttributeError):
+            pass
+        return cls(path)
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            marshal.dump({"version": INDEX_VERSION, "params": (NUM_BINS, BANDS),
+                          "issues": self.issues}, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def add(self, number: int, title: str, body: str, stamp, triaged: bool) -> bool:
+        """Sign an issue unless it's indexed with the same stamp; returns whether it was (re)signed."""
+        entry = self.issues.get(number)
+        if entry is not None and entry[0] == stamp:
+            return False
+        sig = signature(shingles(title, body))
+        if sig is None:
+            return False
+        self.issues[number] = [stamp, sig, title or "", triaged]
+        self.dirty = True
+        self._tables = None
+        return True
+
+    def add_listing(self, issue: dict) -> bool:
+        """Sign an open issue from a find_untriaged listing, unless its github.json is indexed."""
+        entry = self.issues.get(issue["number"])
+        if entry is not None and entry[3]:
+            return False
+        text = f"{issue.get('title', '')}\0{issue.get('body') or ''}"
+        stamp = ("listing", zlib.crc32(text.encode("utf-8")))
+        return self.add(issue["number"], issue.get("title", ""), issue.get("body") or "", stamp, False)
+
+    def refresh_triaged(self, issues_dir: str, repo_key: str, numbers=None) -> int:
+        """Re-sign triaged issues whose github.json changed; numbers limits which are checked."""
+        repo_dir = os.path.join(issues_dir, repo_key)
+        if numbers is None:
+            try:
+                with os.scandir(repo_dir) as it:
+                    numbers = [int(e.name) for e in it if e.name.isdigit() and e.is_dir()]
+            except OSError:
+                return 0
+        changed = 0
+        for number in numbers:
+            path = os.path.join(repo_dir, str(number), "github.json")
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stamp = (st.st_mtime_ns, st.st_size)
+            entry = self.issues.get(number)
+            if entry is not None and entry[0] == stamp:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    github = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Warning: skipping {path}: {e}", file=sys.stderr)
+                continue
+            issue = github.get("issue") if isinstance(github, dict) else None
+            issue = issue.get("data") if isinstance(issue, dict) else None
+            if not isinstance(issue, dict):
+                print(f"Warning: skipping {path}: no issue.data object", file=sys.stderr)
+                continue
+            title, body = issue.get("title"), issue.get("body")
+            changed += self.add(number, title if isinstance(title, str) else "",
+                                body if isinstance(body, str) else "", stamp, True)
+        return changed
+
+    def _band_keys(self, sig: bytes) -> list[bytes]:
+        return [sig[band::BANDS] for band in range(BANDS)]
+
+    def _buckets(self) -> list[dict]:
+        """Per band, band value -> issue numbers; built once and dropped whenever an issue is (re)signed."""
+        if self._tables is None:
+            self._tables = [{} for _ in range(BANDS)]
+            for number, entry in self.issues.items():
+                for table, key in zip(self._tables, self._band_keys(entry[1])):
+                    table.setdefault(key, []).append(number)
+        return self._tables
+
+    def pairs(self, threshold: float = DEFAULT_THRESHOLD) -> dict[tuple, float]:
+        """(a, b) -> similarity, a < b, for every candidate pair at or above threshold."""
+        result, seen = {}, set()
+        for table in self._buckets():
+            for members in table.values():
+                if len(members) < 2 or len(members) > MAX_BUCKET:
+                    continue
+                for i, a in enumerate(members):
+                    for b in members[i + 1:]:
+                        pair = (a, b) if a < b else (b, a)
+                        if pair in seen:
+                            continue
+                        seen.add(pair)
+                        sim = similarity(self.issues[a][1], self.issues[b][1])
+                        if sim >= threshold:
+                            result[pair] = sim
+        return result
+
+    def similar(self, number: int, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+        """Issues sharing a band with `number` whose similarity is at or above threshold, best first."""
+        entry = self.issues.get(number)
+        if entry is None:
+            return []
+        found, seen = [], {number}
+        for table, key in zip(self._buckets(), self._band_keys(entry[1])):
+            members = table.get(key, ())
+            if len(members) > MAX_BUCKET:
+                continue
+            for other in members:
+                if other in seen:
+                    continue
+                seen.add(other)
+                sim = similarity(entry[1], self.issues[other][1])
+                if sim >= threshold:
+                    found.append((other, sim))
+        return [{"number": n, "title": self.issues[n][2], "triaged": self.issues[n][3], "similarity": round(sim, 3)}
+                for n, sim in sorted(found, key=lambda x: (-x[1], x[0]))]
+
+    def clusters(self, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+        pairs = self.pairs(threshold)
+        parent = {}
+
+        def find(x):
+            root = x
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while x != root:
+                parent[x], x = root, parent.get(x, x)
+            return root
+
+        for a, b in pairs:
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[max(ra, rb)] = min(ra, rb)
+        groups: dict[int, list] = {}
+        for a, b in pairs:
+            groups.setdefault(find(a), []).append((a, b))
+        result = []
+        for root, edges in groups.items():
+            members = sorted({n for edge in edges for n in edge})
+            result.append({
+                "issues": [{"number": n, "title": self.issues[n][2], "triaged": self.issues[n][3]} for n in members],
+                "pairs": [[a, b, round(pairs[(a, b)], 3)] for a, b in sorted(edges)],
+                "similarity": round(max(pairs[e] for e in edges), 3),
+            })
+        result.sort(key=lambda c: (-c["similarity"], c["issues"][0]["number"]))
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find likely duplicate issues (MinHash + LSH).")
+    parser.add_argument("--repo", required=True, help="owner/repo")
+    parser.add_argument("--issue", type=int, help="List issues similar to this one instead of all clusters")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Minimum estimated Jaccard similarity (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--no-refresh", action="store_true", help="Use stored signatures without checking github.json")
+    parser.add_argument("--issues-dir", default="issues")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    repo_key = args.repo.replace("/", "-", 1)
+    index = DuplicateIndex.load(repo_key, args.index_dir)
+    if not args.no_refresh:
+        index.refresh_triaged(args.issues_dir, repo_key)
+    try:
+        index.save()
+    except OSError as e:
+        print(f"Warning: could not write duplicate index {index.path}: {e}", file=sys.stderr)
+
+    if args.issue is not None:
+        if args.issue not in index.issues:
+            print(f"Error: #{args.issue} has no github.json and wasn't in a find-untriaged listing", file=sys.stderr)
+            sys.exit(1)
+        result = {"repo": args.repo, "issue": args.issue, "similar": index.similar(args.issue, args.threshold)}
+    else:
+        result = {"repo": args.repo, "clusters": index.clusters(args.threshold)}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
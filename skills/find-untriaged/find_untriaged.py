@@ -2,43 +2,56 @@
 """Find open GitHub issues that haven't been triaged yet.
 
 Outputs a concise summary to stdout and writes full JSON data to a temp file.
+
+Open issues for all repos are fetched concurrently through github_fetch.py, which caches pages
+in .bookkeeping/github-cache/ and re-requests them conditionally (ETag / If-Modified-Since),
+applying only the issues changed since the last full listing.
+
+Untriaged issues are also signed into duplicates.py's MinHash index (from their listing title
+and body), along with any newly triaged issue's github.json; an untriaged issue that looks like
+a duplicate of another issue gets a "possible_duplicates" list in the JSON output and a
+"dup? #N" note in the summary. --no-duplicates skips this.
+
+--timings prints per-phase wall time, files opened, bytes read and peak memory (config, fetch,
+triaged, duplicates, output) as one JSON line on stderr; --profile <file> writes cProfile stats. See
+benchmark/scripts/instrumentation.py. Without the benchmark skill installed, neither flag is
+available and the script runs uninstrumented.
 """
 
-import argparse, json, os, re, shutil, subprocess, sys, tempfile
+import argparse, json, os, sys, tempfile
 
+from duplicates import INDEX_DIR, DuplicateIndex
+from github_fetch import CACHE_DIR, FetchError, fetch_open_issues
+from triaged_manifest import MANIFEST_DIR, load_triaged
 
-def get_open_issues(owner, repo):
-    """Use `gh` to get all open issue numbers + titles."""
-    gh = shutil.which("gh")
-    if not gh:
-        print("Error: 'gh' CLI not found. Install from https://cli.github.com/", file=sys.stderr)
-        sys.exit(1)
-    result = subprocess.run(
-        [gh, "api", "--paginate",
-         f"/repos/{owner}/{repo}/issues?state=open",
-         "--jq", '.[] | select(.pull_request == null) | {number, title, created_at}'],
-        capture_output=True, text=True, check=True
-    )
-    issues = []
-    for line in result.stdout.strip().split('\n'):
-        if line:
-            issues.append(json.loads(line))
-    return issues
-
-
-def get_triaged_issues(issues_dir, dir_name):
-    """Scan issues/<owner>-<repo>/ for folders with analysis.json."""
-    repo_dir = os.path.join(issues_dir, dir_name)
-    triaged = set()
-    if os.path.isdir(repo_dir):
-        for entry in os.listdir(repo_dir):
-            report = os.path.join(repo_dir, entry, "analysis.json")
-            if os.path.isfile(report):
-                try:
-                    triaged.add(int(entry))
-                except ValueError:
-                    pass
-    return triaged
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmark', 'scripts'))
+try:
+    from instrumentation import from_argv
+except ImportError:  # the benchmark skill isn't installed: run without --timings / --profile
+    class Instrumentation:
+        def __init__(self, script, *args, **kwargs):
+            pass
+
+        def start(self, name):
+            pass
+
+        def stop(self):
+            pass
+
+    def from_argv(script, argv):
+        return Instrumentation(script), argv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'triage-status', 'scripts'))
+from triage_config import load_config
+
+
+def get_triaged_issues(issues_dir, dir_name, manifest_dir=MANIFEST_DIR):
+    """Issue numbers under issues/<owner>-<repo>/ that have an analysis.json.
+
+    Read from the .bookkeeping/triaged/ manifest, which is rebuilt when any issue directory
+    changed since it was written.
+    """
+    return set(load_triaged(issues_dir, dir_name, manifest_dir))
 
 
 def print_summary(results, show_max=10):
@@ -53,39 +66,70 @@ def print_summary(results, show_max=10):
         for i in shown:
             date = i["created_at"][:10]
             title = i["title"][:60]
-            print(f"  #{i['number']:<6} {title:<60} {date}")
+            dups = "".join(f"  dup? #{d['number']}" for d in i.get("possible_duplicates", [])[:1])
+            print(f"  #{i['number']:<6} {title:<60} {date}{dups}")
         remaining = len(r["untriaged"]) - len(shown)
         if remaining > 0:
             print(f"  ... ({remaining} more, see JSON output)")
 
 
+def flag_duplicates(dir_name, untriaged, triaged, issues_dir, index_dir=INDEX_DIR, show_max=3):
+    """Sign untriaged (and newly triaged) issues and note each untriaged issue's likely duplicates."""
+    index = DuplicateIndex.load(dir_name, index_dir)
+    # Triaged issues already signed from github.json are refreshed by duplicates.py, not on every run.
+    signed = {n for n, entry in index.issues.items() if entry[3]}
+    index.refresh_triaged(issues_dir, dir_name, sorted(triaged - signed))
+    for issue in untriaged:
+        index.add_listing(issue)
+    try:
+        index.save()
+    except OSError as e:
+        print(f"Warning: could not write duplicate index {index.path}: {e}", file=sys.stderr)
+    for issue in untriaged:
+        similar = index.similar(issue["number"])
+        if similar:
+            issue["possible_duplicates"] = similar[:show_max]
+
+
 def main():
     parser = argparse.ArgumentParser(description="Find open GitHub issues that haven't been triaged yet.")
     parser.add_argument("--repo", help="owner/repo to check (default: all)")
     parser.add_argument("--config", default="config/repos.yaml")
     parser.add_argument("--issues-dir", default="issues")
     parser.add_argument("--show", type=int, default=10, help="Max issues to show per repo (default: 10)")
-    args = parser.parse_args()
-
-    # Parse top-level keys from repos.yaml (e.g. "dotnet/diagnostics:")
-    # to extract owner/name pairs without requiring a YAML library.
-    repo_keys = []
-    with open(args.config) as f:
-        for line in f:
-            m = re.match(r'^(\S+/\S+)\s*:', line)
-            if m:
-                repo_keys.append(m.group(1))
-
+    parser.add_argument("--full", action="store_true",
+                        help="Re-list all open issues instead of applying changes since the last full listing")
+    parser.add_argument("--api-url", help="GitHub API base URL (default: $GITHUB_API_URL or https://api.github.com)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--manifest-dir", default=MANIFEST_DIR)
+    parser.add_argument("--no-duplicates", action="store_true",
+                        help="Don't check untriaged issues for likely duplicates (duplicates.py)")
+    inst, argv = from_argv("find_untriaged", sys.argv[1:])
+    args = parser.parse_args(argv)
+
+    # Configured repos, from the same compiled config cache generate-summary uses
+    inst.start("config")
+    repo_keys = load_config(".", repos_path=args.config).repo_keys
+
+    if args.repo:
+        repo_keys = [k for k in repo_keys if k == args.repo]
+    inst.start("fetch")
+    fetched, stats = fetch_open_issues(repo_keys, args.api_url, args.cache_dir, args.full)
+
+    inst.start("triaged")
     results = []
+    signing = []
+    failed = 0
     for repo_key in repo_keys:
-        if args.repo and repo_key != args.repo:
-            continue
-
         owner, name = repo_key.split("/", 1)
         dir_name = f"{owner}-{name}"
 
-        open_issues = get_open_issues(owner, name)
-        triaged = get_triaged_issues(args.issues_dir, dir_name)
+        open_issues = fetched[repo_key]
+        if isinstance(open_issues, FetchError):
+            print(f"Error: {repo_key}: {open_issues}", file=sys.stderr)
+            failed += 1
+            continue
+        triaged = get_triaged_issues(args.issues_dir, dir_name, args.manifest_dir)
 
         open_numbers = {i["number"] for i in open_issues}
         untriaged_numbers = open_numbers - triaged
@@ -102,8 +146,17 @@ def main():
             "untriaged": untriaged,
             "untriaged_count": len(untriaged)
         })
+        signing.append((dir_name, untriaged, triaged))
+
+    inst.start("duplicates")
+    for dir_name, untriaged, triaged in signing:
+        if not args.no_duplicates:
+            flag_duplicates(dir_name, untriaged, triaged, args.issues_dir)
+        for issue in untriaged:
+            del issue["body"]  # only needed for the signatures
 
     # Write full JSON to temp file
+    inst.start("output")
     output = {
         "repos": results,
         "total_untriaged": sum(r["untriaged_count"] for r in results)
@@ -116,6 +169,9 @@ def main():
     # Print concise summary to stdout
     print_summary(results, show_max=args.show)
     print(f"\nFull data: {tmp.name}")
+    print(f"GitHub requests: {stats['requests']} ({stats['not_modified']} not modified)", file=sys.stderr)
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,234 @@
+"""Fetch open issues for several GitHub repos concurrently, with an on-disk conditional-request cache.
+
+Used by find_untriaged.py. Each repo's open-issue list is kept in
+.bookkeeping/github-cache/<owner>-<repo>.json as two cached listings:
+
+  full:  GET /repos/{owner}/{repo}/issues?state=open (every page), refreshed at most once per
+         FULL_REFRESH_HOURS or when --full is passed.
+  delta: GET /repos/{owner}/{repo}/issues?state=all&since=<time of the last full refresh>,
+         applied on top of the full listing on every other run (opened, edited and closed issues).
+
+Every page is stored with its ETag / Last-Modified and re-requested with If-None-Match /
+If-Modified-Since, so unchanged pages come back as 304 Not Modified, which GitHub does not
+count against the rate limit. The `since` value stays fixed between full refreshes, so the
+delta URL is stable and is usually a single 304 as well. Once page 1 of a listing says how
+many pages there are, the remaining pages are requested in parallel; all repos are fetched
+at the same time.
+
+Requests go to https://api.github.com unless --api-url / GITHUB_API_URL points elsewhere (e.g.
+a GitHub Enterprise host, or a local stand-in server when testing offline). The token comes
+from GITHUB_TOKEN / GH_TOKEN, then `gh auth token`; without one, requests are anonymous.
+"""
+
+import asyncio
+import http.client
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+CACHE_VERSION = 2
+CACHE_DIR = os.path.join(".bookkeeping", "github-cache")
+DEFAULT_API_URL = "https://api.github.com"
+FULL_REFRESH_HOURS = 24
+PER_PAGE = 100
+MAX_CONCURRENCY = 8
+TIMEOUT = 30
+# Enough of an issue body for duplicates.py's signatures without bloating the cached pages.
+BODY_CHARS = 2000
+
+LINK_LAST_RE = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+class FetchError(Exception):
+    pass
+
+
+def get_token() -> str | None:
+    token = os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN")
+    if token:
+        return token
+    gh = shutil.which("gh")
+    if gh:
+        result = subprocess.run([gh, "auth", "token"], capture_output=True, text=True)
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip()
+    return None
+
+
+def _compact(issue: dict) -> dict:
+    """The fields find_untriaged needs, so cached pages stay small."""
+    return {"number": issue["number"], "title": issue.get("title", ""),
+            "body": (issue.get("body") or "")[:BODY_CHARS],
+            "created_at": issue.get("created_at", ""), "state": issue.get("state", "open"),
+            "is_pr": "pull_request" in issue}
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class Fetcher:
+    """Conditional GET with ETag / Last-Modified, run on worker threads under a semaphore."""
+
+    def __init__(self, api_url: str, token: str | None, concurrency: int = MAX_CONCURRENCY):
+        self.api_url = api_url.rstrip("/")
+        self.headers = {
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "User-Agent": "find-untriaged",
+        }
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.requests = 0
+        self.not_modified = 0
+
+    def _get(self, url: str, cached: dict | None) -> tuple[int, dict, bytes]:
+        headers = dict(self.headers)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        req = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=TIMEOUT) as resp:
+                return resp.status, dict(resp.headers), resp.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, dict(e.headers), b""
+            detail = e.read().decode("utf-8", "replace")[:200]
+            if e.code in (403, 429) and e.headers.get("X-RateLimit-Remaining") == "0":
+                raise FetchError(f"rate limit exhausted (resets at {e.headers.get('X-RateLimit-Reset')}): {url}")
+            raise FetchError(f"HTTP {e.code} for {url}: {detail}")
+        except urllib.error.URLError as e:
+            raise FetchError(f"{url}: {e.reason}")
+        except (http.client.HTTPException, OSError) as e:  # e.g. the server dropped the connection
+            raise FetchError(f"{url}: {type(e).__name__}: {e}")
+
+    async def page(self, url: str, cached: dict | None) -> tuple[dict, bool, str | None]:
+        """Fetch one page: (cache entry, changed, server Date header)."""
+        async with self.semaphore:
+            status, headers, body = await asyncio.to_thread(self._get, url, cached)
+        self.requests += 1
+        if status == 304 and cached:
+            self.not_modified += 1
+            return cached, False, headers.get("Date")
+        m = LINK_LAST_RE.search(headers.get("Link", ""))
+        entry = {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "last_page": int(m.group(1)) if m else None,
+            "items": [_compact(i) for i in json.loads(body)],
+        }
+        return entry, True, headers.get("Date")
+
+    async def listing(self, base_url: str, pages: dict) -> tuple[list[dict], dict, bool, str | None]:
+        """Fetch every page of a paginated listing.
+
+        Page 1 is fetched first; the rest are requested concurrently once its Link header (or the
+        cached one, on 304) gives the page count. Returns (items, new page cache, changed, Date).
+        """
+        url = f"{base_url}&page=1"
+        first, changed, date = await self.page(url, pages.get(url))
+        new_pages = {url: first}
+        last = first.get("last_page") or 1
+        urls = [f"{base_url}&page={n}" for n in range(2, last + 1)]
+        results = await asyncio.gather(*(self.page(u, pages.get(u)) for u in urls))
+        for u, (entry, page_changed, _date) in zip(urls, results):
+            new_pages[u] = entry
+            changed = changed or page_changed
+        changed = changed or set(new_pages) != set(pages)
+        items = [i for entry in new_pages.values() for i in entry["items"]]
+        return items, new_pages, changed, date
+
+
+def _cache_path(cache_dir: str, repo_key: str) -> str:
+    return os.path.join(cache_dir, repo_key.replace("/", "-", 1) + ".json")
+
+
+def _read_cache(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return cache if isinstance(cache, dict) and cache.get("version") == CACHE_VERSION else {}
+
+
+def _write_cache(path: str, cache: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+async def _fetch_repo(fetcher: Fetcher, repo_key: str, cache_dir: str, full: bool) -> list[dict]:
+    path = _cache_path(cache_dir, repo_key)
+    cache = _read_cache(path)
+    synced_at = cache.get("full_synced_at")
+    stale = synced_at is None or (
+        datetime.now(timezone.utc) - datetime.fromisoformat(synced_at.replace("Z", "+00:00"))
+        > timedelta(hours=FULL_REFRESH_HOURS))
+    repo_url = f"{fetcher.api_url}/repos/{repo_key}/issues"
+
+    dirty = False
+    if full or stale or "full" not in cache:
+        items, pages, changed, date = await fetcher.listing(f"{repo_url}?state=open&per_page={PER_PAGE}",
+                                                            cache.get("full", {}))
+        server_now = parsedate_to_datetime(date) if date else datetime.now(timezone.utc)
+        cache = {"version": CACHE_VERSION, "full": pages, "full_synced_at": _iso(server_now), "delta": {}}
+        dirty = True
+        delta_items = []
+    else:
+        items = [i for entry in cache["full"].values() for i in entry["items"]]
+        delta_items, pages, changed, _date = await fetcher.listing(
+            f"{repo_url}?state=all&since={synced_at}&per_page={PER_PAGE}", cache.get("delta", {}))
+        if changed:
+            cache["delta"] = pages
+            dirty = True
+
+    if dirty:
+        try:
+            _write_cache(path, cache)
+        except OSError as e:
+            print(f"Warning: could not write GitHub cache {path}: {e}", file=sys.stderr)
+
+    # Full listing first, then the since-delta on top: later entries win, closed ones drop out.
+    issues = {}
+    for item in items + delta_items:
+        if item["is_pr"]:
+            continue
+        if item["state"] == "open":
+            issues[item["number"]] = item
+        else:
+            issues.pop(item["number"], None)
+    return [{"number": i["number"], "title": i["title"], "body": i["body"], "created_at": i["created_at"]}
+            for i in issues.values()]
+
+
+async def fetch_all(repo_keys: list[str], api_url: str, cache_dir: str, full: bool = False,
+                    token: str | None = None) -> tuple[dict, dict]:
+    """Open issues for every repo: ({repo_key: [issue] or FetchError}, request stats)."""
+    fetcher = Fetcher(api_url, token)
+    results = await asyncio.gather(*(_fetch_repo(fetcher, key, cache_dir, full) for key in repo_keys),
+                                   return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException) and not isinstance(result, FetchError):
+            raise result
+    stats = {"requests": fetcher.requests, "not_modified": fetcher.not_modified}
+    return dict(zip(repo_keys, results)), stats
+
+
+def fetch_open_issues(repo_keys: list[str], api_url: str | None = None, cache_dir: str = CACHE_DIR,
+                      full: bool = False) -> tuple[dict, dict]:
+    api_url = api_url or os.environ.get("GITHUB_API_URL") or DEFAULT_API_URL
+    return asyncio.run(fetch_all(repo_keys, api_url, cache_dir, full, get_token()))
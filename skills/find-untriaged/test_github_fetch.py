@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Offline tests for github_fetch.py against a stand-in GitHub API on localhost.
+
+Usage:
+    python -m unittest skills/find-untriaged/test_github_fetch.py
+
+The stand-in serves GET /repos/{owner}/{repo}/issues with the parts of GitHub's behavior the
+fetcher relies on: state=open / state=all&since= filtering, per_page/page pagination with a
+Link rel="last" header, and a per-page ETag answered with 304 Not Modified on If-None-Match.
+Unknown repos get a 404, and DROPPED_REPO closes the connection without a response.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from github_fetch import PER_PAGE, FetchError, fetch_all
+
+REPO = "octo/widgets"
+OTHER_REPO = "octo/gadgets"
+DROPPED_REPO = "octo/flaky"
+ISSUE_COUNT = 250  # three pages at PER_PAGE=100
+
+
+def _issue(number: int) -> dict:
+    issue = {"number": number, "title": f"Issue {number}", "body": f"Body of issue {number}",
+             "state": "closed" if number % 5 == 0 else "open",
+             "created_at": "2020-01-01T00:00:00Z", "updated_at": "2020-01-01T00:00:00Z"}
+    if number % 7 == 0:
+        issue["pull_request"] = {"url": f"https://example.invalid/pulls/{number}"}
+    return issue
+
+
+class StandInGitHub(ThreadingHTTPServer):
+    """Issues per repo ({"owner/repo": {number: issue}}) and a log of (path+query, status) served."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.repos = {}
+        self.served = []
+        self.lock = threading.Lock()
+
+    def reset(self):
+        with self.lock:
+            self.repos = {key: {n: _issue(n) for n in range(1, ISSUE_COUNT + 1)} for key in (REPO, OTHER_REPO)}
+            self.served = []
+
+    def update(self, repo_key: str, number: int, **fields):
+        with self.lock:
+            now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            self.repos[repo_key][number].update(fields, updated_at=now)
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: dict | None = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.lock:
+            self.server.served.append((self.path, status))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        repo_key = "/".join(parts[1:3])
+        if repo_key == DROPPED_REPO:
+            self.close_connection = True
+            return
+        if len(parts) != 4 or parts[0] != "repos" or parts[3] != "issues" or repo_key not in self.server.repos:
+            self._send(404, b'{"message": "Not Found"}')
+            return
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with self.server.lock:
+            issues = sorted(self.server.repos[repo_key].values(), key=lambda i: -i["number"])
+        if query.get("state", "open") == "open":
+            issues = [i for i in issues if i["state"] == "open"]
+        if "since" in query:
+            issues = [i for i in issues if i["updated_at"] >= query["since"]]
+        per_page, page = int(query.get("per_page", 30)), int(query.get("page", 1))
+        last = max(1, -(-len(issues) // per_page))
+        body = json.dumps(issues[(page - 1) * per_page:page * per_page]).encode()
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers={"ETag": etag})
+            return
+        base = self.server.api_url + url.path
+        others = "&".join(f"{k}={v}" for k, v in query.items() if k != "page")
+        self._send(200, body, {"ETag": etag, "Content-Type": "application/json",
+                               "Link": f'<{base}?{others}&page={last}>; rel="last"'})
+
+
+class FetchAllTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandInGitHub()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.reset()
+        self.cache_dir = tempfile.mkdtemp(prefix="github-cache-")
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+
+    def fetch(self, repo_keys=(REPO,), full=False):
+        self.server.served.clear()
+        return asyncio.run(fetch_all(list(repo_keys), self.server.api_url, self.cache_dir, full))
+
+    def test_first_fetch_lists_every_page_then_reuses_them_on_304(self):
+        results, stats = self.fetch(full=True)
+        self.assertTrue(all(status == 200 for _path, status in self.server.served))
+        open_count = sum(1 for n in range(1, ISSUE_COUNT + 1) if n % 5)
+        self.assertEqual(stats, {"requests": -(-open_count // PER_PAGE), "not_modified": 0})
+
+        results_again, stats = self.fetch(full=True)
+        self.assertEqual(stats["not_modified"], stats["requests"])
+        self.assertTrue(all(status == 304 for _path, status in self.server.served))
+        self.assertEqual(sorted(i["number"] for i in results_again[REPO]),
+                         sorted(i["number"] for i in results[REPO]))
+
+    def test_since_delta_drops_closed_issues_and_adds_edits(self):
+        self.fetch()
+        self.server.update(REPO, 1, state="closed")
+        self.server.update(REPO, 2, title="Renamed")
+
+        results, _stats = self.fetch()
+        self.assertTrue(self.server.served)
+        self.assertTrue(all("state=all" in path and "since=" in path for path, _status in self.server.served))
+        issues = {i["number"]: i for i in results[REPO]}
+        self.assertNotIn(1, issues)
+        self.assertEqual(issues[2]["title"], "Renamed")
+
+        # Nothing changed since: the delta page comes back 304 and the result is the same.
+        _results, stats = self.fetch()
+        self.assertEqual(stats, {"requests": 1, "not_modified": 1})
+
+    def test_pull_requests_and_closed_issues_are_filtered_out(self):
+        results, _stats = self.fetch()
+        numbers = {i["number"] for i in results[REPO]}
+        expected = {n for n in range(1, ISSUE_COUNT + 1) if n % 5 and n % 7}
+        self.assertEqual(numbers, expected)
+        self.assertEqual(set(results[REPO][0]), {"number", "title", "body", "created_at"})
+
+    def test_fetch_error_in_one_repo_does_not_abort_the_others(self):
+        results, _stats = self.fetch([REPO, "octo/missing", OTHER_REPO])
+        self.assertIsInstance(results["octo/missing"], FetchError)
+        self.assertIn("404", str(results["octo/missing"]))
+        for key in (REPO, OTHER_REPO):
+            self.assertIsInstance(results[key], list)
+            self.assertTrue(results[key])
+
+    def test_dropped_connection_is_a_fetch_error_for_that_repo_only(self):
+        results, _stats = self.fetch([DROPPED_REPO, REPO])
+        self.assertIsInstance(results[DROPPED_REPO], FetchError)
+        self.assertIsInstance(results[REPO], list)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Manifest of triaged issue numbers per repo, so find_untriaged doesn't stat every analysis.json.
+
+Each repo's manifest lives in .bookkeeping/triaged/<owner>-<repo> as an 8-byte magic, a
+64-bit signature of issues/<owner>-<repo>/ when it was built, and the triaged issue numbers
+as a sorted array('I') (little-endian uint32).
+
+The signature is a hash of every issue directory's name and mtime_ns, from one os.scandir
+pass. Creating, deleting or renaming analysis.json inside issues/<owner>-<repo>/<N>/ changes
+<N>/'s mtime, and adding or removing <N>/ changes the set of names, so the signature follows
+new triage, git pull, hand edits and cleanup without any writer having to report them. The
+manifest is trusted while the signature matches; otherwise it is rebuilt by checking each
+issue directory for analysis.json.
+
+What the check costs depends on the platform. On Windows, DirEntry.stat() comes from the
+directory listing, so a current manifest costs one scandir pass and no per-issue syscalls. On
+POSIX, DirEntry.stat() is one stat() per issue directory, the same count as checking each
+issue for analysis.json directly. There the manifest only saves the path lookups of missing
+analysis.json files, which matters little. It is kept for correctness, not speed: a write-through
+update (the writer recording its issue) would miss a git pull or hand edit.
+"""
+
+import hashlib
+import os
+import struct
+import sys
+from array import array
+
+MANIFEST_DIR = os.path.join(".bookkeeping", "triaged")
+MAGIC = b"TRIAGED2"
+_HEADER = struct.Struct("<8sQ")
+
+
+def repo_signature(repo_dir: str) -> int | None:
+    """Hash of (number, mtime_ns) for every issue directory under repo_dir, or None if it's missing."""
+    stamps = []
+    try:
+        with os.scandir(repo_dir) as it:
+            for entry in it:
+                if entry.name.isdigit() and entry.is_dir():
+                    stamps.append((int(entry.name), entry.stat().st_mtime_ns))
+    except OSError:
+        return None
+    stamps.sort()
+    h = hashlib.blake2b(digest_size=8)
+    for number, mtime_ns in stamps:
+        h.update(struct.pack("<Qq", number, mtime_ns))
+    return int.from_bytes(h.digest(), "little")
+
+
+def scan_triaged(repo_dir: str) -> array:
+    """Sorted numbers of every issue directory under repo_dir that has an analysis.json."""
+    numbers = array("I")
+    try:
+        with os.scandir(repo_dir) as it:
+            for entry in it:
+                if entry.name.isdigit() and os.path.isfile(os.path.join(entry.path, "analysis.json")):
+                    numbers.append(int(entry.name))
+    except OSError:
+        pass
+    return array("I", sorted(numbers))
+
+
+def read_manifest(path: str) -> tuple[int | None, array | None]:
+    """(recorded repo signature, numbers), or (None, None) if missing or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None, None
+    if len(data) < _HEADER.size or (len(data) - _HEADER.size) % 4:
+        return None, None
+    magic, signature = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        return None, None
+    numbers = array("I")
+    numbers.frombytes(data[_HEADER.size:])
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    return signature, numbers
+
+
+def write_manifest(path: str, signature: int, numbers: array) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if sys.byteorder == "big":
+        numbers = array("I", numbers)
+        numbers.byteswap()
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, signature))
+        f.write(numbers.tobytes())
+    os.replace(tmp, path)
+
+
+def _paths(issues_dir: str, dir_name: str, manifest_dir: str) -> tuple[str, str]:
+    return os.path.join(issues_dir, dir_name), os.path.join(manifest_dir, dir_name)
+
+
+def _rebuild(repo_dir: str, manifest_path: str, signature: int) -> array:
+    numbers = scan_triaged(repo_dir)
+    try:
+        write_manifest(manifest_path, signature, numbers)
+    except OSError as e:
+        print(f"Warning: could not write triaged manifest {manifest_path}: {e}", file=sys.stderr)
+    return numbers
+
+
+def load_triaged(issues_dir: str, dir_name: str, manifest_dir: str = MANIFEST_DIR) -> array:
+    """Sorted triaged issue numbers for issues/<dir_name>/, from the manifest when it's current."""
+    repo_dir, manifest_path = _paths(issues_dir, dir_name, manifest_dir)
+    signature = repo_signature(repo_dir)
+    if signature is None:
+        return array("I")
+    recorded, numbers = read_manifest(manifest_path)
+    if numbers is not None and recorded == signature:
+        return numbers
+    return _rebuild(repo_dir, manifest_path, signature)
@@ -3,7 +3,14 @@
 Generate triage summary dashboard for a repository.
 
 Usage:
+    python generate-summary.py <owner/repo> --scan <triage_repo_root> <prs_json>
     python generate-summary.py <owner/repo> <triage_repo_root> <reports_json> <prs_json>
+    python generate-summary.py --all <triage_repo_root> [--prs-dir <dir>] [--jobs N]
+
+    Every form also takes --timings (per-phase wall time, files opened, bytes read and peak
+    memory as one JSON line on stderr) and --profile <file> (cProfile stats); see
+    benchmark/scripts/instrumentation.py. Without the benchmark skill installed, neither flag
+    is available and the script runs uninstrumented.
 
 Arguments:
     owner/repo        Repository in owner/repo format (e.g., dotnet/diagnostics)
@@ -11,6 +18,18 @@ Arguments:
     reports_json      Path to a JSON file containing all issue report data
     prs_json          Path to a JSON file containing open PR data with linked issues
 
+With --scan, the script reads issues/<owner>-<repo>/*/analysis.json, github.json and
+analysis.md itself (in parallel) instead of loading a pre-assembled reports_json file.
+Parsed reports are cached in .bookkeeping/report-cache/ (see triage-status/scripts/
+triage_reports.py), so only issues that changed since the last run are re-read.
+
+--all summarizes every repo in config/repos.yaml that has an issues/<owner>-<repo>/ directory.
+Config is parsed once, each repo is scanned and written in a process pool (--jobs, default:
+CPU count), and summaries/index.md gets one row per repo linking its latest.md. PRs for a
+repo are read from <prs-dir>/<owner>-<repo>.json when that file exists; without one the repo's
+"Open Pull Requests" section is empty. A repo that fails is listed in the index and on stderr,
+and the exit code is 1.
+
 The reports_json file should be an array of objects:
     [{"number": 123, "has_analysis_md": true, "data": <analysis.json contents>, "github": <github.json contents or null>}, ...]
 
@@ -19,71 +38,204 @@ The prs_json file should be an array of objects:
 
 Outputs:
     summaries/<owner>-<repo>/<YYYY-MM-DD>.md
+    summaries/<owner>-<repo>/<YYYY-MM-DD>.snapshot.json
     summaries/<owner>-<repo>/latest.md
+
+The snapshot holds one [number, status, has_fix, state, section] row per issue, sorted by
+number, where section is the dashboard section the issue was listed in (its area, or
+"Documentation", "Blocked", "Should Be Closed"). "Changes Since Last Summary" merges the
+previous snapshot with the current one in a single pass and reports new issues, status
+transitions, new fix candidates and closures. A previous summary without a snapshot (written
+before snapshots existed) falls back to collecting issue numbers from its markdown links, which
+only tells which issues are new.
 """
-import json, os, re, sys
+import json, os, re, shutil, sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 
-# Import the YAML parser from the load-information skill (avoids duplicating
-# the parser and avoids a pyyaml dependency).
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'load-information', 'scripts'))
-from load_information import parse_yaml
-
-
-def main():
-    if len(sys.argv) != 5:
-        print(f"Usage: {sys.argv[0]} <owner/repo> <triage_root> <reports_json> <prs_json>")
+# Shared report normalization + incremental report cache (also used by triage-status), and the
+# compiled config cache (repos.yaml is parsed by load-information's parse_yaml only when it changed).
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'triage-status', 'scripts'))
+from triage_config import load_config
+from triage_reports import load_rows, normalize_report
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'benchmark', 'scripts'))
+try:
+    from instrumentation import Instrumentation, from_argv
+except ImportError:  # the benchmark skill isn't installed: run without --timings / --profile
+    class Instrumentation:
+        def __init__(self, script, *args, **kwargs):
+            pass
+
+        def start(self, name):
+            pass
+
+        def stop(self):
+            pass
+
+    def from_argv(script, argv):
+        return Instrumentation(script), argv
+
+
+class LineWriter:
+    """Streams lines to a file joined by newlines, matching "\\n".join(lines) output."""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def add(self, *lines):
+        for line in lines:
+            if self.count:
+                self.f.write("\n")
+            self.f.write(line)
+            self.count += 1
+
+
+def publish_latest(out_path, latest_path):
+    """Point latest.md at the finished dated summary without rewriting it.
+
+    Hardlinks a temp name to the dated file (falling back to a copy where links aren't
+    supported) and renames it over latest.md, so the swap is atomic.
+    """
+    tmp_path = f"{latest_path}.tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(out_path, tmp_path)
+    except OSError:
+        shutil.copyfile(out_path, tmp_path)
+    os.replace(tmp_path, latest_path)
+
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FIELDS = ["number", "status", "has_fix", "state", "section"]
+SUMMARY_RE = re.compile(r"(\d{4}-\d{2}-\d{2})\.md$")
+SNAPSHOT_RE = re.compile(r"(\d{4}-\d{2}-\d{2})\.snapshot\.json$")
+
+
+def write_snapshot(path, rows):
+    """Write number-sorted snapshot rows atomically (temp file + rename)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": SNAPSHOT_VERSION, "fields": SNAPSHOT_FIELDS, "rows": rows}, f,
+                  separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """Snapshot rows, or None if the file is missing, unreadable or from another version."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+        return None
+    return data.get("rows")
+
+
+def load_previous_summary(summary_dir, owner, repo_name):
+    """(date, snapshot rows or None, issue numbers) for the newest dated summary, or None.
+
+    Reads the snapshot when the newest summary has one; otherwise scans that markdown for
+    [#N](.../issues/N) links.
+    """
+    if not os.path.isdir(summary_dir):
+        return None
+    summaries, snapshots = set(), set()
+    for name in os.listdir(summary_dir):
+        m = SUMMARY_RE.match(name)
+        if m:
+            summaries.add(m.group(1))
+        m = SNAPSHOT_RE.match(name)
+        if m:
+            snapshots.add(m.group(1))
+    if not summaries and not snapshots:
+        return None
+    date = max(summaries | snapshots)
+    if date in snapshots:
+        rows = read_snapshot(os.path.join(summary_dir, f"{date}.snapshot.json"))
+        if rows is not None:
+            return date, rows, {r[0] for r in rows}
+    if date not in summaries:
+        return None
+    with open(os.path.join(summary_dir, f"{date}.md"), "r", encoding="utf-8") as f:
+        content = f.read()
+    numbers = {int(m.group(1)) for m in re.finditer(
+        rf"\[#(\d+)\]\(https://github\.com/{re.escape(owner)}/{re.escape(repo_name)}/issues/\d+\)", content)}
+    return date, None, numbers
+
+
+def diff_snapshots(prev, cur):
+    """Merge two number-sorted snapshots in one pass.
+
+    Returns {"new": [rows], "removed": [numbers], "changes": [(row, [descriptions])],
+    "status_changes": n, "newly_fixed": n, "closed": n, "reopened": n}.
+    """
+    result = {"new": [], "removed": [], "changes": [], "status_changes": 0, "newly_fixed": 0,
+              "closed": 0, "reopened": 0}
+    i = j = 0
+    while i < len(prev) or j < len(cur):
+        if j == len(cur) or (i < len(prev) and prev[i][0] < cur[j][0]):
+            result["removed"].append(prev[i][0])
+            i += 1
+            continue
+        if i == len(prev) or cur[j][0] < prev[i][0]:
+            result["new"].append(cur[j])
+            j += 1
+            continue
+        (_, old_status, old_fix, old_state, _), row = prev[i], cur[j]
+        _, status, has_fix, state, _ = row
+        notes = []
+        if status != old_status:
+            notes.append(f"{old_status or '—'} → {status or '—'}")
+            result["status_changes"] += 1
+        if has_fix and not old_fix:
+            notes.append("✅ new fix candidate")
+            result["newly_fixed"] += 1
+        was_open, is_open = (old_state or "").lower() == "open", (state or "").lower() == "open"
+        if was_open and not is_open:
+            notes.append("🔴 closed")
+            result["closed"] += 1
+        elif is_open and not was_open:
+            notes.append("🔵 reopened")
+            result["reopened"] += 1
+        if notes:
+            result["changes"].append((row, notes))
+        i += 1
+        j += 1
+    return result
+
+
+def load_user_config(base):
+    """Compiled config for the triage root; exits if config/local.yaml has no user.login."""
+    config = load_config(base)
+    if not config.user_login:
+        print("Error: config/local.yaml must set user.login (used to filter open PRs)", file=sys.stderr)
         sys.exit(1)
+    return config
 
-    full_repo = sys.argv[1]          # e.g., "dotnet/diagnostics"
-    base = sys.argv[2]               # e.g., "D:\work"
-    reports_path = sys.argv[3]       # path to reports JSON
-    prs_path = sys.argv[4]           # path to PRs JSON
 
+def build_summary(full_repo, base, rows, prs, config, today, inst=None):
+    """Write one repo's dated summary, snapshot and latest.md; returns its stats for the index."""
+    inst = inst or Instrumentation("generate-summary")
+    # full_repo: e.g., "dotnet/diagnostics"; base: e.g., "D:\work"
     owner, repo_name = full_repo.split("/")
     repo_key = f"{owner}-{repo_name}"
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-
-    # Load data
-    with open(reports_path, "r", encoding="utf-8") as f:
-        reports = json.load(f)
-    with open(prs_path, "r", encoding="utf-8") as f:
-        prs = json.load(f)
-
-    # Load area config from repos.yaml
-    config_path = os.path.join(base, "config", "repos.yaml")
-    with open(config_path, "r", encoding="utf-8") as f:
-        config = parse_yaml(f.read())
-    areas_config = config.get(full_repo, {}).get("areas", {})
-
-    # Load user config for PR author filtering
-    local_config_path = os.path.join(base, "config", "local.yaml")
-    with open(local_config_path, "r", encoding="utf-8") as f:
-        local_config = parse_yaml(f.read())
-    username = local_config["user"]["login"].lower()
+    username = config.user_login
 
     # Build PR -> issue map (only include PRs from the configured user)
+    inst.start("previous")
     prs = [pr for pr in prs if pr.get("author", "").lower() == username]
     issue_to_prs = {}
     for pr in prs:
         for iss in pr.get("linked_issues", []):
             issue_to_prs.setdefault(iss, []).append(pr["number"])
 
-    # Load previous summary issue numbers for diff
+    # Load the previous summary's snapshot (or, for older summaries, its issue numbers) for the diff
     summary_dir = os.path.join(base, "summaries", repo_key)
-    prev_issues = set()
-    prev_files = sorted(
-        [f for f in os.listdir(summary_dir) if re.match(r"\d{4}-\d{2}-\d{2}\.md$", f)]
-    ) if os.path.isdir(summary_dir) else []
-    if prev_files:
-        prev_path = os.path.join(summary_dir, prev_files[-1])
-        with open(prev_path, "r", encoding="utf-8") as f:
-            prev_content = f.read()
-        for m in re.finditer(
-            rf"\[#(\d+)\]\(https://github\.com/{re.escape(owner)}/{re.escape(repo_name)}/issues/\d+\)",
-            prev_content,
-        ):
-            prev_issues.add(int(m.group(1)))
+    previous = load_previous_summary(summary_dir, owner, repo_name)
 
     # Helpers
     CLOSE_STATUSES = {"already-fixed", "already-implemented", "by-design", "stale", "wont-fix", "duplicate"}
@@ -110,63 +262,22 @@ def main():
         return "🔵 Open" if state and state.lower() == "open" else "🔴 Closed"
 
     class IssueRow:
-        def __init__(self, r):
-            d = r["data"]
-            gh = r.get("github") or {}
-            self.number = r["number"]
-            self.has_analysis_md = r.get("has_analysis_md", r.get("has_report_md", False))
-
-            # Get issue data from github.json if available, fall back to analysis.json legacy fields
-            gh_issue = (gh.get("issue", {}).get("data") or {}) if gh else {}
-            triage = d.get("triage", {})
-            fix = d.get("fix", {})
-
-            if gh_issue:
-                self.title = gh_issue.get("title", "")
-                self.state = gh_issue.get("state", "open")
-                self.url = gh_issue.get("html_url", gh_issue.get("url", f"https://github.com/{owner}/{repo_name}/issues/{self.number}"))
-                self.labels = gh_issue.get("labels", [])
-                self.assignees = [a.get("login", a) if isinstance(a, dict) else a for a in gh_issue.get("assignees", [])]
-            else:
-                # Legacy: issue data was in analysis.json (pre-migration)
-                issue = d.get("issue", {})
-                if issue:
-                    self.title = issue.get("title", "")
-                    self.state = issue.get("state", "open")
-                    self.url = issue.get("url", f"https://github.com/{owner}/{repo_name}/issues/{self.number}")
-                    self.labels = issue.get("labels", [])
-                    self.assignees = issue.get("assignees", [])
-                else:
-                    self.title = d.get("title", "")
-                    self.state = d.get("state", "open")
-                    self.url = d.get("url", f"https://github.com/{owner}/{repo_name}/issues/{self.number}")
-                    self.labels = d.get("labels", [])
-                    assignee = d.get("assignee", "")
-                    self.assignees = d.get("assignees", [assignee] if assignee else [])
-
-            # manually_investigated moved to triage in new schema
-            self.manually_investigated = triage.get("manually_investigated", d.get("issue", {}).get("manually_investigated", False))
-
-            if triage:
-                self.category = triage.get("category", "")
-                self.status = triage.get("status", "")
-                self.status_reason = triage.get("status_reason", "")
-                self.affected_repo = triage.get("affected_repo", "")
-                self.actionability = triage.get("actionability", "low")
-                self.blocked_reason = triage.get("blocked_reason", "")
-            else:
-                self.category = d.get("category", "")
-                self.status = d.get("status", "")
-                self.status_reason = d.get("status_reason", d.get("summary", ""))
-                self.affected_repo = d.get("affected_repo", "")
-                self.actionability = d.get("actionability", d.get("priority", "low"))
-                self.blocked_reason = d.get("blocked_reason", "")
-
-            if fix:
-                self.has_fix = fix.get("has_candidate", False)
-            else:
-                self.has_fix = bool(d.get("fix_branch") or d.get("fix_available")
-                                    or d.get("status", "") in ("fix-candidate", "fix-identified"))
+        def __init__(self, row):
+            self.number = row["number"]
+            self.has_analysis_md = row["has_analysis_md"]
+            self.title = row["title"]
+            self.state = row["state"]
+            self.url = row["url"] or f"https://github.com/{owner}/{repo_name}/issues/{self.number}"
+            self.labels = row["labels"]
+            self.assignees = row["assignees"]
+            self.manually_investigated = row["manually_investigated"]
+            self.category = row["category"]
+            self.status = row["status"]
+            self.status_reason = row["status_reason"]
+            self.affected_repo = row["affected_repo"]
+            self.actionability = row["actionability"]
+            self.blocked_reason = row["blocked_reason"]
+            self.has_fix = row["has_fix"]
             self.prs = issue_to_prs.get(self.number, [])
 
         def report_link(self):
@@ -214,7 +325,8 @@ def main():
             )
 
     # Classify
-    all_issues = [IssueRow(r) for r in reports]
+    inst.start("classify")
+    all_issues = [IssueRow(r) for r in rows]
     should_close = [i for i in all_issues if i.status in CLOSE_STATUSES]
     should_close_open = [i for i in should_close if i.state.lower() == "open"]
     should_close_closed = [i for i in should_close if i.state.lower() != "open"]
@@ -223,26 +335,12 @@ def main():
     excluded = set(i.number for i in should_close) | set(i.number for i in blocked) | set(i.number for i in docs)
     area_issues = [i for i in all_issues if i.number not in excluded]
 
-    def classify_area(issue):
-        issue_labels = [l.lower() if isinstance(l, str) else l.get("name", "").lower() for l in issue.labels]
-        for area_name, area_def in areas_config.items():
-            for label in area_def.get("labels", []):
-                if label.lower() in issue_labels:
-                    return area_name
-        for area_name, area_def in areas_config.items():
-            match_repo = area_def.get("match_affected_repo", "")
-            if match_repo and issue.affected_repo and match_repo.lower() in issue.affected_repo.lower():
-                return area_name
-        title_lower = issue.title.lower()
-        for area_name, area_def in areas_config.items():
-            for kw in area_def.get("title_keywords", []):
-                if kw.lower() in title_lower:
-                    return area_name
-        return "Other / General"
+    classifier = config.classifier(full_repo)
 
     area_groups = {}
     for issue in area_issues:
-        area_groups.setdefault(classify_area(issue), []).append(issue)
+        area = classifier.classify(issue.labels, issue.affected_repo, issue.title)
+        area_groups.setdefault(area, []).append(issue)
     sorted_areas = sorted(area_groups.items(), key=lambda x: -len(x[1]))
 
     # Stats
@@ -252,112 +350,283 @@ def main():
     fix_count = sum(1 for i in all_issues if i.has_fix)
     manual_count = sum(1 for i in all_issues if i.manually_investigated)
 
-    current_numbers = set(i.number for i in all_issues)
-    new_issues = current_numbers - prev_issues
-
-    # Build markdown
+    # Snapshot for the next run's diff: the section each issue is listed in, sorted by number
+    section_of = {i.number: "Should Be Closed" for i in should_close}
+    section_of.update((i.number, "Blocked") for i in blocked)
+    section_of.update((i.number, "Documentation") for i in docs)
+    for area_name, issues in area_groups.items():
+        section_of.update((i.number, area_name) for i in issues)
+    by_number = {i.number: i for i in all_issues}
+    snapshot = [[n, by_number[n].status, bool(by_number[n].has_fix), by_number[n].state, section_of[n]]
+                for n in sorted(by_number)]
+
+    # Build markdown, streamed section by section into a temp file next to the dated summary
     TABLE_HEADER = "| Issue | GitHub | Title | State | Act | Assignees | Open PR | Fix | 🔍 | Status | Summary |"
     TABLE_SEP = "|-------|--------|-------|-------|-----|-----------|---------|-----|-----|--------|---------|"
     BLOCKED_HEADER = "| Issue | GitHub | Title | State | Act | Assignees | Blocked On | Summary |"
     BLOCKED_SEP = "|-------|--------|-------|-------|-----|-----------|------------|---------|"
 
+    inst.start("render")
+    new_count = None
+    os.makedirs(summary_dir, exist_ok=True)
+    out_path = os.path.join(summary_dir, f"{today}.md")
+    latest_path = os.path.join(summary_dir, "latest.md")
+    tmp_path = f"{out_path}.tmp"
+
+    with open(tmp_path, "w", encoding="utf-8", buffering=1 << 16) as f:
+        out = LineWriter(f)
+        out.add(
+            f"# {full_repo} Issues Summary",
+            "",
+            f"*Generated: {today}*",
+            "",
+            "## Overview",
+            "",
+            "| Metric | Count |",
+            "|--------|-------|",
+            f"| Total Issues Analyzed | {total} |",
+            f"| 🔵 Open | {open_count} |",
+            f"| 🔴 Closed | {closed_count} |",
+            f"| ✅ Have Fix Candidate | {fix_count} |",
+            f"| 🔍 Manually Investigated | {manual_count} |",
+            f"| Should Be Closed | {len(should_close_open)} open ({len(should_close_closed)} already closed) |",
+            f"| Blocked | {len(blocked)} |",
+            f"| Documentation Issues | {len(docs)} |",
+            "",
+        )
+
+        # Changes since last summary
+        if previous is not None and previous[2]:
+            prev_date, prev_rows, prev_numbers = previous
+            out.add("## Changes Since Last Summary", "", f"*Compared with {prev_date}*", "")
+            if prev_rows is not None:
+                changes = diff_snapshots(prev_rows, snapshot)
+                new_count = len(changes["new"])
+                new_fix_count = sum(1 for r in changes["new"] if r[2]) + changes["newly_fixed"]
+                out.add(
+                    f"- {len(changes['new'])} new issues triaged",
+                    f"- {new_fix_count} new fix candidates",
+                    f"- {changes['status_changes']} status changes",
+                    f"- {changes['closed']} closed on GitHub",
+                )
+                if changes["reopened"]:
+                    out.add(f"- {changes['reopened']} reopened")
+                if changes["removed"]:
+                    out.add(f"- {len(changes['removed'])} no longer tracked")
+                out.add("")
+                if changes["changes"]:
+                    out.add("| Issue | Title | Change |", "|-------|-------|--------|")
+                    for row, notes in changes["changes"]:
+                        i = by_number[row[0]]
+                        out.add(f"| {i.github_link()} | {escape_md(i.title)} | {'; '.join(notes)} |")
+                    out.add("")
+            else:
+                new_issues = set(by_number) - prev_numbers
+                new_count = len(new_issues)
+                new_fix_count = sum(1 for n in new_issues if by_number[n].has_fix)
+                out.add(
+                    f"- {len(new_issues)} new issues triaged",
+                    f"- {new_fix_count} new fix candidates",
+                    "",
+                )
+
+        # Open PRs
+        out.add("## Open Pull Requests", "")
+        if prs:
+            out.add("| PR | Author | Title | Linked Issues |", "|----|--------|-------|---------------|")
+            for pr in prs:
+                linked = ", ".join(f'[#{n}](https://github.com/{owner}/{repo_name}/issues/{n})' for n in pr.get("linked_issues", []))
+                out.add(f"| [#{pr['number']}]({pr['url']}) | {pr['author']} | {escape_md(pr['title'])} | {linked} |")
+            out.add("")
+        else:
+            out.add("No open pull requests.", "")
+
+        # Areas
+        for area_name, issues in sorted_areas:
+            out.add(f"## {area_name} ({len(issues)} issues)", "", TABLE_HEADER, TABLE_SEP)
+            for i in sorted(issues, key=lambda x: x.number):
+                out.add(i.to_row())
+            out.add("")
+
+        # Docs
+        out.add(f"## Documentation Issues ({len(docs)} issues)", "")
+        if docs:
+            out.add(TABLE_HEADER, TABLE_SEP)
+            for i in sorted(docs, key=lambda x: x.number):
+                out.add(i.to_row())
+            out.add("")
+        else:
+            out.add("No documentation issues.", "")
+
+        # Blocked (near the end)
+        out.add(f"## Blocked Issues ({len(blocked)} issues)", "")
+        if blocked:
+            out.add(BLOCKED_HEADER, BLOCKED_SEP)
+            for i in sorted(blocked, key=lambda x: x.number):
+                out.add(i.to_blocked_row())
+            out.add("")
+        else:
+            out.add("No blocked issues.", "")
+
+        # Should Be Closed (at the end)
+        out.add(f"## Issues That Should Be Closed ({len(should_close_open)} issues open, {len(should_close_closed)} already closed)", "")
+        if should_close_open:
+            out.add(TABLE_HEADER, TABLE_SEP)
+            for i in sorted(should_close_open, key=lambda x: x.number):
+                out.add(i.to_row())
+            out.add("")
+        else:
+            out.add("No open issues that should be closed.", "")
+
+    inst.start("publish")
+    # Publish: both renames are atomic, so readers never see a partially written file
+    os.replace(tmp_path, out_path)
+    publish_latest(out_path, latest_path)
+    snapshot_path = os.path.join(summary_dir, f"{today}.snapshot.json")
+    write_snapshot(snapshot_path, snapshot)
+
+    return {
+        "repo": full_repo, "summary": out_path, "latest": latest_path, "snapshot": snapshot_path,
+        "issues": total, "lines": out.count, "open": open_count, "fix_candidates": fix_count,
+        "should_close_open": len(should_close_open), "blocked": len(blocked), "new": new_count,
+    }
+
+
+def configured_repos(config, base):
+    """owner/repo keys from repos.yaml that have an issues/<owner>-<repo>/ directory, in config order."""
+    return [key for key in config.repo_keys
+            if os.path.isdir(os.path.join(base, "issues", key.replace("/", "-", 1)))]
+
+
+def summarize_repo(job):
+    """Process-pool worker for --all: scan one repo and build its summary."""
+    full_repo, base, prs_dir, config, today = job
+    try:
+        rows = load_rows(base, full_repo.replace("/", "-", 1))
+        prs = []
+        prs_path = os.path.join(prs_dir, f"{full_repo.replace('/', '-', 1)}.json") if prs_dir else None
+        if prs_path and os.path.isfile(prs_path):
+            with open(prs_path, "r", encoding="utf-8") as f:
+                prs = json.load(f)
+        return build_summary(full_repo, base, rows, prs, config, today)
+    except Exception as e:  # reported per repo; the other dashboards still get written
+        return {"repo": full_repo, "error": f"{type(e).__name__}: {e}"}
+
+
+def write_index(base, results, today):
+    """Cross-repo summaries/index.md linking each repo's latest.md; returns its path."""
+    path = os.path.join(base, "summaries", "index.md")
+    ok = [r for r in results if "error" not in r]
     lines = [
-        f"# {full_repo} Issues Summary",
+        "# Triage Dashboards",
         "",
         f"*Generated: {today}*",
         "",
-        "## Overview",
-        "",
-        "| Metric | Count |",
-        "|--------|-------|",
-        f"| Total Issues Analyzed | {total} |",
-        f"| 🔵 Open | {open_count} |",
-        f"| 🔴 Closed | {closed_count} |",
-        f"| ✅ Have Fix Candidate | {fix_count} |",
-        f"| 🔍 Manually Investigated | {manual_count} |",
-        f"| Should Be Closed | {len(should_close_open)} open ({len(should_close_closed)} already closed) |",
-        f"| Blocked | {len(blocked)} |",
-        f"| Documentation Issues | {len(docs)} |",
-        "",
+        "| Repo | Issues | 🔵 Open | ✅ Fix Candidates | Should Be Closed | Blocked | New | Summary |",
+        "|------|--------|---------|------------------|------------------|---------|-----|---------|",
     ]
+    for r in ok:
+        link = os.path.relpath(r["latest"], os.path.dirname(path)).replace(os.sep, "/")
+        new = "" if r["new"] is None else r["new"]
+        lines.append(f"| {r['repo']} | {r['issues']} | {r['open']} | {r['fix_candidates']} "
+                     f"| {r['should_close_open']} | {r['blocked']} | {new} | [latest]({link}) |")
+    totals = {k: sum(r[k] for r in ok) for k in ("issues", "open", "fix_candidates", "should_close_open", "blocked")}
+    lines.append(f"| **Total** | {totals['issues']} | {totals['open']} | {totals['fix_candidates']} "
+                 f"| {totals['should_close_open']} | {totals['blocked']} | | |")
+    failed = [r for r in results if "error" in r]
+    if failed:
+        lines += ["", "## Failed", ""] + [f"- {r['repo']}: {r['error']}" for r in failed]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def main_all(args, inst):
+    """--all <triage_root> [--prs-dir <dir>] [--jobs N]: every configured repo, then the index."""
+    base, prs_dir, jobs = None, None, None
+    it = iter(args)
+    for arg in it:
+        if arg == "--prs-dir":
+            prs_dir = next(it, None)
+        elif arg == "--jobs":
+            jobs = int(next(it, "0")) or None
+        elif base is None:
+            base = arg
+        else:
+            base = None
+            break
+    if base is None:
+        print(f"Usage: {sys.argv[0]} --all <triage_root> [--prs-dir <dir>] [--jobs N]")
+        sys.exit(1)
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
-    # Changes since last summary
-    if prev_issues:
-        new_fix_count = sum(1 for i in all_issues if i.number in new_issues and i.has_fix)
-        lines += [
-            "## Changes Since Last Summary",
-            "",
-            f"- {len(new_issues)} new issues triaged",
-            f"- {new_fix_count} new fix candidates",
-            "",
-        ]
-
-    # Open PRs
-    lines += ["## Open Pull Requests", ""]
-    if prs:
-        lines += ["| PR | Author | Title | Linked Issues |", "|----|--------|-------|---------------|"]
-        for pr in prs:
-            linked = ", ".join(f'[#{n}](https://github.com/{owner}/{repo_name}/issues/{n})' for n in pr.get("linked_issues", []))
-            lines.append(f"| [#{pr['number']}]({pr['url']}) | {pr['author']} | {escape_md(pr['title'])} | {linked} |")
-        lines.append("")
-    else:
-        lines += ["No open pull requests.", ""]
-
-    # Areas
-    for area_name, issues in sorted_areas:
-        lines += [f"## {area_name} ({len(issues)} issues)", "", TABLE_HEADER, TABLE_SEP]
-        for i in sorted(issues, key=lambda x: x.number):
-            lines.append(i.to_row())
-        lines.append("")
-
-    # Docs
-    lines.append(f"## Documentation Issues ({len(docs)} issues)")
-    lines.append("")
-    if docs:
-        lines += [TABLE_HEADER, TABLE_SEP]
-        for i in sorted(docs, key=lambda x: x.number):
-            lines.append(i.to_row())
-        lines.append("")
+    inst.start("config")
+    config = load_user_config(base)
+    repos = configured_repos(config, base)
+    if not repos:
+        print("No configured repos with triaged issues.")
+        return
+
+    inst.start("repos")
+    job_args = [(repo, base, prs_dir, config, today) for repo in repos]
+    workers = min(jobs or os.cpu_count() or 1, len(repos))
+    if workers == 1:
+        results = [summarize_repo(job) for job in job_args]
     else:
-        lines += ["No documentation issues.", ""]
-
-    # Blocked (near the end)
-    lines.append(f"## Blocked Issues ({len(blocked)} issues)")
-    lines.append("")
-    if blocked:
-        lines += [BLOCKED_HEADER, BLOCKED_SEP]
-        for i in sorted(blocked, key=lambda x: x.number):
-            lines.append(i.to_blocked_row())
-        lines.append("")
-    else:
-        lines += ["No blocked issues.", ""]
-
-    # Should Be Closed (at the end)
-    lines.append(f"## Issues That Should Be Closed ({len(should_close_open)} issues open, {len(should_close_closed)} already closed)")
-    lines.append("")
-    if should_close_open:
-        lines += [TABLE_HEADER, TABLE_SEP]
-        for i in sorted(should_close_open, key=lambda x: x.number):
-            lines.append(i.to_row())
-        lines.append("")
-    else:
-        lines += ["No open issues that should be closed.", ""]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(summarize_repo, job_args))
+
+    inst.start("index")
+    index_path = write_index(base, results, today)
+    for r in results:
+        if "error" in r:
+            print(f"Error: {r['repo']}: {r['error']}", file=sys.stderr)
+        else:
+            print(f"Written to {r['summary']} ({r['issues']} issues, {r['lines']} lines)")
+    print(f"Written to {index_path}")
+    if any("error" in r for r in results):
+        sys.exit(1)
 
-    # Write
-    os.makedirs(summary_dir, exist_ok=True)
-    content = "\n".join(lines)
-    out_path = os.path.join(summary_dir, f"{today}.md")
-    latest_path = os.path.join(summary_dir, "latest.md")
 
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(content)
-    with open(latest_path, "w", encoding="utf-8") as f:
-        f.write(content)
+def main():
+    inst, args = from_argv("generate-summary", sys.argv[1:])
+    if args and args[0] == "--all":
+        main_all(args[1:], inst)
+        return
+    if len(args) == 4 and args[1] == "--scan":
+        full_repo, _, base, prs_path = args
+        reports_path = None
+    elif len(args) == 4 and "--scan" not in args:
+        full_repo, base, reports_path, prs_path = args
+    else:
+        print(f"Usage: {sys.argv[0]} <owner/repo> --scan <triage_root> <prs_json>")
+        print(f"       {sys.argv[0]} <owner/repo> <triage_root> <reports_json> <prs_json>")
+        print(f"       {sys.argv[0]} --all <triage_root> [--prs-dir <dir>] [--jobs N]")
+        sys.exit(1)
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    # Load data
+    inst.start("reports")
+    if reports_path:
+        with open(reports_path, "r", encoding="utf-8") as f:
+            rows = [normalize_report(r) for r in json.load(f)]
+    else:
+        rows = load_rows(base, full_repo.replace("/", "-", 1))
+    with open(prs_path, "r", encoding="utf-8") as f:
+        prs = json.load(f)
 
-    print(f"Written to {out_path}")
-    print(f"Written to {latest_path}")
-    print(f"{total} issues, {len(lines)} lines")
+    # Load repos.yaml + local.yaml (from the compiled cache when unchanged)
+    inst.start("config")
+    config = load_user_config(base)
 
+    result = build_summary(full_repo, base, rows, prs, config, today, inst)
+    print(f"Written to {result['summary']}")
+    print(f"Written to {result['latest']}")
+    print(f"Written to {result['snapshot']}")
+    print(f"{result['issues']} issues, {result['lines']} lines")
 
 if __name__ == "__main__":
     main()
@@ -2,29 +2,64 @@
 """Detect dump files (Windows minidump, ELF core, Mach-O core) by inspecting file headers.
 
 Usage:
-    python detect_dumps.py <path> [<path> ...]
+    python detect_dumps.py [--metadata] [--timings] [--profile <file>] <path> [<path> ...]
 
 Accepts files or directories. For directories, searches recursively.
 Outputs a JSON array of absolute paths to detected dump files.
+
+With --metadata, outputs one object per dump instead, with the format, size, architecture,
+process id/name, thread count, crashing thread, loaded modules and .NET runtime version
+(see dump_metadata.py). Dumps are memory-mapped and only their headers/notes are read.
+
+Each file is opened once and classified from a single 20-byte header read. Directories are
+walked with os.scandir, and both the walk and the header reads are spread over a thread
+pool, so large trees (e.g. CI artifact shares) are bound by I/O rather than per-file overhead.
+
+--timings prints per-phase wall time, files opened, bytes read and peak memory (scan, metadata,
+output) as one JSON line on stderr; --profile <file> writes cProfile stats. See
+benchmark/scripts/instrumentation.py. Without the benchmark skill installed, neither flag is
+available and the script runs uninstrumented.
 """
 
 import json
 import os
 import struct
 import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from dump_metadata import describe_dump
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'benchmark', 'scripts'))
+try:
+    from instrumentation import from_argv
+except ImportError:  # the benchmark skill isn't installed: run without --timings / --profile
+    class Instrumentation:
+        def __init__(self, script, *args, **kwargs):
+            pass
 
+        def start(self, name):
+            pass
 
-def is_minidump(path: str) -> bool:
+        def stop(self):
+            pass
+
+    def from_argv(script, argv):
+        return Instrumentation(script), argv
+
+# Bytes read from each file: enough for the ELF e_type field at offset 16.
+HEADER_SIZE = 20
+# Smallest file that can match any format (the 4-byte minidump magic).
+MIN_HEADER_SIZE = 4
+# Files classified per thread-pool task.
+CHUNK_SIZE = 256
+
+
+def is_minidump_header(header: bytes) -> bool:
     """Check for Windows minidump: magic bytes 'MDMP' at offset 0."""
-    try:
-        with open(path, "rb") as f:
-            magic = f.read(4)
-            return magic == b"MDMP"
-    except (OSError, IOError):
-        return False
+    return header[:4] == b"MDMP"
 
 
-def is_elf_core(path: str) -> bool:
+def is_elf_core_header(header: bytes) -> bool:
     """Check for ELF core: ELF magic + e_type == ET_CORE (4).
 
     ELF header:
@@ -34,26 +69,21 @@ def is_elf_core(path: str) -> bool:
     e_type is at offset 16 for both 32-bit and 64-bit ELF.
     Endianness is at EI_DATA (offset 5): 1=little, 2=big.
     """
-    try:
-        with open(path, "rb") as f:
-            header = f.read(20)
-            if len(header) < 20:
-                return False
-            if header[:4] != b"\x7fELF":
-                return False
-            ei_data = header[5]
-            if ei_data == 1:
-                e_type = struct.unpack_from("<H", header, 16)[0]
-            elif ei_data == 2:
-                e_type = struct.unpack_from(">H", header, 16)[0]
-            else:
-                return False
-            return e_type == 4  # ET_CORE
-    except (OSError, IOError):
+    if len(header) < 20:
+        return False
+    if header[:4] != b"\x7fELF":
         return False
+    ei_data = header[5]
+    if ei_data == 1:
+        e_type = struct.unpack_from("<H", header, 16)[0]
+    elif ei_data == 2:
+        e_type = struct.unpack_from(">H", header, 16)[0]
+    else:
+        return False
+    return e_type == 4  # ET_CORE
 
 
-def is_macho_core(path: str) -> bool:
+def is_macho_core_header(header: bytes) -> bool:
     """Check for Mach-O core dump.
 
     Mach-O header:
@@ -66,59 +96,124 @@ def is_macho_core(path: str) -> bool:
 
     Fat/universal binaries (0xCAFEBABE / 0xBEBAFECA) are not core dumps.
     """
-    try:
-        with open(path, "rb") as f:
-            header = f.read(16)
-            if len(header) < 16:
-                return False
+    if len(header) < 16:
+        return False
+
+    magic = struct.unpack_from("<I", header, 0)[0]
 
-            magic = struct.unpack_from("<I", header, 0)[0]
+    MH_MAGIC = 0xFEEDFACE
+    MH_CIGAM = 0xCEFAEDFE
+    MH_MAGIC_64 = 0xFEEDFACF
+    MH_CIGAM_64 = 0xCFFAEDFE
+
+    if magic in (MH_MAGIC, MH_MAGIC_64):
+        filetype = struct.unpack_from("<I", header, 12)[0]
+    elif magic in (MH_CIGAM, MH_CIGAM_64):
+        filetype = struct.unpack_from(">I", header, 12)[0]
+    else:
+        return False
 
-            MH_MAGIC = 0xFEEDFACE
-            MH_CIGAM = 0xCEFAEDFE
-            MH_MAGIC_64 = 0xFEEDFACF
-            MH_CIGAM_64 = 0xCFFAEDFE
+    return filetype == 4  # MH_CORE
 
-            if magic in (MH_MAGIC, MH_MAGIC_64):
-                filetype = struct.unpack_from("<I", header, 12)[0]
-            elif magic in (MH_CIGAM, MH_CIGAM_64):
-                filetype = struct.unpack_from(">I", header, 12)[0]
-            else:
-                return False
 
-            return filetype == 4  # MH_CORE
+def classify_header(header: bytes) -> str | None:
+    """Return "minidump", "elf-core" or "macho-core" for a file header, or None."""
+    if is_minidump_header(header):
+        return "minidump"
+    if is_elf_core_header(header):
+        return "elf-core"
+    if is_macho_core_header(header):
+        return "macho-core"
+    return None
+
+
+def read_header(path: str) -> bytes:
+    """Read the first HEADER_SIZE bytes of a file (empty on error)."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(HEADER_SIZE)
     except (OSError, IOError):
-        return False
+        return b""
+
+
+def dump_kind(path: str) -> str | None:
+    """Classify a file by its header; None if it isn't a dump."""
+    return classify_header(read_header(path))
 
 
 def is_dump_file(path: str) -> bool:
-    return is_minidump(path) or is_elf_core(path) or is_macho_core(path)
+    return dump_kind(path) is not None
 
 
-def find_dumps(path: str) -> list[str]:
-    """Find dump files at the given path (file or directory)."""
-    results = []
+def _scan_dir(path: str) -> tuple[list[str], list[str]]:
+    """List one directory: (files large enough to be dumps, subdirectories).
+
+    Uses the stat data from scandir to skip files smaller than MIN_HEADER_SIZE without
+    opening them. Symlinked directories are not followed (same as os.walk).
+    """
+    files, subdirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file() and entry.stat().st_size >= MIN_HEADER_SIZE:
+                        files.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, subdirs
+
+
+def _classify_chunk(paths: list[str]) -> list[str]:
+    return [p for p in paths if is_dump_file(p)]
+
+
+def find_dumps(path: str, max_workers: int | None = None) -> list[str]:
+    """Find dump files at the given path (file or directory), sorted by path."""
     path = os.path.abspath(path)
 
     if os.path.isfile(path):
-        if is_dump_file(path):
-            results.append(path)
-    elif os.path.isdir(path):
-        for root, _dirs, files in os.walk(path):
-            for name in sorted(files):
-                fpath = os.path.join(root, name)
-                if is_dump_file(fpath):
-                    results.append(fpath)
+        return [path] if is_dump_file(path) else []
+    if not os.path.isdir(path):
+        return []
+
+    results = []
+    workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Directory listings and header-classification chunks share one pool; each finished
+        # listing schedules its subdirectories and its files (in chunks) as new tasks.
+        pending = {pool.submit(_scan_dir, path): "dir"}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                kind = pending.pop(fut)
+                if kind == "files":
+                    results.extend(fut.result())
+                    continue
+                files, subdirs = fut.result()
+                for d in subdirs:
+                    pending[pool.submit(_scan_dir, d)] = "dir"
+                for i in range(0, len(files), CHUNK_SIZE):
+                    pending[pool.submit(_classify_chunk, files[i:i + CHUNK_SIZE])] = "files"
+    results.sort()
     return results
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: detect_dumps.py <path> [<path> ...]", file=sys.stderr)
+    inst, args = from_argv("detect_dumps", sys.argv[1:])
+    metadata = "--metadata" in args
+    if metadata:
+        args.remove("--metadata")
+    if not args:
+        print("Usage: detect_dumps.py [--metadata] [--timings] [--profile <file>] <path> [<path> ...]", file=sys.stderr)
         sys.exit(1)
 
+    inst.start("scan")
     all_dumps = []
-    for arg in sys.argv[1:]:
+    for arg in args:
         if not os.path.exists(arg):
             print(f"Warning: path does not exist: {arg}", file=sys.stderr)
             continue
@@ -132,7 +227,15 @@ def main():
             seen.add(p)
             unique.append(p)
 
-    print(json.dumps(unique, indent=2))
+    if metadata:
+        inst.start("metadata")
+        with ThreadPoolExecutor(max_workers=min(8, len(unique) or 1)) as pool:
+            described = list(pool.map(lambda p: describe_dump(p, dump_kind(p)), unique))
+        inst.start("output")
+        print(json.dumps(described, indent=2))
+    else:
+        inst.start("output")
+        print(json.dumps(unique, indent=2))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+"""Sparse-aware content hashing and verified copies for dump_store.py.
+
+ELF cores are mostly holes and minidumps run to many GB, so hashing and copying read and write
+only the data regions of a file, and their cost follows the data rather than the apparent size:
+
+- The data regions come from lseek(SEEK_DATA / SEEK_HOLE). Where the OS or filesystem doesn't
+  report them, the whole file is treated as data.
+- The file is processed in BLOCK_SIZE blocks. A block that is all hole, or whose data is all
+  zeros, is neither written nor hashed byte by byte, so it stays (or becomes) a hole in a copy.
+- A copy is first tried as a reflink clone (Linux FICLONE: btrfs, XFS, bcachefs, ...), which
+  shares the source's extents and writes no data at all.
+- Otherwise each data range of a non-zero block is copied in the kernel with copy_file_range(),
+  falling back to sendfile() and then to writing the buffer already read for the hash, as each
+  one turns out not to work between the two files.
+- The destination is truncated to the source's size, which recreates a trailing hole.
+
+The content hash is the SHA-256 of the concatenated SHA-256 digests of each BLOCK_SIZE block
+(the last one may be shorter), the scheme Dropbox uses for its content_hash. Unlike a plain
+SHA-256 of the whole file, a zero block's digest is a constant, so a 64 GiB core with 200 MiB of
+data hashes in the time it takes to read 200 MiB.
+"""
+
+import errno
+import functools
+import hashlib
+import os
+import shutil
+import sys
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+BLOCK_SIZE = 4 * 1024 * 1024
+# ioctl(dest_fd, FICLONE, src_fd) from <linux/fs.h>.
+FICLONE = 0x40049409
+
+_ZEROS = memoryview(bytes(BLOCK_SIZE))
+# errnos that mean "this copy mechanism doesn't work for these two files", not a real I/O error.
+_UNSUPPORTED = {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF,
+                errno.ENOTTY, errno.ENOTSOCK, errno.EPERM}
+
+
+@functools.lru_cache(maxsize=None)
+def _zero_digest(n: int) -> bytes:
+    return hashlib.sha256(_ZEROS[:n]).digest()
+
+
+def data_segments(fd: int, size: int) -> list[tuple[int, int]]:
+    """(start, end) byte ranges of fd that hold data; [(0, size)] if holes can't be found."""
+    seek_data, seek_hole = getattr(os, "SEEK_DATA", None), getattr(os, "SEEK_HOLE", None)
+    if seek_data is None or size == 0:
+        return [(0, size)] if size else []
+    segments, offset = [], 0
+    try:
+        while offset < size:
+            try:
+                start = os.lseek(fd, offset, seek_data)
+            except OSError as e:
+                if e.errno == errno.ENXIO:  # only a hole from offset to the end
+                    break
+                raise
+            end = min(os.lseek(fd, start, seek_hole), size)
+            segments.append((start, end))
+            offset = end
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED:
+            raise
+        return [(0, size)]
+    finally:
+        os.lseek(fd, 0, os.SEEK_SET)
+    return segments
+
+
+def _read_exactly(f, view: memoryview, offset: int) -> None:
+    f.seek(offset)
+    done = 0
+    while done < len(view):
+        n = f.readinto(view[done:])
+        if not n:
+            raise OSError(errno.EIO, "file shrank while being read")
+        done += n
+
+
+def _blocks(f, size: int, buf: bytearray):
+    """Yield (offset, data ranges, digest) per block; the block's bytes are in buf when it has ranges.
+
+    Holes within a block read as zeros. A block without data, or whose data is all zeros, has
+    no ranges.
+    """
+    view = memoryview(buf)
+    segments = data_segments(f.fileno(), size)
+    first = 0
+    for offset in range(0, size, BLOCK_SIZE):
+        end = min(offset + BLOCK_SIZE, size)
+        n = end - offset
+        while first < len(segments) and segments[first][1] <= offset:
+            first += 1
+        ranges = []
+        for start, stop in segments[first:]:
+            if start >= end:
+                break
+            ranges.append((max(start, offset), min(stop, end)))
+        if not ranges:
+            yield offset, ranges, _zero_digest(n)
+            continue
+        pos = offset
+        for start, stop in ranges:
+            if start > pos:
+                view[pos - offset:start - offset] = _ZEROS[:start - pos]
+            _read_exactly(f, view[start - offset:stop - offset], start)
+            pos = stop
+        if end > pos:
+            view[pos - offset:n] = _ZEROS[:end - pos]
+        if buf.startswith(_ZEROS[:n]):
+            yield offset, [], _zero_digest(n)
+        else:
+            yield offset, ranges, hashlib.sha256(view[:n]).digest()
+
+
+def content_hash(path: str) -> str:
+    """The file's content hash (see the module docstring), reading only its data regions."""
+    h = hashlib.sha256()
+    buf = bytearray(BLOCK_SIZE)
+    with open(path, "rb", buffering=0) as f:
+        for _offset, _ranges, digest in _blocks(f, os.fstat(f.fileno()).st_size, buf):
+            h.update(digest)
+    return h.hexdigest()
+
+
+def _reflink(src_fd: int, dst_fd: int) -> bool:
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except OSError as e:
+        if e.errno in _UNSUPPORTED:
+            return False
+        raise
+
+
+def _copy_range(method: str, src_fd: int, dst_fd: int, offset: int, count: int) -> None:
+    """Copy count bytes at offset from src_fd to the same offset in dst_fd, in the kernel."""
+    done = 0
+    while done < count:
+        if method == "copy_file_range":
+            n = os.copy_file_range(src_fd, dst_fd, count - done, offset + done, offset + done)
+        else:
+            os.lseek(dst_fd, offset + done, os.SEEK_SET)
+            n = os.sendfile(dst_fd, src_fd, offset + done, count - done)
+        if not n:
+            raise OSError(errno.EIO, "source shrank while being copied")
+        done += n
+
+
+def copy_file(src: str, dst: str) -> tuple[str, str]:
+    """Copy src to a new file dst (preserving mtime), keeping holes; returns (content hash, method).
+
+    method is "reflink", "copy_file_range", "sendfile" or "read-write": the way data was written
+    (the last one used, if a mechanism stopped working part way). The hash is of the bytes read
+    from src while copying; the caller should compare it with a fresh content_hash of dst. If
+    the copy fails, dst is removed.
+    """
+    h = hashlib.sha256()
+    buf = bytearray(BLOCK_SIZE)
+    view = memoryview(buf)
+    methods = [m for m in ("copy_file_range", "sendfile") if hasattr(os, m)] + ["read-write"]
+    with open(src, "rb", buffering=0) as fin, open(dst, "xb", buffering=0) as fout:
+        try:
+            src_fd, dst_fd = fin.fileno(), fout.fileno()
+            size = os.fstat(src_fd).st_size
+            cloned = _reflink(src_fd, dst_fd)
+            for offset, ranges, digest in _blocks(fin, size, buf):
+                h.update(digest)
+                if cloned:
+                    continue
+                for start, stop in ranges:
+                    while methods[0] != "read-write":
+                        try:
+                            _copy_range(methods[0], src_fd, dst_fd, start, stop - start)
+                            break
+                        except OSError as e:
+                            if e.errno not in _UNSUPPORTED:
+                                raise
+                            methods.pop(0)
+                    else:
+                        fout.seek(start)
+                        chunk, written = view[start - offset:stop - offset], 0
+                        while written < len(chunk):
+                            written += fout.write(chunk[written:])
+            if not cloned:
+                fout.truncate(size)
+            os.fsync(dst_fd)
+        except BaseException:
+            fout.close()
+            os.remove(dst)  # don't leave a partial copy behind
+            raise
+    shutil.copystat(src, dst)
+    return h.hexdigest(), "reflink" if cloned else methods[0]
@@ -0,0 +1,241 @@
+"""Extract basic facts from a dump file without loading it: format, architecture, process,
+thread count, loaded modules and .NET runtime version.
+
+Used by `detect_dumps.py --metadata <path>`, which describes every dump it detects.
+
+Dumps are memory-mapped and only the structures needed are touched — the minidump stream
+directory, the ELF program headers + PT_NOTE segments, or the Mach-O load commands — so a
+multi-GB dump is described by reading a few pages.
+
+describe_dump() returns one object per dump:
+  {
+    "path": "/abs/path/core.1234.dmp",
+    "format": "elf-core",
+    "size": 123456789,
+    "arch": "x86_64",
+    "pid": 1234,
+    "process_name": "dotnet",
+    "command_line": "dotnet app.dll",
+    "thread_count": 17,
+    "crashing_thread": 1240,
+    "signal": 6,
+    "exception_code": null,
+    "runtime_version": "8.0.1",
+    "modules": ["/usr/share/dotnet/shared/Microsoft.NETCore.App/8.0.1/libcoreclr.so", ...]
+  }
+Fields that a format doesn't carry are null (e.g. Mach-O cores have no module list in the
+header; "signal" is ELF-only and "exception_code" minidump-only). Unparseable dumps get an
+"error" field instead of failing the whole run.
+"""
+
+import mmap
+import os
+import re
+import struct
+
+# --- Minidump (https://learn.microsoft.com/windows/win32/api/minidumpapiset/) ---
+
+MD_THREAD_LIST_STREAM = 3
+MD_MODULE_LIST_STREAM = 4
+MD_EXCEPTION_STREAM = 6
+MD_SYSTEM_INFO_STREAM = 7
+MD_MISC_INFO_STREAM = 15
+MD_MISC1_PROCESS_ID = 0x1
+MD_MODULE_SIZE = 108
+MD_PROCESSOR_ARCH = {0: "x86", 5: "arm", 6: "ia64", 9: "x86_64", 12: "arm64"}
+
+# --- ELF core ---
+
+PT_NOTE = 4
+NT_PRSTATUS = 1
+NT_PRPSINFO = 3
+NT_FILE = 0x46494C45
+ELF_MACHINE = {3: "x86", 8: "mips", 20: "ppc", 21: "ppc64", 22: "s390x", 40: "arm", 62: "x86_64",
+               183: "arm64", 243: "riscv64", 258: "loongarch64"}
+
+# --- Mach-O core ---
+
+LC_THREAD = 0x4
+LC_UNIXTHREAD = 0x5
+MACHO_CPU = {7: "x86", 0x01000007: "x86_64", 12: "arm", 0x0100000C: "arm64"}
+
+RUNTIME_DIR_RE = re.compile(r"[/\\]Microsoft\.NETCore\.App[/\\]([0-9][^/\\]*)[/\\]", re.IGNORECASE)
+CORECLR_RE = re.compile(r"(^|[/\\])(lib)?coreclr\.(dll|so|dylib)$", re.IGNORECASE)
+
+
+def _empty(path: str, fmt: str, size: int) -> dict:
+    return {
+        "path": path, "format": fmt, "size": size, "arch": None, "pid": None, "process_name": None,
+        "command_line": None, "thread_count": None, "crashing_thread": None, "signal": None,
+        "exception_code": None, "runtime_version": None, "modules": None,
+    }
+
+
+def _runtime_version(modules: list[str]) -> str | None:
+    """Shared-framework version from a Microsoft.NETCore.App/<version>/ module path."""
+    for name in modules:
+        if CORECLR_RE.search(name):
+            m = RUNTIME_DIR_RE.search(name)
+            if m:
+                return m.group(1)
+    for name in modules:
+        m = RUNTIME_DIR_RE.search(name)
+        if m:
+            return m.group(1)
+    return None
+
+
+def _cstr(buf: bytes) -> str:
+    return buf.split(b"\0", 1)[0].decode("utf-8", "replace")
+
+
+def parse_minidump(mm: mmap.mmap, info: dict) -> None:
+    _sig, _ver, num_streams, dir_rva = struct.unpack_from("<4sIII", mm, 0)
+    streams = {}
+    for i in range(num_streams):
+        stype, size, rva = struct.unpack_from("<III", mm, dir_rva + i * 12)
+        streams.setdefault(stype, (rva, size))
+
+    if MD_SYSTEM_INFO_STREAM in streams:
+        rva, _ = streams[MD_SYSTEM_INFO_STREAM]
+        arch = struct.unpack_from("<H", mm, rva)[0]
+        info["arch"] = MD_PROCESSOR_ARCH.get(arch, f"unknown({arch})")
+
+    if MD_MISC_INFO_STREAM in streams:
+        rva, size = streams[MD_MISC_INFO_STREAM]
+        if size >= 12:
+            _size, flags, pid = struct.unpack_from("<III", mm, rva)
+            if flags & MD_MISC1_PROCESS_ID:
+                info["pid"] = pid
+
+    if MD_THREAD_LIST_STREAM in streams:
+        rva, _ = streams[MD_THREAD_LIST_STREAM]
+        info["thread_count"] = struct.unpack_from("<I", mm, rva)[0]
+
+    if MD_EXCEPTION_STREAM in streams:
+        rva, _ = streams[MD_EXCEPTION_STREAM]
+        thread_id, _align, code = struct.unpack_from("<III", mm, rva)
+        info["crashing_thread"] = thread_id
+        info["exception_code"] = f"0x{code:08X}"
+
+    if MD_MODULE_LIST_STREAM in streams:
+        rva, _ = streams[MD_MODULE_LIST_STREAM]
+        count = struct.unpack_from("<I", mm, rva)[0]
+        modules = []
+        coreclr_version = None
+        for i in range(count):
+            base = rva + 4 + i * MD_MODULE_SIZE
+            name_rva = struct.unpack_from("<I", mm, base + 20)[0]
+            name_len = struct.unpack_from("<I", mm, name_rva)[0]
+            name = bytes(mm[name_rva + 4:name_rva + 4 + name_len]).decode("utf-16-le", "replace")
+            modules.append(name)
+            if coreclr_version is None and CORECLR_RE.search(name):
+                # VS_FIXEDFILEINFO starts at +24; dwFileVersionMS/LS at +8/+12 inside it.
+                sig, _struc, ms, ls = struct.unpack_from("<IIII", mm, base + 24)
+                if sig == 0xFEEF04BD:
+                    coreclr_version = f"{ms >> 16}.{ms & 0xFFFF}.{ls >> 16}.{ls & 0xFFFF}"
+        info["modules"] = modules
+        if modules:
+            info["process_name"] = re.split(r"[/\\]", modules[0])[-1]
+        info["runtime_version"] = _runtime_version(modules) or coreclr_version
+
+
+def _elf_notes(mm: mmap.mmap, endian: str, offset: int, size: int):
+    """Yield (type, name, desc_offset, desc_size) for each note in a PT_NOTE segment."""
+    end = offset + size
+    while offset + 12 <= end:
+        namesz, descsz, ntype = struct.unpack_from(f"{endian}III", mm, offset)
+        name_off = offset + 12
+        desc_off = name_off + ((namesz + 3) & ~3)
+        yield ntype, _cstr(mm[name_off:name_off + namesz]), desc_off, descsz
+        offset = desc_off + ((descsz + 3) & ~3)
+
+
+def parse_elf_core(mm: mmap.mmap, info: dict) -> None:
+    is64 = mm[4] == 2
+    e = "<" if mm[5] == 1 else ">"
+    machine = struct.unpack_from(f"{e}H", mm, 18)[0]
+    info["arch"] = ELF_MACHINE.get(machine, f"unknown({machine})")
+    word = "Q" if is64 else "I"
+    wsize = 8 if is64 else 4
+    if is64:
+        phoff = struct.unpack_from(f"{e}Q", mm, 32)[0]
+        phentsize, phnum = struct.unpack_from(f"{e}HH", mm, 54)
+    else:
+        phoff = struct.unpack_from(f"{e}I", mm, 28)[0]
+        phentsize, phnum = struct.unpack_from(f"{e}HH", mm, 42)
+
+    threads = 0
+    modules = []
+    for i in range(phnum):
+        ph = phoff + i * phentsize
+        p_type = struct.unpack_from(f"{e}I", mm, ph)[0]
+        if p_type != PT_NOTE:
+            continue
+        if is64:
+            p_offset, _vaddr, _paddr, p_filesz = struct.unpack_from(f"{e}QQQQ", mm, ph + 8)
+        else:
+            p_offset, _vaddr, _paddr, p_filesz = struct.unpack_from(f"{e}IIII", mm, ph + 4)
+
+        for ntype, name, desc, descsz in _elf_notes(mm, e, p_offset, p_filesz):
+            if name != "CORE":
+                continue
+            if ntype == NT_PRSTATUS:
+                threads += 1
+                if threads == 1:
+                    # elf_prstatus: pr_info (12), pr_cursig (u16 @12), ..., pr_pid after two sigsets
+                    info["signal"] = struct.unpack_from(f"{e}H", mm, desc + 12)[0]
+                    info["crashing_thread"] = struct.unpack_from(f"{e}i", mm, desc + (32 if is64 else 24))[0]
+            elif ntype == NT_PRPSINFO:
+                # elf_prpsinfo: pr_pid, then pr_fname[16] and pr_psargs[80]
+                pid_off, fname_off = (24, 40) if is64 else (12, 28)
+                info["pid"] = struct.unpack_from(f"{e}i", mm, desc + pid_off)[0]
+                info["process_name"] = _cstr(mm[desc + fname_off:desc + fname_off + 16])
+                info["command_line"] = _cstr(mm[desc + fname_off + 16:desc + fname_off + 96]).strip()
+            elif ntype == NT_FILE:
+                count = struct.unpack_from(f"{e}{word}", mm, desc)[0]
+                names_off = desc + 2 * wsize + count * 3 * wsize
+                names = bytes(mm[names_off:desc + descsz]).split(b"\0")
+                seen = set()
+                for raw in names[:count]:
+                    path = raw.decode("utf-8", "replace")
+                    if path not in seen:
+                        seen.add(path)
+                        modules.append(path)
+
+    info["thread_count"] = threads
+    info["modules"] = modules
+    info["runtime_version"] = _runtime_version(modules)
+
+
+def parse_macho_core(mm: mmap.mmap, info: dict) -> None:
+    magic = struct.unpack_from("<I", mm, 0)[0]
+    e = "<" if magic in (0xFEEDFACE, 0xFEEDFACF) else ">"
+    is64 = magic in (0xFEEDFACF, 0xCFFAEDFE)
+    cputype, _sub, _ftype, ncmds = struct.unpack_from(f"{e}iiII", mm, 4)
+    info["arch"] = MACHO_CPU.get(cputype & 0xFFFFFFFF, f"unknown({cputype})")
+    offset = 32 if is64 else 28
+    threads = 0
+    for _ in range(ncmds):
+        cmd, cmdsize = struct.unpack_from(f"{e}II", mm, offset)
+        if cmd in (LC_THREAD, LC_UNIXTHREAD):
+            threads += 1
+        if cmdsize < 8:
+            break
+        offset += cmdsize
+    info["thread_count"] = threads
+
+
+PARSERS = {"minidump": parse_minidump, "elf-core": parse_elf_core, "macho-core": parse_macho_core}
+
+
+def describe_dump(path: str, fmt: str) -> dict:
+    """Metadata for one dump of a known format ("minidump", "elf-core", "macho-core")."""
+    size = os.path.getsize(path)
+    info = _empty(path, fmt, size)
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            PARSERS[fmt](mm, info)
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        info["error"] = f"{type(e).__name__}: {e}"
+    return info
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Content-addressed store for ingested dumps: hash, deduplicate and move dumps into ./dumps/.
+
+Usage:
+    python dump_store.py <triage_root> store <dest> <src> [<src> ...]
+    python dump_store.py <triage_root> lookup <file> [<file> ...]
+    python dump_store.py <triage_root> verify [<stored_path> ...]
+
+store:  Moves each detected dump into the store. With a single source, <dest> is the target
+        file path (e.g. dumps/2026-02-19_crash.dmp); with several, <dest> is a directory and each
+        dump keeps its file name (with a .dmp extension added if missing). A dump whose content
+        is already stored is hardlinked to the existing copy instead of being copied again; if
+        a hardlink isn't possible (different filesystem) no copy is made and the result points
+        at the existing path ("referenced"). On the same filesystem a dump is renamed; across
+        filesystems it is copied by dump_copy.py, which reads and writes only the data (holes
+        and all-zero runs stay holes, reflink clones and in-kernel copies where supported).
+        Copies are verified by comparing the content hash of the destination against the
+        source before the original is deleted.
+lookup: Reports whether a file's content is already stored, without changing anything.
+verify: Re-hashes stored files (all, or the given paths) and reports any whose content no
+        longer matches the index.
+
+Dumps are identified by dump_copy.content_hash: the SHA-256 of the SHA-256s of each 4 MiB
+block, computed from the data regions only, so holes cost neither I/O nor hashing time.
+The hash index lives in .bookkeeping/dump-store.json. Each blob is keyed by its content hash
+and also records a sampled pre-hash (size + first/middle/last 64 KiB), so a new dump is only
+fully hashed against stored ones when its size and samples already match one of them.
+
+Output format (JSON to stdout), one object per source file:
+[
+  {
+    "source": "/abs/path/core.1234",
+    "path": "/abs/triage/dumps/2026-02-19_crash.dmp",
+    "content_hash": "…",
+    "size": 123456789,
+    "action": "moved" | "copied" | "linked" | "referenced" | "already-stored" | "error",
+    "duplicate_of": "/abs/triage/dumps/2026-01-30_other.dmp" | null,
+    "method": "reflink" | "copy_file_range" | "sendfile" | "read-write"   (only when copied)
+  }
+]
+"""
+
+import errno
+import hashlib
+import json
+import os
+import sys
+
+from detect_dumps import dump_kind
+from dump_copy import content_hash, copy_file
+
+INDEX_VERSION = 2
+INDEX_PATH = os.path.join(".bookkeeping", "dump-store.json")
+# Bytes read from each of the start, middle and end of a file for the pre-hash.
+SAMPLE_SIZE = 64 * 1024
+
+
+def prehash(path: str) -> str:
+    """Cheap fingerprint: size plus the first, middle and last SAMPLE_SIZE bytes.
+
+    Files no larger than three samples are hashed whole, so for them this is exact.
+    """
+    size = os.path.getsize(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(size.to_bytes(8, "little"))
+    with open(path, "rb") as f:
+        if size <= 3 * SAMPLE_SIZE:
+            h.update(f.read())
+        else:
+            for offset in (0, (size - SAMPLE_SIZE) // 2, size - SAMPLE_SIZE):
+                f.seek(offset)
+                h.update(f.read(SAMPLE_SIZE))
+    return f"{size}:{h.hexdigest()}"
+
+
+def _migrate_v1(blobs: dict) -> dict:
+    """Re-key a version 1 index (whole-file SHA-256) by content hash, re-hashing each stored path once."""
+    print(f"Re-hashing {sum(len(b['paths']) for b in blobs.values())} stored dumps for the new index format",
+          file=sys.stderr)
+    migrated: dict[str, dict] = {}
+    for blob in blobs.values():
+        for path in blob["paths"]:
+            try:
+                st = os.stat(path)
+                digest = content_hash(path)
+            except OSError:
+                continue
+            entry = migrated.setdefault(digest, {"size": st.st_size, "prehash": prehash(path), "paths": {}})
+            entry["paths"][path] = st.st_mtime_ns
+    return migrated
+
+
+class DumpIndex:
+    """The .bookkeeping/dump-store.json index: content hash -> {size, prehash, paths: {path: mtime_ns}}."""
+
+    def __init__(self, base: str):
+        self.path = os.path.join(base, INDEX_PATH)
+        self.blobs: dict[str, dict] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("version") == INDEX_VERSION:
+                self.blobs = data.get("blobs", {})
+            elif isinstance(data, dict) and data.get("version") == 1:
+                self.blobs = _migrate_v1(data.get("blobs", {}))
+        except (OSError, json.JSONDecodeError):
+            pass
+        self.by_prehash: dict[str, list[str]] = {}
+        for digest, blob in self.blobs.items():
+            self.by_prehash.setdefault(blob["prehash"], []).append(digest)
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "blobs": self.blobs}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def add(self, digest: str, pre: str, size: int, path: str) -> None:
+        blob = self.blobs.get(digest)
+        if blob is None:
+            blob = self.blobs[digest] = {"size": size, "prehash": pre, "paths": {}}
+            self.by_prehash.setdefault(pre, []).append(digest)
+        blob["paths"][path] = os.stat(path).st_mtime_ns
+
+    def live_path(self, digest: str) -> str | None:
+        """A stored path that still holds this blob, dropping paths that were deleted or changed.
+
+        A path whose mtime moved on since it was indexed is re-hashed before it is trusted.
+        """
+        blob = self.blobs.get(digest)
+        if blob is None:
+            return None
+        for path, mtime_ns in list(blob["paths"].items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del blob["paths"][path]
+                continue
+            if st.st_size == blob["size"] and (st.st_mtime_ns == mtime_ns or content_hash(path) == digest):
+                blob["paths"][path] = st.st_mtime_ns
+                return path
+            del blob["paths"][path]
+        return None
+
+    def find(self, path: str, pre: str | None = None) -> tuple[str | None, str | None, str]:
+        """Look a file up: (digest if already computed, stored duplicate path or None, pre-hash).
+
+        The full hash is only computed when the pre-hash matches a stored blob.
+        """
+        pre = pre or prehash(path)
+        candidates = self.by_prehash.get(pre)
+        if not candidates:
+            return None, None, pre
+        digest = content_hash(path)
+        if digest in candidates:
+            return digest, self.live_path(digest), pre
+        return digest, None, pre
+
+    def prune(self) -> None:
+        """Drop blobs with no remaining paths."""
+        for digest in [d for d, b in self.blobs.items() if not b["paths"]]:
+            blob = self.blobs.pop(digest)
+            self.by_prehash[blob["prehash"]].remove(digest)
+
+
+def _same_file(a: str, b: str) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def store_one(index: DumpIndex, src: str, dest: str) -> dict:
+    """Move one dump into the store at dest, deduplicating against the index."""
+    result = {"source": src, "path": dest, "content_hash": None, "size": None, "action": "error", "duplicate_of": None}
+    if dump_kind(src) is None:
+        result["error"] = "not a dump file"
+        return result
+    size = os.path.getsize(src)
+    result["size"] = size
+    digest, existing, pre = index.find(src)
+
+    if existing is not None:
+        result["content_hash"] = digest
+        if _same_file(existing, src):
+            result.update(path=existing, action="already-stored")
+            return result
+        result["duplicate_of"] = existing
+        try:
+            os.link(existing, dest)
+            index.add(digest, pre, size, dest)
+            result["action"] = "linked"
+        except OSError:
+            result.update(path=existing, action="referenced")
+        os.remove(src)
+        return result
+
+    try:
+        os.rename(src, dest)
+        result["action"] = "moved"
+        result["content_hash"] = digest or content_hash(dest)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        # Different filesystem: copy only the data (reflink, in-kernel or plain) while hashing,
+        # then re-hash the destination to verify before deleting the source.
+        copied, method = copy_file(src, dest)
+        if digest is not None and copied != digest:
+            os.remove(dest)
+            result["error"] = "source changed while copying"
+            return result
+        if content_hash(dest) != copied:
+            os.remove(dest)
+            result["error"] = "destination hash mismatch after copy"
+            return result
+        os.remove(src)
+        result.update(action="copied", content_hash=copied, method=method)
+    index.add(result["content_hash"], pre, size, dest)
+    return result
+
+
+def _dest_name(src: str) -> str:
+    name = os.path.basename(src)
+    return name if name.lower().endswith(".dmp") else f"{name}.dmp"
+
+
+def cmd_store(index: DumpIndex, dest: str, sources: list[str]) -> list[dict]:
+    if len(sources) == 1 and not os.path.isdir(dest):
+        targets = [(sources[0], dest)]
+    else:
+        targets = [(src, os.path.join(dest, _dest_name(src))) for src in sources]
+    results = []
+    for src, target in targets:
+        src, target = os.path.abspath(src), os.path.abspath(target)
+        if os.path.exists(target) and not _same_file(src, target):
+            results.append({"source": src, "path": target, "content_hash": None, "size": None,
+                            "action": "error", "duplicate_of": None, "error": "destination exists"})
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            results.append(store_one(index, src, target))
+        except OSError as e:
+            results.append({"source": src, "path": target, "content_hash": None, "size": None,
+                            "action": "error", "duplicate_of": None, "error": str(e)})
+    index.prune()
+    index.save()
+    return results
+
+
+def cmd_lookup(index: DumpIndex, paths: list[str]) -> list[dict]:
+    results = []
+    for path in paths:
+        path = os.path.abspath(path)
+        digest, existing, _pre = index.find(path)
+        results.append({"source": path, "content_hash": digest, "stored": existing is not None,
+                        "duplicate_of": existing})
+    return results
+
+
+def cmd_verify(index: DumpIndex, paths: list[str]) -> list[dict]:
+    wanted = {os.path.abspath(p) for p in paths}
+    results = []
+    for digest, blob in sorted(index.blobs.items()):
+        for path in sorted(blob["paths"]):
+            if wanted and path not in wanted:
+                continue
+            if not os.path.exists(path):
+                status = "missing"
+            else:
+                status = "ok" if content_hash(path) == digest else "mismatch"
+            results.append({"path": path, "content_hash": digest, "status": status})
+    return results
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[2] not in ("store", "lookup", "verify"):
+        print("Usage: dump_store.py <triage_root> store <dest> <src> [<src> ...]\n"
+              "       dump_store.py <triage_root> lookup <file> [<file> ...]\n"
+              "       dump_store.py <triage_root> verify [<stored_path> ...]", file=sys.stderr)
+        sys.exit(1)
+
+    index = DumpIndex(os.path.abspath(sys.argv[1]))
+    command, args = sys.argv[2], sys.argv[3:]
+    if command == "store":
+        if len(args) < 2:
+            print("Usage: dump_store.py <triage_root> store <dest> <src> [<src> ...]", file=sys.stderr)
+            sys.exit(1)
+        results = cmd_store(index, args[0], args[1:])
+    elif command == "lookup":
+        results = cmd_lookup(index, args)
+    else:
+        results = cmd_verify(index, args)
+    print(json.dumps(results, indent=2))
+    if any(r.get("action") == "error" or r.get("status") in ("missing", "mismatch") for r in results):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
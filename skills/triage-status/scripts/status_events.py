@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""Append-only log of triage status transitions, with per-day and per-sprint rollups.
+
+Usage:
+    python status_events.py <triage_root> sync [--repo <owner/repo>]
+    python status_events.py <triage_root> record --repo <owner/repo> --issue <number> [--sprint <run_id>]
+    python status_events.py <triage_root> rollup [--repo <owner/repo>] [--since YYYY-MM-DD] [--sprint <run_id>]
+    python status_events.py <triage_root> events [--repo <owner/repo>] [--issue <number>] [--since YYYY-MM-DD]
+
+Recording is explicit: `sync` loads every issue's row through triage_reports.load_rows and
+compares its status and fix.has_candidate with the last ones recorded here, and `record` does
+the same for one issue right after its report was written. A difference adds one event to
+.bookkeeping/status-events/:
+
+    [timestamp, "<owner>-<repo>", number, old_status, new_status, has_fix, sprint, baseline]
+
+The timestamp is the report's own: its newest log heading (row "logged_at"), or the time of the
+sync when the report has no dated log entry. old_status is null the first time an issue is
+seen, and sprint is the run_id of the repo's in-progress run under runs/ (run.json "status" and
+"repo"), or the --sprint given to `record`. The last known status per issue is kept in
+state-<owner>-<repo>.marshal, so rebuilding the report cache doesn't repeat events.
+
+The first sync of a repo (no state file yet, e.g. a fresh clone) records a baseline event
+(baseline 1, no sprint) for every issue already there: the starting point for later
+transitions, not counted as triage. `record` on a repo that was never synced runs that baseline
+for the other issues first.
+
+Events are JSON arrays, one per line, appended to events-NNNNNN.log segments; a segment is
+closed once it passes SEGMENT_BYTES and never rewritten. `rollup` folds the events appended
+since its last run into rollups.marshal (the log position it has read up to is stored with the
+rollups) and prints, per day and per sprint: events, issues triaged (first seen), status
+changes, transitions by new status, new fix candidates and time from first seen to fix
+candidate. Baseline events only set an issue's first-seen (and fix candidate) time. Writers
+and the aggregator take .bookkeeping/status-events/lock.
+"""
+
+import json
+import marshal
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from triage_reports import issue_file_keys, list_repo_keys, load_rows, parse_issue
+
+EVENTS_DIR = os.path.join(".bookkeeping", "status-events")
+SEGMENT_BYTES = 1 << 20
+ROLLUP_VERSION = 2
+SEGMENT_RE = re.compile(r"^events-(\d{6})\.log$")
+LOCK_TIMEOUT = 10
+# A lock file older than this was left by a process that died holding it.
+STALE_LOCK = 120
+DAY = 86400
+TIME_TO_FIX_BUCKETS = (("le_1d", DAY), ("le_7d", 7 * DAY), ("le_30d", 30 * DAY), ("gt_30d", None))
+
+
+def _dir(base: str) -> str:
+    return os.path.join(base, EVENTS_DIR)
+
+
+@contextmanager
+def _locked(base: str, timeout: float = LOCK_TIMEOUT):
+    path = os.path.join(_dir(base), "lock")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(path).st_mtime > STALE_LOCK:
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{path} is held by another process")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.remove(path)
+
+
+def _read_marshal(path: str, default):
+    try:
+        with open(path, "rb") as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return default
+
+
+def _write_marshal(path: str, value) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        marshal.dump(value, f)
+    os.replace(tmp, path)
+
+
+def segments(base: str) -> list[int]:
+    """Segment numbers in order."""
+    try:
+        names = os.listdir(_dir(base))
+    except OSError:
+        return []
+    return sorted(int(m.group(1)) for m in map(SEGMENT_RE.match, names) if m)
+
+
+def _segment_path(base: str, n: int) -> str:
+    return os.path.join(_dir(base), f"events-{n:06d}.log")
+
+
+def _append(base: str, events: list[list]) -> None:
+    existing = segments(base)
+    n = existing[-1] if existing else 1
+    path = _segment_path(base, n)
+    if existing and os.path.getsize(path) >= SEGMENT_BYTES:
+        path = _segment_path(base, n + 1)
+    data = "".join(json.dumps(e, separators=(",", ":")) + "\n" for e in events).encode("utf-8")
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def active_sprints(base: str) -> dict[str, str]:
+    """<owner>-<repo> -> run_id of its in-progress sprint run (the newest if several)."""
+    runs_dir = os.path.join(base, "runs")
+    result = {}
+    try:
+        run_ids = sorted(os.listdir(runs_dir))
+    except OSError:
+        return result
+    for run_id in run_ids:
+        try:
+            with open(os.path.join(runs_dir, run_id, "run.json"), "r", encoding="utf-8") as f:
+                run = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if isinstance(run, dict) and run.get("status") == "in-progress" and run.get("repo"):
+            result[str(run["repo"]).replace("/", "-", 1)] = run_id
+    return result
+
+
+def _state_path(base: str, repo_key: str) -> str:
+    return os.path.join(_dir(base), f"state-{repo_key}.marshal")
+
+
+def observe(base: str, repo_key: str, changes: list[tuple], sprint: str | None = None,
+            baseline: bool = False) -> list[list]:
+    """Record (number, status, has_fix, timestamp) observations; returns the events they produced.
+
+    With baseline=True and no state for the repo yet, they are recorded as baseline events.
+    """
+    with _locked(base):
+        state_path = _state_path(base, repo_key)
+        baseline = baseline and not os.path.exists(state_path)
+        state = _read_marshal(state_path, {})
+        events = []
+        for number, status, has_fix, ts in sorted(changes, key=lambda c: c[3]):
+            current = (status or "", bool(has_fix))
+            previous = state.get(number)
+            if previous == current:
+                continue
+            events.append([round(ts, 3), repo_key, number, previous[0] if previous else None, current[0],
+                           int(current[1]), sprint, int(baseline)])
+            state[number] = current
+        if events and not baseline and sprint is None:
+            active = active_sprints(base).get(repo_key)
+            for e in events:
+                e[6] = active
+        if events:
+            _append(base, events)
+        if events or baseline:  # a repo with nothing to baseline still counts as synced
+            _write_marshal(state_path, state)
+    return events
+
+
+def _observation(row: dict, now: float) -> tuple:
+    ts = row.get("logged_at")
+    return row["number"], row.get("status"), row.get("has_fix"), ts if ts is not None else now
+
+
+def sync(base: str, repo_key: str, skip: int | None = None) -> list[list]:
+    """Record the transitions of every triaged issue in issues/<repo_key>/; returns the events.
+
+    The repo's first sync records baselines instead; skip leaves one issue out of them.
+    """
+    now = time.time()
+    return observe(base, repo_key, [_observation(row, now) for row in load_rows(base, repo_key)
+                                    if row["number"] != skip], baseline=True)
+
+
+def read_events(base: str, start: tuple[int, int] = (0, 0)):
+    """Yield (event, (segment, offset after it)) for every complete event from a log position on."""
+    for n in segments(base):
+        if n < start[0]:
+            continue
+        offset = start[1] if n == start[0] else 0
+        with open(_segment_path(base, n), "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a writer is mid-append; picked up next time
+                offset += len(line)
+                yield json.loads(line), (n, offset)
+
+
+def _counters() -> dict:
+    return {"events": 0, "triaged": 0, "status_changes": 0, "to_status": {}, "fix_candidates": 0,
+            "time_to_fix": {"count": 0, "total_s": 0.0, **{name: 0 for name, _ in TIME_TO_FIX_BUCKETS}}}
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+def update_rollups(base: str) -> dict:
+    """Fold events appended since the last call into the rollups; returns them."""
+    path = os.path.join(_dir(base), "rollups.marshal")
+    with _locked(base):
+        rollups = _read_marshal(path, None)
+        if not isinstance(rollups, dict) or rollups.get("version") != ROLLUP_VERSION:
+            # issues: "<owner>-<repo>#N" -> [first seen, first fix candidate or None]
+            rollups = {"version": ROLLUP_VERSION, "position": (0, 0), "issues": {}, "days": {}, "sprints": {}}
+        issues, days, sprints = rollups["issues"], rollups["days"], rollups["sprints"]
+        position = rollups["position"]
+        for event, position in read_events(base, position):
+            ts, repo_key, number, old, new, has_fix, sprint = event[:7]
+            key = f"{repo_key}#{number}"
+            if len(event) > 7 and event[7]:
+                issues.setdefault(key, [ts, ts if has_fix else None])
+                continue
+            buckets = [days.setdefault(_day(ts), {}).setdefault(repo_key, _counters())]
+            if sprint:
+                buckets.append(sprints.setdefault(sprint, _counters()))
+            seen = issues.get(key)
+            new_fix = has_fix and (seen is None or seen[1] is None)
+            if seen is None:
+                seen = issues[key] = [ts, None]
+            if new_fix:
+                seen[1] = ts
+            for c in buckets:
+                c["events"] += 1
+                c["triaged"] += old is None
+                c["status_changes"] += old is not None and old != new
+                if old != new:
+                    c["to_status"][new] = c["to_status"].get(new, 0) + 1
+                if new_fix:
+                    c["fix_candidates"] += 1
+                    ttf, elapsed = c["time_to_fix"], max(0.0, ts - seen[0])
+                    ttf["count"] += 1
+                    ttf["total_s"] += elapsed
+                    ttf[next(name for name, limit in TIME_TO_FIX_BUCKETS if limit is None or elapsed <= limit)] += 1
+        rollups["position"] = tuple(position)
+        _write_marshal(path, rollups)
+    return rollups
+
+
+def _merge(into: dict, c: dict) -> None:
+    for key, value in c.items():
+        if isinstance(value, dict):
+            _merge(into.setdefault(key, {}), value)
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def _copy(c: dict) -> dict:
+    copy = {}
+    _merge(copy, c)
+    return copy
+
+
+def _summarize(c: dict) -> dict:
+    ttf = c["time_to_fix"]
+    c["time_to_fix"]["mean_days"] = round(ttf["total_s"] / ttf["count"] / DAY, 2) if ttf["count"] else None
+    return c
+
+
+def report(rollups: dict, repo_key: str | None = None, since: str | None = None, sprint: str | None = None) -> dict:
+    """Per-day (summed over repos unless repo_key is given) and per-sprint rollups plus totals."""
+    days = {}
+    for day in sorted(rollups["days"]):
+        if since and day < since:
+            continue
+        day_total = {}
+        for key, c in rollups["days"][day].items():
+            if repo_key is None or key == repo_key:
+                _merge(day_total, c)
+        if day_total:
+            days[day] = day_total
+    total = {}
+    for c in days.values():
+        _merge(total, c)
+    sprints = {sid: c for sid, c in sorted(rollups["sprints"].items()) if sprint is None or sid == sprint}
+    return {
+        "days": {day: _summarize(c) for day, c in days.items()},
+        "sprints": {sid: _summarize(_copy(c)) for sid, c in sprints.items()},
+        "total": _summarize(total) if total else None,
+        "triaged_per_active_day": round(total["triaged"] / len(days), 1) if days else None,
+    }
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[2] not in ("sync", "record", "rollup", "events"):
+        print("Usage: status_events.py <triage_root> sync|record|rollup|events [--repo <owner/repo>] "
+              "[--issue <number>] [--sprint <run_id>] [--since YYYY-MM-DD]", file=sys.stderr)
+        sys.exit(1)
+
+    base = os.path.abspath(sys.argv[1])
+    command = sys.argv[2]
+
+    def option(name):
+        if name in sys.argv:
+            idx = sys.argv.index(name)
+            if idx + 1 < len(sys.argv):
+                return sys.argv[idx + 1]
+        return None
+
+    repo = option("--repo")
+    repo_key = repo.replace("/", "-", 1) if repo else None
+    issue = option("--issue")
+
+    if command == "sync":
+        counts = {}
+        for key in [repo_key] if repo_key else list_repo_keys(base):
+            events = sync(base, key)
+            counts[key] = {"events": len(events), "baseline": sum(e[7] for e in events)}
+        print(json.dumps({"repos": counts, "segments": len(segments(base))}))
+    elif command == "record":
+        if not repo_key or not issue:
+            print("Error: record requires --repo and --issue", file=sys.stderr)
+            sys.exit(1)
+        path = os.path.join(base, "issues", repo_key, issue)
+        analysis_key, _github_key, has_md = issue_file_keys(path)
+        row = parse_issue(int(issue), path, has_md) if analysis_key else None
+        if row is None:
+            print(f"Error: no readable analysis.json in {path}", file=sys.stderr)
+            sys.exit(1)
+        if not os.path.exists(_state_path(base, repo_key)):
+            sync(base, repo_key, skip=int(issue))
+        events = observe(base, repo_key, [_observation(row, time.time())], option("--sprint"))
+        print(json.dumps({"events": events}))
+    elif command == "rollup":
+        print(json.dumps(report(update_rollups(base), repo_key, option("--since"), option("--sprint")), indent=2))
+    else:
+        since = option("--since")
+        events = [e for e, _pos in read_events(base)
+                  if (repo_key is None or e[1] == repo_key) and (issue is None or e[2] == int(issue))
+                  and (since is None or _day(e[0]) >= since)]
+        print(json.dumps({"events": events}))
+
+
+if __name__ == "__main__":
+    main()
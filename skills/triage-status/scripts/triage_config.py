@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Load config/repos.yaml and config/local.yaml once, through a compiled on-disk cache.
+
+Usage:
+    python triage_config.py <triage_root> [--no-cache]
+
+Both files are parsed with parse_yaml from the load-information skill and reduced to what the
+scripts use: the configured repos in file order with their settings, each repo's area rules
+compiled into lookup tables (see compile_area_rules), and the lowercased user.login. That form
+is written with marshal to .bookkeeping/config-cache/config.marshal together with each file's
+path, mtime, size and SHA-256.
+
+On the next load the files are stat'ed: if mtime and size match, the cache is used without
+reading them. If not, they are hashed, and a hash match (a touch, a checkout that rewrote the
+same bytes) just refreshes the stored stats. Only a content change re-parses, and only then is
+load_information imported. A missing local.yaml is allowed (user_login is None).
+
+If load_information can't be imported (the load-information skill isn't installed next to this
+one), the top-level `owner/repo:` keys of repos.yaml are read with a line regex instead, with a
+warning on stderr: the repo list is right, but there are no repo settings, area rules or user
+login, and nothing is cached.
+
+generate-summary.py and find_untriaged.py load their config through load_config(), so they
+agree on which repos are configured.
+
+Output format (JSON to stdout):
+    {"repos": ["dotnet/diagnostics", ...], "user_login": "octocat", "areas": {"dotnet/diagnostics": [...]}}
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import re
+import sys
+
+CACHE_VERSION = 1
+CACHE_DIR = os.path.join(".bookkeeping", "config-cache")
+CACHE_FILE = "config.marshal"
+
+
+def compile_area_rules(areas_config: dict) -> dict:
+    """Reduce a repo's `areas` mapping to lookup tables AreaClassifier uses directly.
+
+    Within each rule kind the area listed first keeps a label or keyword that several areas
+    list. Only builtin types, so the result can be marshalled.
+    """
+    names = list(areas_config)
+    labels, repo_matchers, keywords = {}, [], {}
+    for idx, area_def in enumerate(areas_config.values()):
+        area_def = area_def or {}
+        for label in area_def.get("labels") or []:
+            labels.setdefault(str(label).lower(), idx)
+        match_repo = area_def.get("match_affected_repo", "")
+        if match_repo:
+            repo_matchers.append([str(match_repo).lower(), idx])
+        for kw in area_def.get("title_keywords") or []:
+            keywords.setdefault(str(kw).lower(), idx)
+    return {"names": names, "labels": labels, "repo_matchers": repo_matchers, "keywords": keywords}
+
+
+class AreaClassifier:
+    """Compiled area rules for one repo, so classifying an issue is a single pass.
+
+    Precedence: a label match wins, then `match_affected_repo`, then title keywords; within
+    each rule kind the area listed first in repos.yaml wins.
+    """
+
+    DEFAULT = "Other / General"
+
+    def __init__(self, rules: dict):
+        self.area_names = rules["names"]
+        self.label_to_area = rules["labels"]  # lowercased label -> index of the first area listing it
+        self.repo_matchers = rules["repo_matchers"]  # [lowercased substring, area index] in config order
+        self.keyword_to_area = rules["keywords"]
+        # All keywords in one alternation, ordered by area. Wrapping it in a lookahead lets
+        # matches overlap, and at each position the first alternative that matches belongs
+        # to the earliest area, so the minimum over all positions is the winning area.
+        if self.keyword_to_area:
+            ordered = sorted(self.keyword_to_area, key=self.keyword_to_area.get)
+            self.keyword_re = re.compile("(?=(" + "|".join(re.escape(kw) for kw in ordered) + "))")
+        else:
+            self.keyword_re = None
+
+    def classify(self, labels, affected_repo, title):
+        best = None
+        for l in labels:
+            name = l if isinstance(l, str) else l.get("name", "")
+            idx = self.label_to_area.get(name.lower())
+            if idx is not None and (best is None or idx < best):
+                best = idx
+        if best is not None:
+            return self.area_names[best]
+
+        if affected_repo:
+            affected = affected_repo.lower()
+            for match_repo, idx in self.repo_matchers:
+                if match_repo in affected:
+                    return self.area_names[idx]
+
+        if self.keyword_re is not None:
+            for m in self.keyword_re.finditer((title or "").lower()):
+                idx = self.keyword_to_area[m.group(1)]
+                if best is None or idx < best:
+                    best = idx
+                    if idx == 0:
+                        break
+            if best is not None:
+                return self.area_names[best]
+        return self.DEFAULT
+
+
+class TriageConfig:
+    """The compiled config: repo keys in repos.yaml order, their settings and area rules, and the user."""
+
+    def __init__(self, compiled: dict):
+        self.repos = compiled["repos"]  # owner/repo -> settings from repos.yaml
+        self.area_rules = compiled["area_rules"]
+        self.user_login = compiled["user_login"]
+        self._classifiers = {}
+
+    @property
+    def repo_keys(self) -> list[str]:
+        return list(self.repos)
+
+    def classifier(self, repo: str) -> AreaClassifier:
+        """AreaClassifier for owner/repo (one with no areas for an unconfigured repo)."""
+        if repo not in self._classifiers:
+            self._classifiers[repo] = AreaClassifier(self.area_rules.get(repo) or compile_area_rules({}))
+        return self._classifiers[repo]
+
+    def __getstate__(self):
+        # Compiled regexes are rebuilt on demand; process-pool workers get the plain tables.
+        return {**self.__dict__, "_classifiers": {}}
+
+
+def compile_config(repos_config: dict, local_config: dict | None) -> dict:
+    """Compiled (marshal-able) form of the parsed repos.yaml and local.yaml."""
+    repos = {key: value or {} for key, value in (repos_config or {}).items() if "/" in str(key)}
+    user = (local_config or {}).get("user") or {}
+    login = user.get("login") if isinstance(user, dict) else None
+    return {
+        "repos": repos,
+        "area_rules": {key: compile_area_rules(settings.get("areas") or {}) for key, settings in repos.items()},
+        "user_login": str(login).lower() if login else None,
+    }
+
+
+def _stamp(path: str) -> list | None:
+    """[abspath, mtime_ns, size] for a file, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [os.path.abspath(path), st.st_mtime_ns, st.st_size]
+
+
+def _sha256(path: str | None) -> str | None:
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _read_cache(path: str) -> dict | None:
+    try:
+        with open(path, "rb") as f:
+            cache = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return None
+    return cache
+
+
+def _write_cache(path: str, cache: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        marshal.dump(cache, f)
+    os.replace(tmp, path)
+
+
+REPO_KEY_RE = re.compile(r"^(\S+/\S+)\s*:")
+
+
+def _scan_repo_keys(repos_path: str) -> dict:
+    """Compiled config with just the top-level `owner/repo:` keys of repos.yaml, found by regex.
+
+    The fallback when load_information can't be imported: enough for find_untriaged, which only
+    needs the repo list. Repo settings, area rules and the user login are left empty.
+    """
+    repos = {}
+    with open(repos_path, "r", encoding="utf-8") as f:
+        for line in f:
+            m = REPO_KEY_RE.match(line)
+            if m:
+                repos[m.group(1)] = {}
+    return compile_config(repos, None)
+
+
+def _parse(repos_path: str, local_path: str | None) -> tuple[dict, bool]:
+    """(compiled config, complete); complete is False when only the repo keys could be read."""
+    # Imported only on a cache miss; the parser lives in the load-information skill.
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'load-information', 'scripts'))
+    try:
+        from load_information import parse_yaml
+    except ImportError as e:
+        print(f"Warning: {e}; reading only the repo keys from {repos_path} "
+              f"(no area rules or user login)", file=sys.stderr)
+        return _scan_repo_keys(repos_path), False
+
+    with open(repos_path, "r", encoding="utf-8") as f:
+        repos_config = parse_yaml(f.read())
+    local_config = None
+    if local_path is not None:
+        with open(local_path, "r", encoding="utf-8") as f:
+            local_config = parse_yaml(f.read())
+    return compile_config(repos_config, local_config), True
+
+
+def load_config(base: str = ".", repos_path: str | None = None, local_path: str | None = None,
+                use_cache: bool = True) -> TriageConfig:
+    """Compiled config for a triage root; repos_path/local_path override config/*.yaml."""
+    repos_path = repos_path or os.path.join(base, "config", "repos.yaml")
+    local_path = local_path or os.path.join(base, "config", "local.yaml")
+    stamps = [_stamp(repos_path), _stamp(local_path)]
+    if stamps[0] is None:
+        raise FileNotFoundError(f"No such file: {repos_path}")
+    paths = [repos_path, local_path if stamps[1] is not None else None]
+
+    cache_path = os.path.join(base, CACHE_DIR, CACHE_FILE)
+    cache = _read_cache(cache_path) if use_cache else None
+    if cache is not None and cache["stamps"] == stamps:
+        return TriageConfig(cache["config"])
+
+    hashes = [_sha256(p) for p in paths]
+    cached_paths = [s and s[0] for s in cache["stamps"]] if cache is not None else None
+    if cache is not None and cache["hashes"] == hashes and cached_paths == [s and s[0] for s in stamps]:
+        compiled, complete = cache["config"], True
+    else:
+        compiled, complete = _parse(*paths)
+    # A repo-keys-only fallback isn't cached, so the full config is parsed once the parser is back.
+    if use_cache and complete:
+        try:
+            _write_cache(cache_path, {"version": CACHE_VERSION, "stamps": stamps, "hashes": hashes,
+                                      "config": compiled})
+        except (OSError, ValueError) as e:  # ValueError: a value marshal can't store
+            print(f"Warning: could not write config cache {cache_path}: {e}", file=sys.stderr)
+    return TriageConfig(compiled)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: triage_config.py <triage_root> [--no-cache]", file=sys.stderr)
+        sys.exit(1)
+    config = load_config(os.path.abspath(sys.argv[1]), use_cache="--no-cache" not in sys.argv)
+    print(json.dumps({
+        "repos": config.repo_keys,
+        "user_login": config.user_login,
+        "areas": {key: rules["names"] for key, rules in config.area_rules.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
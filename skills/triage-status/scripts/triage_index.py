@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""SQLite index over all triaged issues, synced incrementally from the JSON reports.
+
+Usage:
+    python triage_index.py <triage_root> [--repo <owner/repo>] [--filter <filter>] [--search <text>]
+                           [--label <label>] [--issue <number>] [--counts] [--no-sync]
+
+The index lives in .bookkeeping/triage-index.sqlite. Before each query it is synced from
+issues/<owner>-<repo>/<N>/analysis.json + github.json: files are stat'ed and only issues
+whose mtime or size changed are re-parsed; rows for deleted issue directories are removed.
+Pass --no-sync to query the index as-is (e.g. several queries back to back).
+
+Filters (same names as the triage-status skill):
+    reproduced, not-reproduced, platform-blocked, blocked   status == <filter>
+    needs-attention                                          status in (error, needs-info, platform-blocked)
+    has-fix                                                  fix.has_candidate == true
+    no-fix                                                   status == reproduced and no fix candidate
+    stale                                                    staleness == stale or status == stale
+    should-close                                             status in the close statuses
+    anything else                                            full-text search over title + status_reason
+
+--search runs the full-text search explicitly (FTS5 when SQLite has it, LIKE otherwise) and
+can be combined with --filter. --label matches a GitHub label (case-insensitive). --issue
+finds an issue number across all repos.
+
+Output format (JSON to stdout):
+    {"issues": [{"repo_key": "dotnet-diagnostics", "number": 1234, "status": "reproduced", ...}]}
+With --counts:
+    {"repos": {"dotnet-diagnostics": {"total": N, "by_status": {...}, "by_category": {...}, ...}}}
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from triage_reports import issue_file_keys, list_issue_dirs, list_repo_keys, parse_issue
+
+INDEX_PATH = os.path.join(".bookkeeping", "triage-index.sqlite")
+SCHEMA_VERSION = 1
+
+CLOSE_STATUSES = ("already-fixed", "already-implemented", "by-design", "stale", "wont-fix", "duplicate")
+ATTENTION_STATUSES = ("error", "needs-info", "platform-blocked")
+STATUS_FILTERS = ("reproduced", "not-reproduced", "platform-blocked", "blocked")
+
+# Row fields stored as columns; list-valued fields are stored as JSON text.
+COLUMNS = (
+    "title", "state", "url", "status", "status_reason", "category", "actionability", "affected_repo",
+    "blocked_reason", "staleness", "has_candidate", "manually_investigated", "has_analysis_md",
+    "fix_confidence", "fix_branch", "labels", "assignees", "requires_platform",
+)
+JSON_COLUMNS = ("labels", "assignees", "requires_platform")
+BOOL_COLUMNS = ("has_candidate", "manually_investigated", "has_analysis_md")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    id INTEGER PRIMARY KEY,
+    repo_key TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    analysis_mtime_ns INTEGER NOT NULL,
+    analysis_size INTEGER NOT NULL,
+    github_mtime_ns INTEGER,
+    github_size INTEGER,
+    title TEXT, state TEXT, url TEXT, status TEXT, status_reason TEXT, category TEXT,
+    actionability TEXT, affected_repo TEXT, blocked_reason TEXT, staleness TEXT,
+    has_candidate INTEGER, manually_investigated INTEGER, has_analysis_md INTEGER,
+    fix_confidence REAL, fix_branch TEXT, labels TEXT, assignees TEXT, requires_platform TEXT,
+    UNIQUE (repo_key, number)
+);
+CREATE INDEX IF NOT EXISTS issues_number ON issues (number);
+CREATE INDEX IF NOT EXISTS issues_status ON issues (repo_key, status);
+CREATE INDEX IF NOT EXISTS issues_category ON issues (repo_key, category);
+CREATE INDEX IF NOT EXISTS issues_actionability ON issues (repo_key, actionability);
+CREATE INDEX IF NOT EXISTS issues_affected_repo ON issues (repo_key, affected_repo);
+CREATE INDEX IF NOT EXISTS issues_has_candidate ON issues (repo_key, has_candidate);
+CREATE TABLE IF NOT EXISTS issue_labels (
+    issue_id INTEGER NOT NULL REFERENCES issues (id) ON DELETE CASCADE,
+    label TEXT NOT NULL,
+    PRIMARY KEY (label, issue_id)
+) WITHOUT ROWID;
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS issues_fts USING fts5(
+    title, status_reason, content='issues', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS issues_fts_insert AFTER INSERT ON issues BEGIN
+    INSERT INTO issues_fts (rowid, title, status_reason) VALUES (new.id, new.title, new.status_reason);
+END;
+CREATE TRIGGER IF NOT EXISTS issues_fts_delete AFTER DELETE ON issues BEGIN
+    INSERT INTO issues_fts (issues_fts, rowid, title, status_reason)
+    VALUES ('delete', old.id, old.title, old.status_reason);
+END;
+CREATE TRIGGER IF NOT EXISTS issues_fts_update AFTER UPDATE OF title, status_reason ON issues BEGIN
+    INSERT INTO issues_fts (issues_fts, rowid, title, status_reason)
+    VALUES ('delete', old.id, old.title, old.status_reason);
+    INSERT INTO issues_fts (rowid, title, status_reason) VALUES (new.id, new.title, new.status_reason);
+END;
+"""
+
+
+def open_index(base: str) -> sqlite3.Connection:
+    """Open (creating if needed) the index database for a triage repo."""
+    path = os.path.join(base, INDEX_PATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        conn.executescript("""
+            DROP TABLE IF EXISTS issues_fts;
+            DROP TABLE IF EXISTS issue_labels;
+            DROP TABLE IF EXISTS issues;
+        """)
+    conn.executescript(SCHEMA)
+    try:
+        conn.executescript(FTS_SCHEMA)
+    except sqlite3.OperationalError:
+        pass  # SQLite built without FTS5; text search falls back to LIKE
+    conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    return conn
+
+
+def has_fts(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'issues_fts'"
+    ).fetchone() is not None
+
+
+def _row_values(row: dict) -> list:
+    values = []
+    for col in COLUMNS:
+        value = row["has_fix"] if col == "has_candidate" else row.get(col)
+        if col in JSON_COLUMNS:
+            value = json.dumps(value or [])
+        elif col in BOOL_COLUMNS:
+            value = int(bool(value))
+        values.append(value)
+    return values
+
+
+def _check_issue(number: int, path: str, known: tuple | None) -> tuple | None:
+    """Stat an issue directory; parse it only if it differs from the indexed version.
+
+    Returns None if nothing changed, ("delete",) if the issue lost its analysis.json,
+    ("md", has_md) if only analysis.md appeared/disappeared, or ("upsert", keys, row).
+    """
+    analysis_key, github_key, has_md = issue_file_keys(path)
+    if analysis_key is None:
+        return ("delete",) if known else None
+    github_key = github_key or [None, None]
+    keys = (*analysis_key, *github_key)
+    if known and known[:4] == keys:
+        if bool(known[4]) == has_md:
+            return None
+        return ("md", has_md)
+    row = parse_issue(number, path, has_md)
+    if row is None:
+        return None
+    return ("upsert", keys, row)
+
+
+def sync_repo(conn: sqlite3.Connection, base: str, repo_key: str, max_workers: int | None = None) -> int:
+    """Bring the index for one repo up to date. Returns the number of rows changed."""
+    known = {
+        r["number"]: (r["analysis_mtime_ns"], r["analysis_size"], r["github_mtime_ns"], r["github_size"],
+                      r["has_analysis_md"])
+        for r in conn.execute(
+            "SELECT number, analysis_mtime_ns, analysis_size, github_mtime_ns, github_size, has_analysis_md "
+            "FROM issues WHERE repo_key = ?", (repo_key,))
+    }
+    issue_dirs = list_issue_dirs(base, repo_key)
+    workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda item: _check_issue(item[0], item[1], known.get(item[0])), issue_dirs))
+
+    present = {number for number, _path in issue_dirs}
+    changed = 0
+    placeholders = ", ".join("?" for _ in COLUMNS)
+    updates = ", ".join(f"{c} = excluded.{c}" for c in COLUMNS)
+    with conn:
+        for (number, _path), result in zip(issue_dirs, results):
+            if result is None:
+                continue
+            changed += 1
+            if result[0] == "delete":
+                conn.execute("DELETE FROM issues WHERE repo_key = ? AND number = ?", (repo_key, number))
+                continue
+            if result[0] == "md":
+                conn.execute("UPDATE issues SET has_analysis_md = ? WHERE repo_key = ? AND number = ?",
+                             (int(result[1]), repo_key, number))
+                continue
+            _kind, keys, row = result
+            conn.execute(
+                f"INSERT INTO issues (repo_key, number, analysis_mtime_ns, analysis_size, github_mtime_ns, "
+                f"github_size, {', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, {placeholders}) "
+                f"ON CONFLICT (repo_key, number) DO UPDATE SET analysis_mtime_ns = excluded.analysis_mtime_ns, "
+                f"analysis_size = excluded.analysis_size, github_mtime_ns = excluded.github_mtime_ns, "
+                f"github_size = excluded.github_size, {updates}",
+                (repo_key, number, *keys, *_row_values(row)),
+            )
+            issue_id = conn.execute("SELECT id FROM issues WHERE repo_key = ? AND number = ?",
+                                    (repo_key, number)).fetchone()[0]
+            conn.execute("DELETE FROM issue_labels WHERE issue_id = ?", (issue_id,))
+            conn.executemany("INSERT OR IGNORE INTO issue_labels (issue_id, label) VALUES (?, ?)",
+                             [(issue_id, label.lower()) for label in row["labels"] if label])
+        for number in known.keys() - present:
+            changed += 1
+            conn.execute("DELETE FROM issues WHERE repo_key = ? AND number = ?", (repo_key, number))
+    return changed
+
+
+def sync(conn: sqlite3.Connection, base: str, repo_keys: list[str] | None = None) -> int:
+    """Sync the given repos (default: every repo under issues/, dropping repos that are gone)."""
+    if repo_keys is None:
+        repo_keys = list_repo_keys(base)
+        with conn:
+            conn.execute(
+                f"DELETE FROM issues WHERE repo_key NOT IN ({', '.join('?' for _ in repo_keys)})", repo_keys
+            )
+    return sum(sync_repo(conn, base, key) for key in repo_keys)
+
+
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching all words (as prefixes)."""
+    words = [w.replace('"', '""') for w in text.split()]
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def filter_clause(conn: sqlite3.Connection, name: str) -> tuple[str | None, list]:
+    """SQL condition + params for a triage-status filter name (or free-text search)."""
+    if name in STATUS_FILTERS:
+        return "status = ?", [name]
+    if name == "needs-attention":
+        return f"status IN ({', '.join('?' for _ in ATTENTION_STATUSES)})", list(ATTENTION_STATUSES)
+    if name == "has-fix":
+        return "has_candidate = 1", []
+    if name == "no-fix":
+        return "status = 'reproduced' AND has_candidate = 0", []
+    if name == "stale":
+        return "(staleness = 'stale' OR status = 'stale')", []
+    if name == "should-close":
+        return f"status IN ({', '.join('?' for _ in CLOSE_STATUSES)})", list(CLOSE_STATUSES)
+    return search_clause(conn, name)
+
+
+def search_clause(conn: sqlite3.Connection, text: str) -> tuple[str | None, list]:
+    """SQL condition + params matching all words of text; no condition when text has no words.
+
+    An empty FTS5 MATCH expression is a syntax error, and a blank search matches everything in
+    triage_server.py and triage_stats.py as well.
+    """
+    if not text.split():
+        return None, []
+    if has_fts(conn):
+        return "id IN (SELECT rowid FROM issues_fts WHERE issues_fts MATCH ?)", [_fts_query(text)]
+    like = f"%{text}%"
+    return "(title LIKE ? OR status_reason LIKE ?)", [like, like]
+
+
+def _to_dict(r: sqlite3.Row) -> dict:
+    d = {"repo_key": r["repo_key"], "number": r["number"]}
+    for col in COLUMNS:
+        value = r[col]
+        if col in JSON_COLUMNS:
+            value = json.loads(value) if value else []
+        elif col in BOOL_COLUMNS:
+            value = bool(value)
+        d["has_fix" if col == "has_candidate" else col] = value
+    return d
+
+
+def query(conn: sqlite3.Connection, repo_key: str | None = None, filter_name: str | None = None,
+          search: str | None = None, number: int | None = None, label: str | None = None) -> list[dict]:
+    """Return matching issues as row dicts (same field names as triage_reports rows plus repo_key)."""
+    clauses, params = [], []
+    if repo_key:
+        clauses.append("repo_key = ?")
+        params.append(repo_key)
+    if number is not None:
+        clauses.append("number = ?")
+        params.append(number)
+    if label:
+        clauses.append("id IN (SELECT issue_id FROM issue_labels WHERE label = ?)")
+        params.append(label.lower())
+    for clause, clause_params in (
+        filter_clause(conn, filter_name) if filter_name else (None, None),
+        search_clause(conn, search) if search else (None, None),
+    ):
+        if clause:
+            clauses.append(clause)
+            params.extend(clause_params)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"SELECT * FROM issues {where} ORDER BY repo_key, number"
+    return [_to_dict(r) for r in conn.execute(sql, params)]
+
+
+def counts(conn: sqlite3.Connection, repo_key: str | None = None) -> dict:
+    """Per-repo aggregate counts for the triage-status statistics view."""
+    where, params = ("WHERE repo_key = ?", [repo_key]) if repo_key else ("", [])
+    result: dict[str, dict] = {}
+
+    def bucket(key):
+        return result.setdefault(key, {"total": 0, "by_status": {}, "by_category": {},
+                                       "fix_candidates": 0, "manually_investigated": 0})
+
+    for r in conn.execute(
+        f"SELECT repo_key, COUNT(*), SUM(has_candidate), SUM(manually_investigated) FROM issues {where} "
+        "GROUP BY repo_key", params):
+        b = bucket(r[0])
+        b["total"], b["fix_candidates"], b["manually_investigated"] = r[1], r[2] or 0, r[3] or 0
+    for col, key in (("status", "by_status"), ("category", "by_category")):
+        for r in conn.execute(
+            f"SELECT repo_key, {col}, COUNT(*) FROM issues {where} GROUP BY repo_key, {col}", params):
+            bucket(r[0])[key][r[1] or ""] = r[2]
+    return result
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: triage_index.py <triage_root> [--repo <owner/repo>] [--filter <filter>] "
+              "[--search <text>] [--label <label>] [--issue <number>] [--counts] [--no-sync]", file=sys.stderr)
+        sys.exit(1)
+
+    base = os.path.abspath(sys.argv[1])
+
+    def option(name):
+        if name in sys.argv:
+            idx = sys.argv.index(name)
+            if idx + 1 < len(sys.argv):
+                return sys.argv[idx + 1]
+        return None
+
+    repo = option("--repo")
+    repo_key = repo.replace("/", "-", 1) if repo else None
+    issue = option("--issue")
+
+    conn = open_index(base)
+    if "--no-sync" not in sys.argv:
+        sync(conn, base, [repo_key] if repo_key else None)
+
+    if "--counts" in sys.argv:
+        result = {"repos": counts(conn, repo_key)}
+    else:
+        result = {"issues": query(conn, repo_key, option("--filter"), option("--search"),
+                                  int(issue) if issue else None, option("--label"))}
+    conn.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Thin client for triage_server.py; falls back to triage_index.py when no server is running.
+
+Usage:
+    python triage_query.py <triage_root> [--repo <owner/repo>] [--filter <filter>] [--search <text>]
+                           [--label <label>] [--issue <number>] [--areas] [--counts]
+    python triage_query.py <triage_root> --server-status | --refresh | --shutdown
+
+The query flags and the output are the same as triage_index.py's. --areas adds each issue's
+dashboard area ("area"), classified with the repo's rules from config/repos.yaml. It needs a
+running server. --server-status, --refresh (rescan now) and --shutdown talk to the server only.
+
+Requests are one JSON line over the server's Unix domain socket
+(.bookkeeping/triage-server.sock, see socket_path()); the reply is one JSON line,
+{"ok": true, "result": ...} or {"ok": false, "error": "..."}. This module only imports the
+standard library pieces it needs, so a query costs an interpreter start plus a round trip.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sys
+import tempfile
+
+SOCKET_NAME = os.path.join(".bookkeeping", "triage-server.sock")
+# sun_path is 108 bytes on Linux and 104 on macOS.
+MAX_SOCKET_PATH = 100
+
+
+def socket_path(base: str) -> str:
+    """Where the server for a triage root listens; a short temp path if the root's path is too long."""
+    path = os.path.join(os.path.abspath(base), SOCKET_NAME)
+    if len(os.fsencode(path)) <= MAX_SOCKET_PATH:
+        return path
+    digest = hashlib.sha256(os.fsencode(os.path.abspath(base))).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"triage-server-{digest}.sock")
+
+
+def request(base: str, message: dict, timeout: float = 30.0) -> dict | None:
+    """Send one request to the server for base; returns its reply, or None if no server is listening."""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path(base))
+    except OSError:
+        sock.close()
+        return None
+    with sock, sock.makefile("rwb") as f:
+        f.write(json.dumps(message).encode("utf-8") + b"\n")
+        f.flush()
+        line = f.readline()
+    if not line:
+        return {"ok": False, "error": "server closed the connection"}
+    return json.loads(line)
+
+
+def _local_query(base: str, message: dict) -> dict:
+    """Answer a query the way the server would, from the SQLite index."""
+    from triage_index import counts, open_index, query, sync
+
+    repo_key = message["repo"].replace("/", "-", 1) if message.get("repo") else None
+    conn = open_index(base)
+    try:
+        sync(conn, base, [repo_key] if repo_key else None)
+        if message["op"] == "counts":
+            return {"repos": counts(conn, repo_key)}
+        return {"issues": query(conn, repo_key, message.get("filter"), message.get("search"),
+                                message.get("issue"), message.get("label"))}
+    finally:
+        conn.close()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: triage_query.py <triage_root> [--repo <owner/repo>] [--filter <filter>] [--search <text>] "
+              "[--label <label>] [--issue <number>] [--areas] [--counts] | --server-status | --refresh | --shutdown",
+              file=sys.stderr)
+        sys.exit(1)
+
+    base = os.path.abspath(sys.argv[1])
+
+    def option(name):
+        if name in sys.argv:
+            idx = sys.argv.index(name)
+            if idx + 1 < len(sys.argv):
+                return sys.argv[idx + 1]
+        return None
+
+    for flag, op in (("--server-status", "status"), ("--refresh", "refresh"), ("--shutdown", "shutdown")):
+        if flag in sys.argv:
+            reply = request(base, {"op": op})
+            if reply is None:
+                print(f"Error: no triage server listening on {socket_path(base)}", file=sys.stderr)
+                sys.exit(1)
+            break
+    else:
+        issue = option("--issue")
+        message = {"op": "counts" if "--counts" in sys.argv else "query", "repo": option("--repo"),
+                   "filter": option("--filter"), "search": option("--search"), "label": option("--label"),
+                   "issue": int(issue) if issue else None, "areas": "--areas" in sys.argv}
+        reply = request(base, message)
+        if reply is None:
+            if message["areas"]:
+                print("Error: --areas needs a running triage server (triage_server.py)", file=sys.stderr)
+                sys.exit(1)
+            reply = {"ok": True, "result": _local_query(base, message)}
+
+    if not reply.get("ok"):
+        print(f"Error: {reply.get('error')}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(reply["result"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""Load normalized triage rows for a repo, backed by an incremental on-disk cache.
+
+Usage:
+    python triage_reports.py <triage_root> [--repo <owner/repo>] [--no-cache]
+
+Reads issues/<owner>-<repo>/<N>/analysis.json + github.json and reduces each issue to the
+flat fields the dashboard and status views use (title, state, status, category, has_fix, ...).
+
+The normalized rows are cached per repo in .bookkeeping/report-cache/<owner>-<repo>.json,
+keyed by each file's path, mtime and size. On the next run only issues whose analysis.json
+or github.json changed are re-parsed, and issue directories that no longer exist are
+evicted. Pass --no-cache to ignore (and not update) the cache. Loading rows has no other
+side effects; status transitions are recorded by status_events.py sync.
+
+Output format (JSON to stdout):
+{
+  "repos": [
+    {"repo_key": "dotnet-diagnostics", "rows": [{"number": 1234, "status": "reproduced", ...}]}
+  ]
+}
+"""
+
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+CACHE_VERSION = 2
+CACHE_DIR = os.path.join(".bookkeeping", "report-cache")
+
+
+def last_logged_at(log) -> float | None:
+    """Epoch seconds of the newest "<ISO 8601 timestamp> — ..." log heading, or None if there is none.
+
+    Timestamps without a UTC offset are taken as UTC.
+    """
+    latest = None
+    for entry in log if isinstance(log, list) else []:
+        heading = entry.get("heading") if isinstance(entry, dict) else None
+        if not isinstance(heading, str):
+            continue
+        try:
+            dt = datetime.fromisoformat(heading.split("—", 1)[0].strip())
+        except ValueError:
+            continue
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        ts = dt.timestamp()
+        if latest is None or ts > latest:
+            latest = ts
+    return latest
+
+
+def normalize_report(r: dict) -> dict:
+    """Reduce one reports_json entry ({number, has_analysis_md, data, github}) to a flat row.
+
+    Handles the current split schema (github.json + analysis.json triage/fix sections) and the
+    legacy single-file analysis.json layout. `url` is empty when the report doesn't carry one;
+    callers build the default GitHub URL themselves. `logged_at` is the time of the newest log
+    entry (see last_logged_at).
+    """
+    d = r["data"]
+    gh = r.get("github") or {}
+    row = {
+        "number": r["number"],
+        "has_analysis_md": r.get("has_analysis_md", r.get("has_report_md", False)),
+    }
+
+    # Get issue data from github.json if available, fall back to analysis.json legacy fields
+    gh_issue = (gh.get("issue", {}).get("data") or {}) if gh else {}
+    triage = d.get("triage", {})
+    fix = d.get("fix", {})
+
+    if gh_issue:
+        row["title"] = gh_issue.get("title", "")
+        row["state"] = gh_issue.get("state", "open")
+        row["url"] = gh_issue.get("html_url", gh_issue.get("url", ""))
+        row["labels"] = [l if isinstance(l, str) else l.get("name", "") for l in gh_issue.get("labels", [])]
+        row["assignees"] = [a.get("login", a) if isinstance(a, dict) else a for a in gh_issue.get("assignees", [])]
+    else:
+        # Legacy: issue data was in analysis.json (pre-migration)
+        issue = d.get("issue", {})
+        if issue:
+            row["title"] = issue.get("title", "")
+            row["state"] = issue.get("state", "open")
+            row["url"] = issue.get("url", "")
+            row["labels"] = issue.get("labels", [])
+            row["assignees"] = issue.get("assignees", [])
+        else:
+            row["title"] = d.get("title", "")
+            row["state"] = d.get("state", "open")
+            row["url"] = d.get("url", "")
+            row["labels"] = d.get("labels", [])
+            assignee = d.get("assignee", "")
+            row["assignees"] = d.get("assignees", [assignee] if assignee else [])
+        row["labels"] = [l if isinstance(l, str) else l.get("name", "") for l in row["labels"]]
+
+    # manually_investigated moved to triage in new schema
+    row["manually_investigated"] = triage.get("manually_investigated", d.get("issue", {}).get("manually_investigated", False))
+
+    if triage:
+        row["category"] = triage.get("category", "")
+        row["status"] = triage.get("status", "")
+        row["status_reason"] = triage.get("status_reason", "")
+        row["affected_repo"] = triage.get("affected_repo", "")
+        row["actionability"] = triage.get("actionability", "low")
+        row["blocked_reason"] = triage.get("blocked_reason", "")
+        row["staleness"] = triage.get("staleness", "")
+        row["requires_platform"] = triage.get("requires_platform", [])
+    else:
+        row["category"] = d.get("category", "")
+        row["status"] = d.get("status", "")
+        row["status_reason"] = d.get("status_reason", d.get("summary", ""))
+        row["affected_repo"] = d.get("affected_repo", "")
+        row["actionability"] = d.get("actionability", d.get("priority", "low"))
+        row["blocked_reason"] = d.get("blocked_reason", "")
+        row["staleness"] = d.get("staleness", "")
+        row["requires_platform"] = d.get("requires_platform", [])
+
+    if fix:
+        row["has_fix"] = fix.get("has_candidate", False)
+        row["fix_confidence"] = fix.get("confidence")
+        row["fix_branch"] = fix.get("branch", "")
+    else:
+        row["has_fix"] = bool(d.get("fix_branch") or d.get("fix_available")
+                              or d.get("status", "") in ("fix-candidate", "fix-identified"))
+        row["fix_confidence"] = None
+        row["fix_branch"] = d.get("fix_branch", "")
+    row["logged_at"] = last_logged_at(d.get("log"))
+    return row
+
+
+def _file_key(path: str) -> list[int] | None:
+    """[mtime_ns, size] for a file, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _load_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def issue_file_keys(path: str) -> tuple[list[int] | None, list[int] | None, bool]:
+    """Stat an issue directory: (analysis.json key, github.json key, analysis.md exists).
+
+    A key is [mtime_ns, size], or None when the file is missing.
+    """
+    return (
+        _file_key(os.path.join(path, "analysis.json")),
+        _file_key(os.path.join(path, "github.json")),
+        os.path.isfile(os.path.join(path, "analysis.md")),
+    )
+
+
+def parse_issue(number: int, path: str, has_md: bool) -> dict | None:
+    """Read and normalize one issue directory, or None if analysis.json is unreadable.
+
+    analysis.json and github.json must each hold a JSON object; anything else is treated like
+    unreadable JSON.
+    """
+    try:
+        data = _load_json(os.path.join(path, "analysis.json"))
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: skipping {path}: {e}", file=sys.stderr)
+        return None
+    if not isinstance(data, dict):
+        print(f"Warning: skipping {path}: analysis.json is not a JSON object", file=sys.stderr)
+        return None
+    github = None
+    github_path = os.path.join(path, "github.json")
+    if os.path.exists(github_path):
+        try:
+            github = _load_json(github_path)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: ignoring github.json in {path}: {e}", file=sys.stderr)
+        if github is not None and not isinstance(github, dict):
+            print(f"Warning: ignoring github.json in {path}: not a JSON object", file=sys.stderr)
+            github = None
+    return normalize_report({"number": number, "has_analysis_md": has_md, "data": data, "github": github})
+
+
+def list_issue_dirs(base: str, repo_key: str) -> list[tuple[int, str]]:
+    """(number, path) for every numeric directory under issues/<repo_key>/, sorted by number."""
+    repo_dir = os.path.join(base, "issues", repo_key)
+    if not os.path.isdir(repo_dir):
+        return []
+    with os.scandir(repo_dir) as it:
+        return sorted((int(e.name), e.path) for e in it if e.name.isdigit() and e.is_dir())
+
+
+def list_repo_keys(base: str) -> list[str]:
+    """Every <owner>-<repo> directory under issues/."""
+    issues_dir = os.path.join(base, "issues")
+    if not os.path.isdir(issues_dir):
+        return []
+    with os.scandir(issues_dir) as it:
+        return sorted(e.name for e in it if e.is_dir() and not e.name.startswith("."))
+
+
+def _refresh_issue(number: int, path: str, cached: dict | None) -> dict | None:
+    """Return the cache entry for one issue directory, re-parsing only if its files changed."""
+    analysis_key, github_key, has_md = issue_file_keys(path)
+    if analysis_key is None:
+        return None
+
+    if cached and cached["a"] == analysis_key and cached["g"] == github_key:
+        if cached["row"]["has_analysis_md"] != has_md:
+            cached["row"]["has_analysis_md"] = has_md
+            cached["dirty"] = True
+        return cached
+
+    row = parse_issue(number, path, has_md)
+    if row is None:
+        return None
+    return {"a": analysis_key, "g": github_key, "row": row, "dirty": True}
+
+
+def _cache_path(base: str, repo_key: str) -> str:
+    return os.path.join(base, CACHE_DIR, f"{repo_key}.json")
+
+
+def _read_cache(path: str) -> dict:
+    try:
+        cache = _load_json(path)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("issues", {})
+
+
+def _write_cache(path: str, entries: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "issues": entries}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def refresh_entries(base: str, repo_key: str, cached: dict,
+                    max_workers: int | None = None) -> tuple[dict, bool]:
+    """Bring per-issue entries ({"<N>": {"a", "g", "row"}}) up to date with issues/<repo_key>/.
+
+    Returns (entries, changed). Unchanged issues keep their entry; changed ones are re-parsed
+    in a thread pool; issue directories that are gone (or lost analysis.json) are dropped.
+    """
+    issue_dirs = list_issue_dirs(base, repo_key)
+    if not issue_dirs:
+        return {}, False
+
+    workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        entries = list(pool.map(lambda item: _refresh_issue(item[0], item[1], cached.get(str(item[0]))),
+                                issue_dirs))
+
+    fresh = {}
+    dirty = False
+    for (number, _path), entry in zip(issue_dirs, entries):
+        if entry is None:
+            continue
+        dirty = dirty or entry.pop("dirty", False)
+        fresh[str(number)] = entry
+    # Entries for deleted issue directories (or ones that lost analysis.json) are dropped.
+    dirty = dirty or len(fresh) != len(cached)
+    return fresh, dirty
+
+
+def report_cache_stamp(base: str, repo_key: str) -> list[int] | None:
+    """[mtime_ns, size] of a repo's report cache file (changes whenever load_rows rewrites it)."""
+    return _file_key(_cache_path(base, repo_key))
+
+
+def load_rows(base: str, repo_key: str, use_cache: bool = True, max_workers: int | None = None,
+              sync: bool = True) -> list[dict]:
+    """Return normalized rows for every triaged issue in issues/<repo_key>/, sorted by number.
+
+    Unchanged issues come from the cache; changed ones are re-parsed in a thread pool.
+    sync=False skips stat'ing the issue tree and returns the cached rows as they are (a full
+    load when there is no cache yet).
+    """
+    cache_path = _cache_path(base, repo_key)
+    cached = _read_cache(cache_path) if use_cache else {}
+    if cached and not sync:
+        return [entry["row"] for entry in cached.values()]
+    fresh, dirty = refresh_entries(base, repo_key, cached, max_workers)
+
+    if use_cache and dirty:
+        try:
+            _write_cache(cache_path, fresh)
+        except OSError as e:
+            print(f"Warning: could not write report cache {cache_path}: {e}", file=sys.stderr)
+    return [entry["row"] for entry in fresh.values()]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: triage_reports.py <triage_root> [--repo <owner/repo>] [--no-cache]", file=sys.stderr)
+        sys.exit(1)
+
+    base = os.path.abspath(sys.argv[1])
+    use_cache = "--no-cache" not in sys.argv
+    repo_keys = []
+    if "--repo" in sys.argv:
+        idx = sys.argv.index("--repo")
+        if idx + 1 < len(sys.argv):
+            repo_keys.append(sys.argv[idx + 1].replace("/", "-", 1))
+    else:
+        repo_keys = list_repo_keys(base)
+
+    result = {"repos": [{"repo_key": key, "rows": load_rows(base, key, use_cache)} for key in repo_keys]}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
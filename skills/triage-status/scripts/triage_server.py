@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Resident query server that keeps every triaged issue of a triage repo in memory.
+
+Usage:
+    python triage_server.py <triage_root> [--interval <seconds>]
+
+Loads issues/<owner>-<repo>/<N>/analysis.json + github.json for every repo once (through
+triage_reports.refresh_entries, the same parsing the report cache uses) and the compiled config
+(triage_config.load_config), then answers queries on a Unix domain socket until interrupted.
+triage_query.py is the client; see there for the socket path and wire format.
+
+Every --interval seconds (default: POLL_INTERVAL) a background thread stats the issue tree and
+re-parses only the issues whose analysis.json or github.json changed, adds new issue
+directories and repos, and drops deleted ones; the config is reloaded when repos.yaml or
+local.yaml change. A query sees at most one interval of lag; the "refresh" op rescans at once.
+
+Ops (the "op" field of a request):
+    query      {"repo", "filter", "search", "label", "issue", "areas"} -> {"issues": [...]}
+               (filters and fields as in triage_index.py; "areas" adds each issue's "area")
+    counts     {"repo"} -> {"repos": {"<owner>-<repo>": {"total", "by_status", ...}}}
+    classify   {"repo": "owner/repo", "labels", "affected_repo", "title"} -> {"area": "..."}
+    status     -> {"pid", "issues", "repos", "refreshed_at", "refresh_s"}
+    refresh    rescan now -> {"changed_repos": N}
+    shutdown   stop the server
+"""
+
+import json
+import os
+import re
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from triage_config import load_config
+from triage_index import ATTENTION_STATUSES, CLOSE_STATUSES, COLUMNS, STATUS_FILTERS
+from triage_query import request, socket_path
+from triage_reports import list_repo_keys, refresh_entries
+
+POLL_INTERVAL = 5
+
+
+def _issue_dict(repo_key: str, row: dict) -> dict:
+    """A row in triage_index.py's output shape."""
+    d = {"repo_key": repo_key, "number": row["number"]}
+    for col in COLUMNS:
+        key = "has_fix" if col == "has_candidate" else col
+        value = row.get(key)
+        if col in ("has_candidate", "manually_investigated", "has_analysis_md"):
+            value = bool(value)
+        elif col in ("labels", "assignees", "requires_platform"):
+            value = value or []
+        d[key] = value
+    return d
+
+
+def _search_matcher(text: str):
+    """All words must start a word in title or status_reason, like triage_index's FTS prefix query."""
+    patterns = [re.compile(r"\b" + re.escape(w.lower())) for w in text.split()]
+    return lambda row: all(p.search(f"{row.get('title') or ''} {row.get('status_reason') or ''}".lower())
+                           for p in patterns)
+
+
+def _filter_matcher(name: str):
+    """Predicate for a triage-status filter name (or free-text search), as in triage_index.filter_clause."""
+    if name in STATUS_FILTERS:
+        return lambda row: row.get("status") == name
+    if name == "needs-attention":
+        return lambda row: row.get("status") in ATTENTION_STATUSES
+    if name == "has-fix":
+        return lambda row: bool(row.get("has_fix"))
+    if name == "no-fix":
+        return lambda row: row.get("status") == "reproduced" and not row.get("has_fix")
+    if name == "stale":
+        return lambda row: row.get("staleness") == "stale" or row.get("status") == "stale"
+    if name == "should-close":
+        return lambda row: row.get("status") in CLOSE_STATUSES
+    return _search_matcher(name)
+
+
+def _counts(rows: list[dict]) -> dict:
+    """One repo's entry in the counts op, as triage_index.counts() builds it."""
+    b = {"total": 0, "by_status": {}, "by_category": {}, "fix_candidates": 0, "manually_investigated": 0}
+    for row in rows:
+        b["total"] += 1
+        status, category = row.get("status") or "", row.get("category") or ""
+        b["by_status"][status] = b["by_status"].get(status, 0) + 1
+        b["by_category"][category] = b["by_category"].get(category, 0) + 1
+        b["fix_candidates"] += bool(row.get("has_fix"))
+        b["manually_investigated"] += bool(row.get("manually_investigated"))
+    b["by_status"], b["by_category"] = dict(sorted(b["by_status"].items())), dict(sorted(b["by_category"].items()))
+    return b
+
+
+class RepoView:
+    """One repo's rows in number order, indexed by number, with its counts precomputed."""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.by_number = {row["number"]: row for row in rows}
+        self.counts = _counts(rows)
+
+
+class TriageState:
+    """All repos' issue rows, swapped in whole after each refresh so readers never see a partial scan."""
+
+    def __init__(self, base: str):
+        self.base = base
+        self.entries: dict[str, dict] = {}  # repo_key -> triage_reports cache entries
+        self.rows: dict[str, RepoView] = {}  # repo_key -> RepoView
+        self.config = None
+        self.config_error = None
+        self.refreshed_at = None
+        self.refresh_s = None
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """Rescan the issue tree and config; returns how many repos changed."""
+        with self._refresh_lock:
+            start = time.monotonic()
+            entries, rows, changed = {}, {}, 0
+            for key in list_repo_keys(self.base):
+                fresh, dirty = refresh_entries(self.base, key, self.entries.get(key, {}))
+                if not fresh:
+                    continue
+                entries[key] = fresh
+                if dirty or key not in self.rows:
+                    rows[key] = RepoView([e["row"] for e in fresh.values()])  # already in number order
+                    changed += 1
+                else:
+                    rows[key] = self.rows[key]
+            changed += len(self.rows.keys() - rows.keys())
+            try:
+                config, config_error = load_config(self.base), None
+            except (OSError, ImportError) as e:
+                config, config_error = None, f"{type(e).__name__}: {e}"
+            # Plain attribute assignments; a query reads self.rows once and uses that snapshot.
+            self.entries, self.rows = entries, rows
+            self.config, self.config_error = config, config_error
+            self.refreshed_at = time.time()
+            self.refresh_s = round(time.monotonic() - start, 4)
+            return changed
+
+    def _area(self, repo_key: str):
+        if self.config is None:
+            raise ValueError(f"config unavailable ({self.config_error})")
+        repo = next((k for k in self.config.repo_keys if k.replace("/", "-", 1) == repo_key), None)
+        if repo is None:
+            return lambda row: None
+        classifier = self.config.classifier(repo)
+        return lambda row: classifier.classify(row.get("labels") or [], row.get("affected_repo"), row.get("title"))
+
+    def query(self, repo=None, filter=None, search=None, label=None, issue=None, areas=False, **_):
+        rows = self.rows
+        keys = [repo.replace("/", "-", 1)] if repo else sorted(rows)
+        checks = []
+        if label:
+            wanted = label.lower()
+            checks.append(lambda row: any(l.lower() == wanted for l in row.get("labels") or []))
+        if filter:
+            checks.append(_filter_matcher(filter))
+        if search:
+            checks.append(_search_matcher(search))
+        result = []
+        for key in keys:
+            view = rows.get(key)
+            if view is None:
+                continue
+            area = self._area(key) if areas else None
+            if issue is None:
+                candidates = view.rows
+            else:
+                candidates = [view.by_number[int(issue)]] if int(issue) in view.by_number else []
+            for row in candidates:
+                if all(check(row) for check in checks):
+                    d = _issue_dict(key, row)
+                    if area is not None:
+                        d["area"] = area(row)
+                    result.append(d)
+        return {"issues": result}
+
+    def counts(self, repo=None, **_):
+        rows = self.rows
+        keys = [repo.replace("/", "-", 1)] if repo else sorted(rows)
+        return {"repos": {key: rows[key].counts for key in keys if key in rows}}
+
+    def classify(self, repo, labels=(), affected_repo="", title="", **_):
+        row = {"labels": labels, "affected_repo": affected_repo, "title": title}
+        return {"area": self._area(repo.replace("/", "-", 1))(row)}
+
+    def status(self):
+        rows = self.rows
+        return {"pid": os.getpid(), "issues": sum(len(view.rows) for view in rows.values()), "repos": sorted(rows),
+                "refreshed_at": self.refreshed_at, "refresh_s": self.refresh_s}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        state: TriageState = self.server.state
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            message = json.loads(line)
+            op = message.pop("op", None)
+            if op in ("query", "counts", "classify"):
+                result = getattr(state, op)(**message)
+            elif op == "status":
+                result = state.status()
+            elif op == "refresh":
+                result = {"changed_repos": state.refresh()}
+            elif op == "shutdown":
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                result = {"stopping": True}
+            else:
+                raise ValueError(f"unknown op {op!r}")
+            reply = {"ok": True, "result": result}
+        except (ValueError, TypeError, KeyError) as e:
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _refresh_loop(state: TriageState, interval: float, stop: threading.Event) -> None:
+    while not stop.wait(interval):
+        try:
+            state.refresh()
+        except Exception as e:  # one bad refresh (e.g. a malformed report) mustn't stop polling
+            print(f"triage-server: refresh failed: {type(e).__name__}: {e}", file=sys.stderr)
+
+
+def serve(base: str, interval: float = POLL_INTERVAL) -> None:
+    path = socket_path(base)
+    if os.path.exists(path):
+        if request(base, {"op": "status"}, timeout=5) is not None:
+            print(f"Error: a triage server is already listening on {path}", file=sys.stderr)
+            sys.exit(1)
+        os.remove(path)  # left behind by a server that died
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    state = TriageState(base)
+    state.refresh()
+    status = state.status()
+    print(f"triage-server: {status['issues']} issues in {len(status['repos'])} repos loaded in "
+          f"{state.refresh_s:.2f}s; listening on {path}", file=sys.stderr)
+
+    old_umask = os.umask(0o077)  # the socket is only for this user
+    try:
+        server = _Server(path, _Handler)
+    finally:
+        os.umask(old_umask)
+    server.state = state
+    stop = threading.Event()
+    threading.Thread(target=_refresh_loop, args=(state, interval, stop), daemon=True).start()
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+        print("triage-server: stopped", file=sys.stderr)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: triage_server.py <triage_root> [--interval <seconds>]", file=sys.stderr)
+        sys.exit(1)
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: this platform has no Unix domain sockets; use triage_index.py directly", file=sys.stderr)
+        sys.exit(1)
+    interval = POLL_INTERVAL
+    if "--interval" in sys.argv:
+        idx = sys.argv.index("--interval")
+        if idx + 1 < len(sys.argv):
+            interval = float(sys.argv[idx + 1])
+    serve(os.path.abspath(sys.argv[1]), interval)
+
+
+if __name__ == "__main__":
+    main()
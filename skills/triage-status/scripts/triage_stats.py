@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""Triage statistics and filters over a columnar copy of the triage fields.
+
+Usage:
+    python triage_stats.py <triage_root> [--repo <owner/repo>] [--filter <filter>] [--no-sync]
+
+Each repo's rows (from triage_reports.load_rows) are stored column by column: issue numbers in
+an array, status, category, actionability, state and staleness as one byte per issue indexing a
+per-column vocabulary, has_fix and manually_investigated as 0/1 bytes, and requires_platform as
+one byte of platform bits. Titles and status reasons are kept as plain lists for `list`/`full`
+output only.
+
+Every statistic is a count over those bytes: bytes.count() for a single value, and for
+combinations (status x has_fix, platform-blocked x platform) the columns are translated into
+0/1 byte masks, read as Python ints and combined with & and |, so int.bit_count() counts the
+issues. Filters are masks too; only the matching positions are turned back into issues.
+
+The columns are cached per repo with marshal in .bookkeeping/stats-cache/<owner>-<repo>.marshal,
+stamped with the report cache file they were built from. By default the repo is synced first
+(load_rows stats the issue tree); --no-sync uses the cached columns as long as the report cache
+hasn't changed since, which makes follow-up queries a file read plus the counting.
+
+Output format (JSON to stdout):
+    {"repos": {"dotnet-diagnostics": {"total": N, "by_status": {...}, "with_fix_by_status": {...},
+               "platform_blocked": {"windows": N, ...}, "by_category": {...}, "fix_candidates": N,
+               "fix_candidate_pct_of_bugs": 12.5, "manually_investigated": N, ...}},
+     "all": {...the same counts summed over the repos...}}
+With --filter:
+    {"issues": [{"repo_key": "dotnet-diagnostics", "number": 1234, "status": "reproduced", ...}]}
+"""
+
+import json
+import marshal
+import os
+import re
+import sys
+from array import array
+
+from triage_index import ATTENTION_STATUSES, CLOSE_STATUSES, STATUS_FILTERS
+from triage_reports import list_repo_keys, load_rows, report_cache_stamp
+
+CACHE_VERSION = 1
+CACHE_DIR = os.path.join(".bookkeeping", "stats-cache")
+
+CODED = ("status", "category", "actionability", "state", "staleness")
+FLAGS = ("has_fix", "manually_investigated")
+PLATFORMS = ("windows", "linux", "macos")
+OTHER_PLATFORM = 1 << len(PLATFORMS)
+
+
+def _platform_bits(platforms) -> int:
+    bits = 0
+    for p in platforms or ():
+        p = str(p).lower()
+        bits |= 1 << PLATFORMS.index(p) if p in PLATFORMS else (OTHER_PLATFORM if p not in ("", "any") else 0)
+    return bits
+
+
+def _table(predicate) -> bytes:
+    """bytes.translate table mapping each byte value to 1 where predicate(value) holds, else 0."""
+    return bytes(1 if predicate(v) else 0 for v in range(256))
+
+
+class IssueColumns:
+    """One repo's triage fields, one array or byte string per field."""
+
+    def __init__(self, repo_key: str, numbers: array, vocab: dict[str, list[str]], codes: dict[str, bytes],
+                 flags: dict[str, bytes], platforms: bytes, titles: list[str], reasons: list[str]):
+        self.repo_key = repo_key
+        self.numbers = numbers
+        self.vocab = vocab  # column -> values; a byte in codes[column] indexes this list
+        self.codes = codes
+        self.flags = flags
+        self.platforms = platforms
+        self.titles = titles
+        self.reasons = reasons
+        self.size = len(numbers)
+
+    @classmethod
+    def from_rows(cls, repo_key: str, rows: list[dict]) -> "IssueColumns":
+        vocab, codes = {}, {}
+        for col in CODED:
+            values, index, buf = [], {}, bytearray(len(rows))
+            for i, row in enumerate(rows):
+                value = row.get(col) or ""
+                code = index.get(value)
+                if code is None:
+                    if len(values) == 256:
+                        raise ValueError(f"{repo_key}: more than 256 distinct {col} values")
+                    code = index[value] = len(values)
+                    values.append(value)
+                buf[i] = code
+            vocab[col], codes[col] = values, bytes(buf)
+        flags = {col: bytes(1 if row.get(col) else 0 for row in rows) for col in FLAGS}
+        platforms = bytes(_platform_bits(row.get("requires_platform")) for row in rows)
+        return cls(repo_key, array("q", (row["number"] for row in rows)), vocab, codes, flags, platforms,
+                   [row.get("title") or "" for row in rows], [row.get("status_reason") or "" for row in rows])
+
+    def to_dict(self) -> dict:
+        return {"numbers": self.numbers.tobytes(), "vocab": self.vocab, "codes": self.codes, "flags": self.flags,
+                "platforms": self.platforms, "titles": self.titles, "reasons": self.reasons}
+
+    @classmethod
+    def from_dict(cls, repo_key: str, d: dict) -> "IssueColumns":
+        numbers = array("q")
+        numbers.frombytes(d["numbers"])
+        return cls(repo_key, numbers, d["vocab"], d["codes"], d["flags"], d["platforms"], d["titles"], d["reasons"])
+
+    # Masks: ints whose byte i is 1 when issue i matches (little-endian), so & and | combine
+    # them and bit_count() counts the issues.
+
+    def mask(self, column: str, *values: str) -> int:
+        wanted = {i for i, v in enumerate(self.vocab[column]) if v in values}
+        if not wanted:
+            return 0
+        return int.from_bytes(self.codes[column].translate(_table(wanted.__contains__)), "little")
+
+    def flag(self, column: str) -> int:
+        return int.from_bytes(self.flags[column], "little")
+
+    def platform_mask(self, bits: int) -> int:
+        return int.from_bytes(self.platforms.translate(_table(lambda v: v & bits)), "little")
+
+    def count_by(self, column: str, mask: int | None = None) -> dict[str, int]:
+        """Count per value of a coded column, over all issues or only those in mask."""
+        if mask is None:
+            data = self.codes[column]
+            counts = {value: data.count(code) for code, value in enumerate(self.vocab[column])}
+        else:
+            counts = {value: (self.mask(column, value) & mask).bit_count() for value in self.vocab[column]}
+        return {value: n for value, n in sorted(counts.items()) if n}
+
+    def filter_mask(self, name: str) -> int:
+        """Mask for a triage-status filter name, as in triage_index.filter_clause (else a text search)."""
+        if name in STATUS_FILTERS:
+            return self.mask("status", name)
+        if name == "needs-attention":
+            return self.mask("status", *ATTENTION_STATUSES)
+        if name == "has-fix":
+            return self.flag("has_fix")
+        if name == "no-fix":
+            return self.mask("status", "reproduced") & ~self.flag("has_fix")
+        if name == "stale":
+            return self.mask("staleness", "stale") | self.mask("status", "stale")
+        if name == "should-close":
+            return self.mask("status", *CLOSE_STATUSES)
+        return self.search_mask(name)
+
+    def search_mask(self, text: str) -> int:
+        """Every word starts a word in the title or status_reason (triage_index's FTS prefix query)."""
+        patterns = [re.compile(r"\b" + re.escape(w.lower())) for w in text.split()]
+        hits = bytes(1 if all(p.search(f"{t} {r}".lower()) for p in patterns) else 0
+                     for t, r in zip(self.titles, self.reasons))
+        return int.from_bytes(hits, "little")
+
+    def positions(self, mask: int) -> list[int]:
+        return [m.start() for m in re.finditer(b"\x01", mask.to_bytes(self.size, "little"))]
+
+    def issue(self, i: int) -> dict:
+        d = {"repo_key": self.repo_key, "number": self.numbers[i]}
+        for col in CODED:
+            d[col] = self.vocab[col][self.codes[col][i]]
+        for col in FLAGS:
+            d[col] = bool(self.flags[col][i])
+        bits = self.platforms[i]
+        d["requires_platform"] = [p for n, p in enumerate(PLATFORMS) if bits & 1 << n] + \
+            (["other"] if bits & OTHER_PLATFORM else [])
+        d["title"], d["status_reason"] = self.titles[i], self.reasons[i]
+        return d
+
+    def stats(self) -> dict:
+        has_fix = self.flag("has_fix")
+        blocked = self.mask("status", "platform-blocked")
+        bugs = self.mask("category", "bug")
+        fixes = has_fix.bit_count()
+        return {
+            "total": self.size,
+            "by_status": self.count_by("status"),
+            "with_fix_by_status": self.count_by("status", has_fix),
+            "platform_blocked": {p: (blocked & self.platform_mask(1 << n)).bit_count()
+                                 for n, p in enumerate(PLATFORMS)},
+            "by_category": self.count_by("category"),
+            "by_actionability": self.count_by("actionability"),
+            "by_state": self.count_by("state"),
+            "fix_candidates": fixes,
+            "fix_candidates_in_bugs": (bugs & has_fix).bit_count(),
+            "bugs": bugs.bit_count(),
+            "manually_investigated": self.flags["manually_investigated"].count(1),
+        }
+
+
+def merge_stats(stats: list[dict]) -> dict:
+    """Sum per-repo stats into the cross-repo "all" entry."""
+    total: dict = {}
+    for s in stats:
+        for key, value in s.items():
+            if isinstance(value, dict):
+                bucket = total.setdefault(key, {})
+                for k, n in value.items():
+                    bucket[k] = bucket.get(k, 0) + n
+            else:
+                total[key] = total.get(key, 0) + value
+    for key, value in total.items():
+        if isinstance(value, dict):
+            total[key] = dict(sorted(value.items()))
+    return total
+
+
+def _with_pct(s: dict) -> dict:
+    s["fix_candidate_pct_of_bugs"] = round(100 * s["fix_candidates_in_bugs"] / s["bugs"], 1) if s["bugs"] else None
+    return s
+
+
+def _cache_path(base: str, repo_key: str) -> str:
+    return os.path.join(base, CACHE_DIR, f"{repo_key}.marshal")
+
+
+def load_columns(base: str, repo_key: str, sync: bool = True) -> IssueColumns:
+    """Columns for one repo: from the stats cache if built from the current report cache, else rebuilt."""
+    rows = load_rows(base, repo_key) if sync else None
+    stamp = report_cache_stamp(base, repo_key)
+    path = _cache_path(base, repo_key)
+    try:
+        with open(path, "rb") as f:
+            cached = marshal.load(f)
+        if cached.get("version") == CACHE_VERSION and stamp is not None and cached.get("stamp") == stamp:
+            return IssueColumns.from_dict(repo_key, cached["columns"])
+    except (OSError, EOFError, ValueError, TypeError, AttributeError):
+        pass
+
+    if rows is None:
+        rows = load_rows(base, repo_key, sync=False)
+        stamp = report_cache_stamp(base, repo_key)
+    columns = IssueColumns.from_rows(repo_key, rows)
+    if stamp is not None:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                marshal.dump({"version": CACHE_VERSION, "stamp": stamp, "columns": columns.to_dict()}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Warning: could not write stats cache {path}: {e}", file=sys.stderr)
+    return columns
+
+
+def main():
+    usage = "Usage: triage_stats.py <triage_root> [--repo <owner/repo>] [--filter <filter>] [--no-sync]"
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "--help"):
+        print(usage)
+        return
+    if len(sys.argv) < 2:
+        print(usage, file=sys.stderr)
+        sys.exit(1)
+
+    base = os.path.abspath(sys.argv[1])
+
+    def option(name):
+        if name in sys.argv:
+            idx = sys.argv.index(name)
+            if idx + 1 < len(sys.argv):
+                return sys.argv[idx + 1]
+        return None
+
+    repo = option("--repo")
+    repo_keys = [repo.replace("/", "-", 1)] if repo else list_repo_keys(base)
+    sync = "--no-sync" not in sys.argv
+    columns = [load_columns(base, key, sync) for key in repo_keys]
+    columns = [c for c in columns if c.size]
+
+    filter_name = option("--filter")
+    if filter_name:
+        result = {"issues": [c.issue(i) for c in columns for i in c.positions(c.filter_mask(filter_name))]}
+    else:
+        per_repo = {c.repo_key: c.stats() for c in columns}
+        # With no rows anywhere (empty root, unknown --repo) the totals are zeroed counts.
+        total = merge_stats(list(per_repo.values())) if per_repo else IssueColumns.from_rows("", []).stats()
+        result = {"repos": {key: _with_pct(s) for key, s in per_repo.items()}, "all": _with_pct(total)}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
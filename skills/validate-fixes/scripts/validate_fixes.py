@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""Check every fix candidate's branch against main and sort them into report buckets.
+
+Usage:
+    python validate_fixes.py <triage_root> --repo <owner/repo> --source <repo_path>
+                             [--repo-path <owner/repo>=<path> ...] [--main <ref>] [--issue <number>]
+                             [--merged-prs <prs.json>] [--jobs N] [--fetch] [--no-cache] [--output <file>]
+
+Fix candidates come from the triage index (triage_index.py --filter has-fix). The branch is
+fix.branch from analysis.json or issue_<number>, looked up in the repo named by fix.fix_repo
+(--repo-path) or else in --source. All branch tips in a repo are resolved with one
+`git for-each-ref`; each branch is then checked with `git merge-tree --write-tree` (clean merge
+into main?) and `git rev-list --left-right --count` (commits ahead/behind) in a process pool.
+
+Results are cached in .bookkeeping/validate-fixes/<owner>-<repo>.json keyed by (repo path,
+branch, tip SHA, main SHA), so after a small main update only that one key changes per branch,
+and after a branch push only that branch is re-checked.
+
+--merged-prs takes a JSON array of merged PRs ({"number", "title", "body", "url"}) found on
+GitHub (Step 3 of the skill). A fix is superseded if a merged PR references its issue
+(#N, "fixes #N", or the issue URL), or if its branch has no commits that aren't already in main.
+
+Output format (JSON to stdout, and to --output if given):
+{
+  "repo": "dotnet/diagnostics",
+  "main": {"ref": "main", "sha": "..."},
+  "buckets": {
+    "ready": [{"number": 5632, "title": "...", "fix_confidence": 0.92, "branch": "issue_5632",
+               "repo_path": "...", "tip": "...", "ahead": 3, "behind": 2, "clean": true}],
+    "needs_rebase": [...], "branch_missing": [...], "superseded": [{..., "superseded_by": "PR #5500"}],
+    "reproduced_no_fix": [{"number": 1301, "title": "...", "status": "reproduced"}]
+  },
+  "stats": {"candidates": 14, "checked": 2, "cached": 12}
+}
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'triage-status', 'scripts'))
+from triage_index import open_index, query, sync_repo
+
+CACHE_VERSION = 1
+CACHE_DIR = os.path.join(".bookkeeping", "validate-fixes")
+
+
+def git(repo_path: str, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", "-C", repo_path, *args], capture_output=True, text=True, check=check)
+
+
+def branch_tips(repo_path: str) -> dict[str, str]:
+    """branch name -> tip SHA for local branches, plus origin/* branches not present locally."""
+    out = git(repo_path, "for-each-ref", "--format=%(objectname) %(refname)", "refs/heads", "refs/remotes/origin").stdout
+    local, remote = {}, {}
+    for line in out.splitlines():
+        sha, ref = line.split(" ", 1)
+        if ref.startswith("refs/heads/"):
+            local[ref[len("refs/heads/"):]] = sha
+        elif ref != "refs/remotes/origin/HEAD":
+            remote[ref[len("refs/remotes/origin/"):]] = sha
+    return {**remote, **local}
+
+
+def check_branch(repo_path: str, main_sha: str, tip: str) -> dict:
+    """Merge-cleanliness and ahead/behind counts for one branch tip against main."""
+    merge = git(repo_path, "merge-tree", "--write-tree", "--no-messages", main_sha, tip, check=False)
+    if merge.returncode not in (0, 1):
+        # git < 2.38 has no --write-tree: fall back to the trivial-merge mode and look for conflicts.
+        base = git(repo_path, "merge-base", main_sha, tip).stdout.strip()
+        legacy = git(repo_path, "merge-tree", base, main_sha, tip).stdout
+        clean = "<<<<<<<" not in legacy and "\nchanged in both\n" not in f"\n{legacy}"
+    else:
+        clean = merge.returncode == 0
+    behind, ahead = git(repo_path, "rev-list", "--left-right", "--count", f"{main_sha}...{tip}").stdout.split()
+    return {"clean": clean, "ahead": int(ahead), "behind": int(behind)}
+
+
+def _check_job(job: tuple[str, str, str]) -> dict:
+    return check_branch(*job)
+
+
+def superseding_pr(number: int, issue_url: str, merged_prs: list[dict]) -> str | None:
+    """The first merged PR whose title or body references the issue, as "PR #N"."""
+    ref = re.compile(rf"(?<![\w/])#{number}\b")
+    for pr in merged_prs:
+        text = f"{pr.get('title') or ''}\n{pr.get('body') or ''}"
+        if ref.search(text) or (issue_url and issue_url in text):
+            return f"PR #{pr['number']}" if pr.get("number") else pr.get("url", "merged PR")
+    return None
+
+
+def _read_cache(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return cache.get("results", {}) if isinstance(cache, dict) and cache.get("version") == CACHE_VERSION else {}
+
+
+def _write_cache(path: str, results: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "results": results}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _fix_info(base: str, repo_key: str, number: int) -> dict:
+    try:
+        with open(os.path.join(base, "issues", repo_key, str(number), "analysis.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("fix", {}) or {}
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return {}
+
+
+def validate(base: str, repo: str, source: str, repo_paths: dict[str, str], main_ref: str = "main",
+             issue: int | None = None, merged_prs: list[dict] | None = None, jobs: int | None = None,
+             fetch: bool = False, use_cache: bool = True) -> dict:
+    repo_key = repo.replace("/", "-", 1)
+    conn = open_index(base)
+    sync_repo(conn, base, repo_key)
+    candidates = query(conn, repo_key, "has-fix", number=issue)
+    no_fix = query(conn, repo_key, "no-fix", number=issue)
+
+    # Resolve which local checkout each candidate's branch lives in.
+    work = []
+    for row in candidates:
+        fix = _fix_info(base, repo_key, row["number"])
+        branch = row.get("fix_branch") or fix.get("branch") or f"issue_{row['number']}"
+        repo_path = os.path.abspath(repo_paths.get(fix.get("fix_repo") or "", source))
+        work.append((row, branch, repo_path))
+
+    mains, tips = {}, {}
+    for repo_path in sorted({p for _row, _branch, p in work} | {os.path.abspath(source)}):
+        if fetch:
+            git(repo_path, "fetch", "--quiet", "--prune", "origin", check=False)
+        mains[repo_path] = git(repo_path, "rev-parse", "--verify", f"{main_ref}^{{commit}}").stdout.strip()
+        tips[repo_path] = branch_tips(repo_path)
+
+    cache_path = os.path.join(base, CACHE_DIR, f"{repo_key}.json")
+    cache = _read_cache(cache_path) if use_cache else {}
+    fresh, pending = {}, {}
+    for row, branch, repo_path in work:
+        tip = tips[repo_path].get(branch)
+        if tip is None:
+            continue
+        key = f"{repo_path}|{branch}|{tip}|{mains[repo_path]}"
+        if key in cache:
+            fresh[key] = cache[key]
+        else:
+            pending[key] = (repo_path, mains[repo_path], tip)
+
+    if pending:
+        workers = jobs or min(8, os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for key, result in zip(pending, pool.map(_check_job, pending.values())):
+                fresh[key] = result
+    stored = fresh
+    if issue is not None:
+        # Only this issue's branch was looked at: keep every other branch's results, and drop
+        # just this branch's entries for older tips or mains.
+        checked = {f"{repo_path}|{branch}" for _row, branch, repo_path in work}
+        stored = {key: value for key, value in cache.items() if key.rsplit("|", 2)[0] not in checked}
+        stored.update(fresh)
+    if use_cache and (pending or stored.keys() != cache.keys()):
+        try:
+            _write_cache(cache_path, stored)
+        except OSError as e:
+            print(f"Warning: could not write validation cache {cache_path}: {e}", file=sys.stderr)
+
+    buckets = {"ready": [], "needs_rebase": [], "branch_missing": [], "superseded": [], "reproduced_no_fix": []}
+    for row, branch, repo_path in work:
+        item = {"number": row["number"], "title": row["title"], "fix_confidence": row["fix_confidence"],
+                "branch": branch, "repo_path": repo_path}
+        tip = tips[repo_path].get(branch)
+        if tip is None:
+            buckets["branch_missing"].append(item)
+            continue
+        item["tip"] = tip
+        item.update(fresh[f"{repo_path}|{branch}|{tip}|{mains[repo_path]}"])
+        by_pr = superseding_pr(row["number"], row.get("url", ""), merged_prs or [])
+        if by_pr or item["ahead"] == 0:
+            item["superseded_by"] = by_pr or f"already in {main_ref}"
+            buckets["superseded"].append(item)
+        elif item["clean"]:
+            buckets["ready"].append(item)
+        else:
+            buckets["needs_rebase"].append(item)
+    for row in no_fix:
+        buckets["reproduced_no_fix"].append({"number": row["number"], "title": row["title"], "status": row["status"]})
+
+    return {
+        "repo": repo,
+        "main": {"ref": main_ref, "sha": mains[os.path.abspath(source)]},
+        "buckets": buckets,
+        "stats": {"candidates": len(work), "checked": len(pending),
+                  "cached": sum(1 for _r, b, p in work if b in tips[p]) - len(pending)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate fix branches for triaged issues.")
+    parser.add_argument("triage_root")
+    parser.add_argument("--repo", required=True, help="owner/repo of the issues")
+    parser.add_argument("--source", required=True, help="Local checkout of the issue's repo")
+    parser.add_argument("--repo-path", action="append", default=[], metavar="OWNER/REPO=PATH",
+                        help="Local checkout for a fix.fix_repo other than --repo (repeatable)")
+    parser.add_argument("--main", default="main", help="Branch to validate against (default: main)")
+    parser.add_argument("--issue", type=int, help="Validate just this issue")
+    parser.add_argument("--merged-prs", help="JSON file with merged PRs from GitHub")
+    parser.add_argument("--jobs", type=int, help="Worker processes (default: min(8, CPUs))")
+    parser.add_argument("--fetch", action="store_true", help="git fetch origin in each repo first")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    repo_paths = {}
+    for item in args.repo_path:
+        name, sep, path = item.partition("=")
+        if not sep:
+            parser.error(f"--repo-path expects OWNER/REPO=PATH, got {item!r}")
+        repo_paths[name] = path
+    merged_prs = []
+    if args.merged_prs:
+        with open(args.merged_prs, "r", encoding="utf-8") as f:
+            merged_prs = json.load(f)
+
+    try:
+        result = validate(os.path.abspath(args.triage_root), args.repo, args.source, repo_paths, args.main,
+                          args.issue, merged_prs, args.jobs, args.fetch, not args.no_cache)
+    except subprocess.CalledProcessError as e:
+        print(f"Error: {' '.join(e.cmd)} failed: {e.stderr.strip()}", file=sys.stderr)
+        sys.exit(1)
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()